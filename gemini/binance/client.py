@@ -6,6 +6,8 @@ import hmac
 import requests
 import six
 import time
+from ..codec import loads, response_json
+from ..sessions import request, mount
 from .exceptions import BinanceAPIException, BinanceRequestException, BinanceWithdrawException
 
 if six.PY2:
@@ -87,7 +89,7 @@ class Client(object):
 
     def _init_session(self):
 
-        session = requests.session()
+        session = mount('BINANCE', requests.session())
         session.headers.update({'Accept': 'application/json',
                                 'User-Agent': 'binance/python',
                                 'X-MBX-APIKEY': self.API_KEY})
@@ -168,10 +170,34 @@ class Client(object):
         if not str(response.status_code).startswith('2'):
             raise BinanceAPIException(response)
         try:
-            return response.json()
+            return response_json(response)
         except ValueError:
             raise BinanceRequestException('Invalid Response: %s' % response.text)
 
+    async def _request_api_async(self, method, path, signed=False, version=PUBLIC_API_VERSION, data=None):
+        """Non-blocking version of _request_api over aiohttp, to be awaited from the event loop.
+        The parameters are sent in the query string for GET, in the form encoded body otherwise.
+        """
+        uri = self._create_api_uri(path, signed, version)
+        data = data if data is not None else {}
+        if signed:
+            data['timestamp'] = int(time.time() * 1000)
+            data['signature'] = self._generate_signature(data)
+        params = urlencode(self._order_params(data))
+        headers = dict(self.session.headers)
+        if method == 'get':
+            uri = uri + '?' + params
+            params = None
+        else:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        status, content = await request('BINANCE', method, uri, headers=headers, data=params)
+        if not str(status).startswith('2'):
+            raise BinanceRequestException('APIError(status=%d): %s' % (status, content.decode('utf8', 'replace')))
+        try:
+            return loads(content)
+        except ValueError:
+            raise BinanceRequestException('Invalid Response: %s' % content.decode('utf8', 'replace'))
+
     def _get(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
         return self._request_api('get', path, signed, version, **kwargs)
 
@@ -845,6 +871,18 @@ class Client(object):
         """
         return self._post('order', True, data=params)
 
+    async def create_order_async(self, **params):
+        """Non-blocking create_order, to be awaited from the event loop
+
+        Takes the same parameters as create_order
+
+        :returns: API response
+
+        :raises: BinanceRequestException
+
+        """
+        return await self._request_api_async('post', 'order', True, data=params)
+
     def order_limit(self, timeInForce=TIME_IN_FORCE_GTC, **params):
         """Send in a new limit order
 
@@ -1168,6 +1206,64 @@ class Client(object):
         """
         return self._delete('order', True, data=params)
 
+    async def cancel_order_async(self, **params):
+        """Non-blocking cancel_order, to be awaited from the event loop
+
+        Takes the same parameters as cancel_order
+
+        :returns: API response
+
+        :raises: BinanceRequestException
+
+        """
+        return await self._request_api_async('delete', 'order', True, data=params)
+
+    def cancel_replace_order(self, **params):
+        """Cancel an existing order and place a new order on the same symbol in one request.
+
+        https://github.com/binance-exchange/binance-official-api-docs/blob/master/rest-api.md#cancel-an-existing-order-and-send-a-new-order-trade
+
+        :param symbol: required
+        :type symbol: str
+        :param side: required
+        :type side: enum
+        :param type: required
+        :type type: enum
+        :param cancelReplaceMode: required, STOP_ON_FAILURE or ALLOW_FAILURE
+        :type cancelReplaceMode: str
+        :param cancelOrderId: the order to cancel
+        :type cancelOrderId: int
+        :param timeInForce: required if limit order
+        :type timeInForce: enum
+        :param quantity: required
+        :type quantity: decimal
+        :param price: required
+        :type price: str
+
+        :returns: API response
+
+        .. code-block:: python
+
+            {
+                "cancelResult": "SUCCESS",
+                "newOrderResult": "SUCCESS",
+                "cancelResponse": {
+                    "symbol": "BTCUSDT",
+                    "orderId": 9,
+                    "status": "CANCELED"
+                },
+                "newOrderResponse": {
+                    "symbol": "BTCUSDT",
+                    "orderId": 10,
+                    "status": "NEW"
+                }
+            }
+
+        :raises: BinanceResponseException, BinanceAPIException
+
+        """
+        return self._post('order/cancelReplace', True, data=params)
+
     def get_open_orders(self, **params):
         """Get all open orders on a symbol.
 
@@ -1,48 +1,61 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-from operator import itemgetter
+import logging
+import threading
+import time
 
 from .websockets import BinanceSocketManager
+from ..orderbook import IncrementalOrderBook
+
+log = logging.getLogger("gemini.binance")
 
 
 class DepthCache(object):
 
-    def __init__(self, symbol):
+    def __init__(self, symbol, depth=10):
         """Intialise the DepthCache
 
         :param symbol: Symbol to create depth cache for
         :type symbol: string
+        :param depth: Number of levels returned on each side
+        :type depth: int
 
         """
         self.symbol = symbol
-        self._bids = {}
-        self._asks = {}
+        self.book = IncrementalOrderBook(depth)
 
     def add_bid(self, bid):
-        """Add a bid to the cache
+        """Add a bid to the cache, a zero quantity removes the level
 
         :param bid:
         :return:
 
         """
-        self._bids[bid[0]] = float(bid[1])
-        if bid[1] == "0.00000000":
-            del self._bids[bid[0]]
+        self.book.update_bid(float(bid[0]), float(bid[1]))
 
     def add_ask(self, ask):
-        """Add an ask to the cache
+        """Add an ask to the cache, a zero quantity removes the level
 
         :param ask:
         :return:
 
         """
-        self._asks[ask[0]] = float(ask[1])
-        if ask[1] == "0.00000000":
-            del self._asks[ask[0]]
+        self.book.update_ask(float(ask[0]), float(ask[1]))
+
+    def clear(self):
+        self.book.reset()
+
+    def get_order_book(self):
+        """Get the top of the book, the levels are kept sorted incrementally
+
+        :return: gemini.orderbook.OrderBook
+
+        """
+        return self.book.publish()
 
     def get_bids(self):
-        """Get the current bids
+        """Get the current top bids
 
         :return: list of bids with price and quantity as floats
 
@@ -56,26 +69,15 @@ class DepthCache(object):
                 [
                     0.00019459,
                     2384.0
-                ],
-                [
-                    0.00019158,
-                    5219.0
-                ],
-                [
-                    0.00019157,
-                    1180.0
-                ],
-                [
-                    0.00019082,
-                    287.0
                 ]
             ]
 
         """
-        return DepthCache.sort_depth(self._bids, reverse=True)
+        bids = self.get_order_book().bids
+        return [[price, quantity] for price, quantity in zip(bids.prices, bids.volumes)]
 
     def get_asks(self):
-        """Get the current asks
+        """Get the current top asks
 
         :return: list of asks with price and quantity as floats
 
@@ -89,92 +91,145 @@ class DepthCache(object):
                 [
                     0.00019699,
                     778.0
-                ],
-                [
-                    0.000197,
-                    64.0
-                ],
-                [
-                    0.00019709,
-                    1130.0
-                ],
-                [
-                    0.0001971,
-                    385.0
                 ]
             ]
 
         """
-        return DepthCache.sort_depth(self._asks, reverse=False)
-
-    @staticmethod
-    def sort_depth(vals, reverse=False):
-        """Sort bids or asks by price
-        """
-        lst = [[float(price), quantity] for price, quantity in vals.items()]
-        lst = sorted(lst, key=itemgetter(0), reverse=reverse)
-        return lst
+        asks = self.get_order_book().asks
+        return [[price, quantity] for price, quantity in zip(asks.prices, asks.volumes)]
 
 
 class DepthCacheManager(object):
 
-    def __init__(self, client, symbol, callback):
+    RESYNC_DELAY = 1
+
+    def __init__(self, client, symbol, callback, depth=10, limit=500, bm=None):
         """Intialise the DepthCacheManager
 
+        The book is built from a REST snapshot and the diff depth events. An event which does not
+        follow the last applied update id triggers a new snapshot, the events received meanwhile
+        are buffered and replayed on top of it.
+
         :param client: Binance API client
         :type client: binance.Client
         :param symbol: Symbol to create depth cache for
         :type symbol: string
         :param callback: Function to receive depth cache updates
         :type callback: function
+        :param depth: Number of levels returned by the depth cache
+        :type depth: int
+        :param limit: Number of levels of the REST snapshot
+        :type limit: int
+        :param bm: Socket manager already streaming the diff depth events to process_event,
+            a dedicated socket is started if None
+        :type bm: BinanceSocketManager
 
         """
         self._client = client
         self._symbol = symbol
         self._callback = callback
-        self._first_update_id = 0
+        self._limit = limit
+        self._last_update_id = None
+        self._events = []
+        self._resyncing = False
+        self._lock = threading.Lock()
         self._bm = None
-        self._depth_cache = DepthCache(self._symbol)
-
-        self._init_cache()
-        self._start_socket()
-
-    def _init_cache(self):
-        res = self._client.get_order_book(symbol=self._symbol, limit=500)
+        self._depth_cache = DepthCache(self._symbol, depth)
 
-        self._first_update_id = res['lastUpdateId']
-
-        for bid in res['bids']:
-            self._depth_cache.add_bid(bid)
-        for ask in res['asks']:
-            self._depth_cache.add_ask(ask)
+        if bm is None:
+            self._start_socket()
 
     def _start_socket(self):
         self._bm = BinanceSocketManager(self._client)
 
-        self._bm.start_depth_socket(self._symbol, self._depth_event)
+        self._bm.start_depth_socket(self._symbol, self.process_event)
 
         self._bm.start()
 
-    def _depth_event(self, msg):
-        """
+    def _resync(self):
+        self._last_update_id = None
+        if not self._resyncing:
+            self._resyncing = True
+            thread = threading.Thread(target=self._init_cache)
+            thread.daemon = True
+            thread.start()
 
-        :param msg:
-        :return:
+    def _init_cache(self):
+        while True:
+            try:
+                res = self._client.get_order_book(symbol=self._symbol, limit=self._limit)
+            except Exception as e:
+                log.error('%s depth snapshot failed: %s' % (self._symbol, str(e)))
+                time.sleep(self.RESYNC_DELAY)
+                continue
+            with self._lock:
+                self._depth_cache.clear()
+                for bid in res['bids']:
+                    self._depth_cache.add_bid(bid)
+                for ask in res['asks']:
+                    self._depth_cache.add_ask(ask)
+                self._last_update_id = res['lastUpdateId']
+                events, self._events = self._events, []
+                synced = all(self._apply_event(msg) for msg in events)
+                if synced:
+                    self._resyncing = False
+                    self._callback(self._depth_cache)
+                    return
+                # the snapshot is older than the buffered events
+                self._last_update_id = None
+                log.warning('%s depth snapshot out of date, retrying' % (self._symbol,))
+            time.sleep(self.RESYNC_DELAY)
+
+    def _apply_event(self, msg):
+        """Apply a diff depth event on top of the last update id
+
+        :return: False if some updates are missing between the book and the event
 
         """
-        # ignore any updates before the initial update id
-        if msg['u'] <= self._first_update_id:
-            return
+        # ignore any updates before the last update id
+        if msg['u'] <= self._last_update_id:
+            return True
+        if msg['U'] > self._last_update_id + 1:
+            return False
 
         # add any bid or ask values
         for bid in msg['b']:
             self._depth_cache.add_bid(bid)
         for ask in msg['a']:
             self._depth_cache.add_ask(ask)
+        self._last_update_id = msg['u']
+        return True
+
+    def process_event(self, msg):
+        """Handle a diff depth event
+
+        :param msg:
+        :return:
+
+        """
+        with self._lock:
+            if self._last_update_id is None:
+                self._events.append(msg)
+                self._resync()
+                return
+            if not self._apply_event(msg):
+                log.warning('%s depth update gap: %d -> %d, resyncing' % (self._symbol, self._last_update_id, msg['U']))
+                self._events = [msg]
+                self._resync()
+                return
+
+            # call the callback with the updated depth cache
+            self._callback(self._depth_cache)
+
+    def invalidate(self):
+        """Drop the book, it is rebuilt from a new snapshot on the next event
 
-        # call the callback with the updated depth cache
-        self._callback(self._depth_cache)
+        :return:
+        """
+        with self._lock:
+            self._events = []
+            self._depth_cache.clear()
+            self._last_update_id = None
 
     def get_depth_cache(self):
         """Get the current depth cache
@@ -189,4 +244,5 @@ class DepthCacheManager(object):
 
         :return:
         """
-        self._bm.close()
+        if self._bm is not None:
+            self._bm.close()
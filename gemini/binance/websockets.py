@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-import json
 import threading
 
 from autobahn.twisted.websocket import WebSocketClientFactory, \
@@ -12,6 +11,7 @@ from twisted.internet.protocol import ReconnectingClientFactory
 from twisted.internet.error import ReactorAlreadyRunning
 
 from .client import Client
+from ..codec import loads
 
 
 class BinanceClientProtocol(WebSocketClientProtocol):
@@ -23,7 +23,7 @@ class BinanceClientProtocol(WebSocketClientProtocol):
     def onMessage(self, payload, isBinary):
         if not isBinary:
             try:
-                payload_obj = json.loads(payload.decode('utf8'))
+                payload_obj = loads(payload)
             except ValueError:
                 pass
             else:
@@ -53,8 +53,9 @@ class BinanceClientFactory(WebSocketClientFactory, BinanceReconnectingClientFact
             self.retry(connector)
 
 class BinanceClientDefaultFactory(BinanceClientFactory):
-    def __init__(self, symbol):
-        super(BinanceClientDefaultFactory, self).__init__(BinanceSocketManager.STREAM_URL + 'ws/' + symbol.lower() + '@depth' + BinanceSocketManager.WEBSOCKET_DEPTH_10)
+    def __init__(self, symbol, depth='10'):
+        # depth '1' is the diff depth stream, see BinanceSocketManager.start_depth_socket
+        super(BinanceClientDefaultFactory, self).__init__(BinanceSocketManager.STREAM_URL + 'ws/' + symbol.lower() + '@depth' + ('' if depth == '1' else depth))
 
 class BinanceSocketManager(threading.Thread):
 
@@ -349,7 +350,11 @@ class BinanceSocketManager(threading.Thread):
         """
         return self._start_socket('!ticker@arr', callback)
 
-    def start_multiplex_socket(self, streams, callback):
+    @staticmethod
+    def get_multiplex_path(streams):
+        return 'streams={}'.format('/'.join(streams))
+
+    def start_multiplex_socket(self, streams, callback, custom_factory=None):
         """Start a multiplexed socket using a list of socket names.
         User stream sockets can not be included.
 
@@ -369,8 +374,8 @@ class BinanceSocketManager(threading.Thread):
         Message Format - see Binance API docs for all types
 
         """
-        stream_path = 'streams={}'.format('/'.join(streams))
-        return self._start_socket(stream_path, callback, 'stream?')
+        stream_path = BinanceSocketManager.get_multiplex_path(streams)
+        return self._start_socket(stream_path, callback, 'stream?', custom_factory=custom_factory)
 
     def start_user_socket(self, callback):
         """Start a websocket for user data
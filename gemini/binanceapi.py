@@ -1,15 +1,18 @@
 from .exchange import Exchange, ExchangeLogHandler
 from .order import Order
+from .orderbook import OrderBook
 from .logger import Logger as log
+from . import config
 from .binance.client import Client
-from .binance.websockets import BinanceSocketManager, BinanceClientDefaultFactory
+from .binance.websockets import BinanceSocketManager, BinanceClientFactory
+from .binance.depthcache import DepthCacheManager
 from functools import partial
-import logging
+import asyncio, logging
 
-class BinanceCustomFactory(BinanceClientDefaultFactory):
+class BinanceCustomFactory(BinanceClientFactory):
 
-    def __init__(self, xchg, symbol):
-        super(BinanceCustomFactory, self).__init__(symbol)
+    def __init__(self, xchg, streams):
+        super(BinanceCustomFactory, self).__init__(BinanceSocketManager.STREAM_URL + 'stream?' + BinanceSocketManager.get_multiplex_path(streams))
         self.xchg = xchg
 
     def clientConnectionFailed(self, connector, reason):
@@ -27,6 +30,7 @@ class Binance(Exchange):
     all_pairs = ("eth_btc", "xrp_btc", "ltc_btc", "xvg_btc", "iota_btc", "trx_btc", "neo_btc", "dash_btc", "eos_btc", "xlm_btc", "xmr_btc",
                             "xrp_eth", "ltc_eth", "xvg_eth", "iota_eth", "trx_eth", "neo_eth", "dash_eth", "eos_eth", "xlm_eth", "xmr_eth",
       "btc_usdt","eth_usdt",           "ltc_usdt",                                  "neo_usdt")
+    time_in_force_modes = ('GTC', 'IOC', 'FOK')
 
     def __init__(self, keyfile, loop, has_error):
         super(Binance, self).__init__(Binance.all_pairs, keyfile, loop, has_error)
@@ -39,24 +43,52 @@ class Binance(Exchange):
             key = list(self.keyhandler.getKeys())[0]
             api_secret = self.keyhandler.getSecret(key)
             self.api = Client(key, api_secret)
+        # the diff depth books are synchronized from the public REST snapshots
+        self.public_api = self.api if self.api is not None else Client(None, None)
+        self.depth_managers = {}
+        self.stream_callbacks = {}
         self.name = 'BINANCE'
         self.trading_fee = 0.001
         self.bm = BinanceSocketManager(self.api)
+        self.user_socket_key = None
         self.reconnect()
         self.start()
 
     def format_pair(self, pair):
         return pair[0].upper() + pair[1].upper()
 
+    def process_stream_message(self, msg):
+        # combined stream events are wrapped as {"stream": "<symbol>@depth<levels>", "data": <event>}
+        callback = self.stream_callbacks.get(msg.get('stream'))
+        if callback is not None:
+            callback(msg['data'])
+
+    def process_user_message(self, msg):
+        # account and order events of the user data stream
+        if msg['e'] in ('outboundAccountInfo', 'outboundAccountPosition'):
+            for balance in msg['B']:
+                self.publish_balance(balance['a'].upper(), float(balance['f']))
+        elif msg['e'] == 'executionReport':
+            order = Order(orderID=msg['i'],
+                          price=float(msg['p']),
+                          volume=float(msg['q']) - float(msg['z']),
+                          type=msg['S'],
+                          pair=self.pair_from_symbol(msg['s']))
+            self.publish_order(order, msg['X'] in ('NEW', 'PARTIALLY_FILLED'))
+
     def process_message(self, pairstr, msg):
-        self.depths[pairstr] = { 'bids' : [Order(float(o[0]), float(o[1])) for o in msg['bids']],
-                                    'asks' : [Order(float(o[0]), float(o[1])) for o in msg['asks']]}
+        self.publish_depth(pairstr, OrderBook.from_levels(msg['bids'], msg['asks']))
+
+    def process_depth_cache(self, pairstr, depth_cache):
+        # only republish when the top of the book changed
+        if depth_cache.book.changed:
+            self.publish_depth(pairstr, depth_cache.get_order_book())
 
     def get_depth(self, base, alt):
         pairstr = self.format_pair((base, alt))
         # DEBUG - show best bid ask for each ccy pair
-        #if len(self.depths[pairstr]['bids']) > 0 and len(self.depths[pairstr]['asks']) > 0:
-        #    log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr]['bids'][0].p, self.depths[pairstr]['asks'][0].p))
+        #if not self.depths[pairstr].is_empty():
+        #    log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr].best_bid(), self.depths[pairstr].best_ask()))
         return self.depths[pairstr]
 
     def get_ticker(self):
@@ -73,15 +105,45 @@ class Binance(Exchange):
 
     def submit_order(self, pair, side, price, volume):
         pairstr = self.format_pair(pair)
+        time_in_force = self.get_time_in_force()
         order = None
         if side == "SELL":
-            order = self.api.create_order(symbol=pairstr, side=Client.SIDE_SELL, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=Client.TIME_IN_FORCE_GTC)
+            order = self.api.create_order(symbol=pairstr, side=Client.SIDE_SELL, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=time_in_force)
         elif side == "BUY":
-            order = self.api.create_order(symbol=pairstr, side=Client.SIDE_BUY, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=Client.TIME_IN_FORCE_GTC)
+            order = self.api.create_order(symbol=pairstr, side=Client.SIDE_BUY, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=time_in_force)
         else:
             raise RuntimeError("Unsupported order type: %s" % (side,))
         self.log_order(side, order)
-        return Order(orderID=order['orderId'], price=price, volume=volume, type=side, pair=pair)
+        return self.make_order(order, pair, side, price, volume, time_in_force)
+
+    async def submit_order_async(self, pair, side, price, volume):
+        pairstr = self.format_pair(pair)
+        time_in_force = self.get_time_in_force()
+        order = None
+        if side == "SELL":
+            order = await self.api.create_order_async(symbol=pairstr, side=Client.SIDE_SELL, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=time_in_force)
+        elif side == "BUY":
+            order = await self.api.create_order_async(symbol=pairstr, side=Client.SIDE_BUY, type=Client.ORDER_TYPE_LIMIT, price=price, quantity=volume, timeInForce=time_in_force)
+        else:
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        self.log_order(side, order)
+        return self.make_order(order, pair, side, price, volume, time_in_force)
+
+    def make_order(self, order, pair, side, price, volume, time_in_force):
+        # the limit orders come back with their fills, the IOC and FOK orders are closed once acknowledged
+        new_order = Order(orderID=order['orderId'], price=price, volume=volume, type=side, pair=pair)
+        if time_in_force != Client.TIME_IN_FORCE_GTC:
+            new_order.executed = float(order['executedQty'])
+        return new_order
+
+    def replace_order(self, order, price, volume):
+        # the new order is not placed if the cancellation fails
+        result = self.api.cancel_replace_order(symbol=self.format_pair(order.pair), side=order.type, type=Client.ORDER_TYPE_LIMIT,
+                                               cancelReplaceMode='STOP_ON_FAILURE', cancelOrderId=order.id,
+                                               price=price, quantity=volume, timeInForce=Client.TIME_IN_FORCE_GTC)
+        new_order = result['newOrderResponse']
+        self.log_order(order.type, new_order)
+        return Order(orderID=new_order['orderId'], price=price, volume=volume, type=order.type, pair=order.pair)
 
     def query_active_orders(self):
         return [Order(orderID=order['orderId'],
@@ -98,17 +160,51 @@ class Binance(Exchange):
             for order in orders:
                 self.api.cancel_order(orderId=str(order.id), symbol=self.format_pair(order.pair))
 
+    async def cancel_orders_async(self, orders = None):
+        if orders is None:
+            await super(Binance, self).cancel_orders_async(orders)
+        else:
+            await asyncio.gather(*[self.api.cancel_order_async(orderId=str(order.id), symbol=self.format_pair(order.pair)) for order in orders])
+
     def start(self):
         self.socket_key = self.bm.start()
+        if self.api is not None and self.name in config.USER_DATA_STREAMS:
+            # the listen key is kept alive by the socket manager
+            self.user_socket_key = self.bm.start_user_socket(self.process_user_message)
+            self.user_stream = bool(self.user_socket_key)
 
     def stop(self):
         self.bm.stop_socket(self.socket_key)
+        if self.user_socket_key:
+            self.user_stream = False
+            self.bm.stop_socket(self.user_socket_key)
+            self.user_socket_key = None
+        for depth_manager in self.depth_managers.values():
+            depth_manager.invalidate()
         self.depths = {}
+        self.invalidate_depths()
         log.info("Closed Binance websocket")
 
     def reconnect(self):
+        stream_callbacks = {}
         for pair in self.get_tradeable_pairs():
             pairstr = self.format_pair(pair)
-            self.depths[pairstr] = {'bids': [], 'asks': []}
-            self.bm.start_depth_socket(symbol=pairstr, callback=partial(self.process_message, pairstr), depth=10, custom_factory=BinanceCustomFactory(self, pairstr))
+            self.depths[pairstr] = OrderBook()
+            if config.BINANCE_BOOK_MODE == 'DIFF':
+                if pairstr in self.depth_managers:
+                    # some events may have been lost, the book is resynchronized from a new snapshot
+                    self.depth_managers[pairstr].invalidate()
+                else:
+                    self.depth_managers[pairstr] = DepthCacheManager(self.public_api, pairstr, partial(self.process_depth_cache, pairstr),
+                                                                     config.ORDERBOOK_DEPTH, config.BINANCE_SNAPSHOT_LIMIT, self.bm)
+                stream_callbacks[pairstr.lower() + '@depth'] = self.depth_managers[pairstr].process_event
+            else:
+                stream_callbacks[pairstr.lower() + '@depth' + BinanceSocketManager.WEBSOCKET_DEPTH_10] = partial(self.process_message, pairstr)
+        self.stream_callbacks = stream_callbacks
+        # all the symbols are streamed over a few combined stream connections
+        streams = sorted(stream_callbacks.keys())
+        nb_connections = max(1, min(config.BINANCE_STREAM_CONNECTIONS, len(streams)))
+        for idx in range(nb_connections):
+            self.bm.start_multiplex_socket(streams[idx::nb_connections], self.process_stream_message, custom_factory=BinanceCustomFactory(self, streams[idx::nb_connections]))
+        self.invalidate_depths()
         log.info("Connected to Binance websocket")
\ No newline at end of file
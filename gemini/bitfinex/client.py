@@ -29,20 +29,26 @@ class BtfxWss:
     Data can be accessed using the provided methods.
     """
 
-    def __init__(self, key=None, secret=None, log_level=None, **wss_kwargs):
+    def __init__(self, key=None, secret=None, log_level=None, push=True, **wss_kwargs):
         """
         Initializes BtfxWss Instance.
         :param key: Api Key as string
         :param secret: Api secret as string
         :param addr: Websocket API Address
+        :param push: if True, the messages are handled on the connection
+                     thread as they arrive, else they are queued to the
+                     QueueProcessor thread
         """
         self.key = key if key else ''
         self.secret = secret if secret else ''
+        self.push = push
 
         self.conn = WebSocketConnection(log_level=log_level,
                                         **wss_kwargs)
         self.queue_processor = QueueProcessor(self.conn.q,
                                               log_level=log_level)
+        if self.push:
+            self.conn.on_data = self.queue_processor.handle_message
 
     ##############
     # Properties #
@@ -318,7 +324,8 @@ class BtfxWss:
         :return:
         """
         self.conn.start()
-        self.queue_processor.start()
+        if not self.push:
+            self.queue_processor.start()
 
     def stop(self):
         """Stop the client.
@@ -326,7 +333,8 @@ class BtfxWss:
         :return:
         """
         self.conn.disconnect()
-        self.queue_processor.join()
+        if not self.push:
+            self.queue_processor.join()
 
     def reset(self):
         """Reset the client.
@@ -601,9 +609,18 @@ class BtfxWss:
         """Post a new Order via Websocket.
 
         :param kwargs:
-        :return:
+        :return: True if the order was sent
+        """
+        return self._send_auth_command('on', order_settings)
+
+    @is_connected
+    def update_order(self, **order_settings):
+        """Update the price or the amount of an Order via Websocket.
+
+        :param order_settings: id of the order and its new settings
+        :return: True if the request was sent
         """
-        self._send_auth_command('on', order_settings)
+        return self._send_auth_command('ou', order_settings)
 
     @is_connected
     def cancel_order(self, multi=False, **order_identifiers):
@@ -612,12 +629,12 @@ class BtfxWss:
         :param multi: bool, whether order_settings contains settings for one, or
                       multiples orders
         :param order_identifiers: Identifiers for the order(s) you with to cancel
-        :return:
+        :return: True if the request was sent
         """
         if multi:
-            self._send_auth_command('oc_multi', order_identifiers)
+            return self._send_auth_command('oc_multi', order_identifiers)
         else:
-            self._send_auth_command('oc', order_identifiers)
+            return self._send_auth_command('oc', order_identifiers)
 
     @is_connected
     def order_multi_op(self, *operations):
@@ -639,4 +656,4 @@ class BtfxWss:
 
     def _send_auth_command(self, channel_name, data):
         payload = [0, channel_name, None, data]
-        self.conn.send(list_data=payload)
+        return self.conn.send(list_data=payload)
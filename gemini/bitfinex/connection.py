@@ -5,13 +5,17 @@ import time
 import ssl
 import hashlib
 import hmac
-from multiprocessing import Queue
-from threading import Thread, Event, Timer
+from queue import Queue
+from threading import Thread, Event
 from collections import OrderedDict
 
 # Import Third-Party
 import websocket
 
+# Import Homebrew
+from ..watchdog import watchdog
+from ..codec import loads
+
 # Import Homebrew
 
 # Init Logging Facilities
@@ -50,6 +54,10 @@ class WebSocketConnection(Thread):
         # Queue used to pass data up to BTFX client
         self.q = Queue()
 
+        # Optional callable, receives the data on the connection thread
+        # instead of the queue
+        self.on_data = None
+
         # Connection Settings
         self.socket = None
         self.url = url if url else 'wss://api.bitfinex.com/ws/2'
@@ -71,19 +79,21 @@ class WebSocketConnection(Thread):
         self.reconnect_interval = reconnect_interval if reconnect_interval else 10
         self.paused = Event()
 
-        # Setup Timer attributes
+        # Setup Timer attributes, the timeouts are all checked by the
+        # shared watchdog thread
         # Tracks API Connection & Responses
-        self.ping_timer = None
         self.ping_interval = 120
+        self.ping_timer = watchdog.watch(self.ping_interval, self.send_ping)
 
         # Tracks Websocket Connection
-        self.connection_timer = None
         self.connection_timeout = timeout if timeout else 10
+        self.connection_timer = watchdog.watch(self.connection_timeout,
+                                               self._connection_timed_out)
 
         # Tracks responses from send_ping()
-        self.pong_timer = None
         self.pong_received = False
         self.pong_timeout = 30
+        self.pong_timer = watchdog.watch(self.pong_timeout, self._check_pong)
 
         self.log = logging.getLogger(self.__module__)
         if log_level == logging.DEBUG:
@@ -172,14 +182,12 @@ class WebSocketConnection(Thread):
 
         :return:
         """
-        self._stop_timers()
-
         raw, received_at = message, time.time()
         self.log.debug("_on_message(): Received new message %s at %s",
                        raw, received_at)
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
+            data = loads(raw)
+        except ValueError:
             # Something wrong with this data, log and discard
             return
 
@@ -221,14 +229,9 @@ class WebSocketConnection(Thread):
 
         :return:
         """
-        if self.ping_timer:
-            self.ping_timer.cancel()
-
-        if self.connection_timer:
-            self.connection_timer.cancel()
-
-        if self.pong_timer:
-            self.pong_timer.cancel()
+        self.ping_timer.cancel()
+        self.connection_timer.cancel()
+        self.pong_timer.cancel()
         self.log.debug("_stop_timers(): Timers stopped.")
 
     def _start_timers(self):
@@ -237,16 +240,13 @@ class WebSocketConnection(Thread):
         :return:
         """
         self.log.debug("_start_timers(): Resetting timers..")
-        self._stop_timers()
+        self.pong_timer.cancel()
 
         # Sends a ping at ping_interval to see if API still responding
-        self.ping_timer = Timer(self.ping_interval, self.send_ping)
-        self.ping_timer.start()
+        self.ping_timer.touch()
 
         # Automatically reconnect if we didnt receive data
-        self.connection_timer = Timer(self.connection_timeout,
-                                      self._connection_timed_out)
-        self.connection_timer.start()
+        self.connection_timer.touch()
 
     def send_ping(self):
         """Sends a ping message to the API and starts pong timers.
@@ -255,8 +255,7 @@ class WebSocketConnection(Thread):
         """
         self.log.debug("send_ping(): Sending ping to API..")
         self.socket.send(json.dumps({'event': 'ping'}))
-        self.pong_timer = Timer(self.pong_timeout, self._check_pong)
-        self.pong_timer.start()
+        self.pong_timer.touch()
 
     def _check_pong(self):
         """Checks if a Pong message was received.
@@ -277,7 +276,7 @@ class WebSocketConnection(Thread):
         """Sends the given Payload to the API via the websocket connection.
 
         :param kwargs: payload paarameters as key=value pairs
-        :return:
+        :return: True if the payload was sent
         """
         if auth:
             nonce = str(int(time.time() * 10000000))
@@ -297,16 +296,21 @@ class WebSocketConnection(Thread):
             self.socket.send(payload)
         except websocket.WebSocketConnectionClosedException:
             self.log.error("send(): Did not send out payload %s - client not connected. ", kwargs)
+            return False
+        return True
 
     def pass_to_client(self, event, data, *args):
-        """Passes data up to the client via a Queue().
+        """Passes data up to the client via on_data if set, else via a Queue().
 
         :param event:
         :param data:
         :param args:
         :return:
         """
-        self.q.put((event, data, *args))
+        if self.on_data is not None:
+            self.on_data((event, data, *args))
+        else:
+            self.q.put((event, data, *args))
 
     def _connection_timed_out(self):
         """Issues a reconnection if the connection timed out.
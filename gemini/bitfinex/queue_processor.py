@@ -1,8 +1,7 @@
 # Import Built-Ins
 import logging
 from threading import Thread, Event
-from queue import Empty
-from multiprocessing import Queue
+from queue import Queue, Empty
 from collections import defaultdict
 
 # Import Third-Party
@@ -63,6 +62,21 @@ class QueueProcessor(Thread):
         self.candles = defaultdict(Queue)
         self.account = defaultdict(Queue)
 
+        # Optional callable, receives the symbol, data and timestamp of each
+        # book update instead of the books queues
+        self.on_book = None
+
+        # Optional callable, receives the notifications of the account
+        # channel (order requests results) and their timestamp
+        self.on_notification = None
+
+        # Optional callable, receives the event, payload and timestamp of
+        # the account channel messages instead of the account queues
+        self.on_account = None
+
+        # True once the account channel is authenticated
+        self.authenticated = False
+
         # Sentinel Event to kill the thread
         self._stopped = Event()
 
@@ -109,36 +123,42 @@ class QueueProcessor(Thread):
                 message = self.q.get(timeout=0.1)
             except Empty:
                 continue
+            self.handle_message(message)
 
-            dtype, data, ts = message
-            if dtype in ('subscribed', 'unsubscribed', 'conf', 'auth', 'unauth'):
-                try:
-                    self._response_handlers[dtype](dtype, data, ts)
-                except KeyError:
-                    self.log.error("Dtype '%s' does not have a response "
-                                   "handler! (%s)", dtype, message)
-            elif dtype == 'data':
-                try:
-                    channel_id = data[0]
-                    if channel_id != 0:
-                        # Get channel type associated with this data to the
-                        # associated data type (from 'data' to
-                        # 'book', 'ticker' or similar
-                        channel_type, *_ = self.channel_directory[channel_id]
-
-                        # Run the associated data handler for this channel type.
-                        self._data_handlers[channel_type](channel_type, data, ts)
-                        # Update time stamps.
-                        self.update_timestamps(channel_id, ts)
-                    else:
-                        # This is data from auth channel, call handler
-                        self._handle_account(data=data, ts=ts)
-                except KeyError:
-                    self.log.error("Channel ID does not have a data handler! %s",
-                                   message)
-            else:
-                self.log.error("Unknown dtype on queue! %s", message)
-                continue
+    def handle_message(self, message):
+        """Dispatches a message from the connection to its handler.
+
+        :param message: (dtype, data, ts) tuple
+        :return:
+        """
+        dtype, data, ts = message
+        if dtype in ('subscribed', 'unsubscribed', 'conf', 'auth', 'unauth'):
+            try:
+                self._response_handlers[dtype](dtype, data, ts)
+            except KeyError:
+                self.log.error("Dtype '%s' does not have a response "
+                               "handler! (%s)", dtype, message)
+        elif dtype == 'data':
+            try:
+                channel_id = data[0]
+                if channel_id != 0:
+                    # Get channel type associated with this data to the
+                    # associated data type (from 'data' to
+                    # 'book', 'ticker' or similar
+                    channel_type, *_ = self.channel_directory[channel_id]
+
+                    # Run the associated data handler for this channel type.
+                    self._data_handlers[channel_type](channel_type, data, ts)
+                    # Update time stamps.
+                    self.update_timestamps(channel_id, ts)
+                else:
+                    # This is data from auth channel, call handler
+                    self._handle_account(data=data, ts=ts)
+            except KeyError:
+                self.log.error("Channel ID does not have a data handler! %s",
+                               message)
+        else:
+            self.log.error("Unknown dtype on queue! %s", message)
 
     def _handle_subscribed(self, dtype, data, ts,):
         """Handles responses to subscribe() commands.
@@ -214,6 +234,7 @@ class QueueProcessor(Thread):
         # Contains keys status, chanId, userId, caps
         if dtype == 'unauth':
             raise NotImplementedError
+        self.authenticated = data.get('status') == 'OK'
         channel_id = data.pop('chanId')
         user_id = data.pop('userId')
 
@@ -279,6 +300,12 @@ class QueueProcessor(Thread):
         """
 
         chan_id, *data = data
+        if data[0] == 'n' and self.on_notification is not None:
+            self.on_notification(data[1], ts)
+        if self.on_account is not None:
+            if len(data) > 1:
+                self.on_account(data[0], data[1], ts)
+            return
         channel_identifier = self.account_channel_names[data[0]]
         entry = (data, ts)
         self.account[channel_identifier].put(entry)
@@ -311,8 +338,11 @@ class QueueProcessor(Thread):
         channel_id, *data = data
         log.debug("ts: %s\tchan_id: %s\tdata: %s", ts, channel_id, data)
         channel_identifier = self.channel_directory[channel_id]
-        entry = (data, ts)
-        self.books[channel_identifier].put(entry)
+        if self.on_book is not None:
+            self.on_book(channel_identifier[1], data, ts)
+        else:
+            entry = (data, ts)
+            self.books[channel_identifier].put(entry)
 
     def _handle_raw_book(self, dtype, data, ts):
         """Updates the raw order books stored in self.raw_books[chan_id].
@@ -1,11 +1,13 @@
 from __future__ import absolute_import
-import requests
 import json
 import base64
 import hmac
 import hashlib
 import time
 
+from ..codec import loads, response_json
+from ..sessions import get_session, request
+
 PROTOCOL = "https"
 HOST = "api.bitfinex.com"
 VERSION = "v1"
@@ -32,7 +34,7 @@ class TradeClient:
         self.URL = "{0:s}://{1:s}/{2:s}".format(PROTOCOL, HOST, VERSION)
         self.KEY = key
         self.SECRET = secret
-        pass
+        self.session = get_session('BITFINEX')
 
     @property
     def _nonce(self):
@@ -79,8 +81,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/order/new", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/order/new", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         try:
             json_resp['order_id']
@@ -102,8 +104,53 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/order/cancel", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/order/cancel", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
+
+        try:
+            json_resp['avg_execution_price']
+        except:
+            return json_resp['message']
+
+        return json_resp
+
+    async def place_order_async(self, amount, price, side, ord_type, symbol='btcusd', exchange='bitfinex'):
+        """
+        Non-blocking place_order, to be awaited from the event loop.
+        """
+        payload = {
+
+            "request": "/v1/order/new",
+            "nonce": self._nonce,
+            "symbol": symbol,
+            "amount": amount,
+            "price": price,
+            "exchange": exchange,
+            "side": side,
+            "type": ord_type
+
+        }
+
+        json_resp = await self._post_async("/order/new", payload)
+
+        try:
+            json_resp['order_id']
+        except:
+            return json_resp['message']
+
+        return json_resp
+
+    async def delete_order_async(self, order_id):
+        """
+        Non-blocking delete_order, to be awaited from the event loop.
+        """
+        payload = {
+            "request": "/v1/order/cancel",
+            "nonce": self._nonce,
+            "order_id": order_id
+        }
+
+        json_resp = await self._post_async("/order/cancel", payload)
 
         try:
             json_resp['avg_execution_price']
@@ -112,6 +159,30 @@ class TradeClient:
 
         return json_resp
 
+    async def status_order_async(self, order_id):
+        """
+        Non-blocking status_order, to be awaited from the event loop.
+        """
+        payload = {
+            "request": "/v1/order/status",
+            "nonce": self._nonce,
+            "order_id": order_id
+        }
+
+        json_resp = await self._post_async("/order/status", payload)
+
+        try:
+            json_resp['avg_execution_price']
+        except:
+            return json_resp['message']
+
+        return json_resp
+
+    async def _post_async(self, path, payload):
+        headers = {key: value.decode('utf8') if isinstance(value, bytes) else value for key, value in self._sign_payload(payload).items()}
+        status, content = await request('BITFINEX', 'post', self.URL + path, headers=headers)
+        return loads(content)
+
     def delete_all_orders(self):
         """
         Cancel all orders.
@@ -124,8 +195,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/order/cancel/all", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/order/cancel/all", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
         return json_resp
 
     def status_order(self, order_id):
@@ -141,8 +212,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/order/status", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/order/status", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         try:
             json_resp['avg_execution_price']
@@ -162,8 +233,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/orders", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/orders", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -178,8 +249,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/positions", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/positions", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
         return json_resp
 
     def claim_position(self, position_id):
@@ -195,8 +266,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/position/claim", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/position/claim", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -215,8 +286,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/mytrades", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/mytrades", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -241,8 +312,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/offer/new", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/offer/new", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -259,8 +330,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/offer/cancel", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/offer/cancel", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -277,8 +348,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/offer/status", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/offer/status", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -293,8 +364,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/offers", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/offers", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -310,8 +381,8 @@ class TradeClient:
         }
 
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/balances", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/balances", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -335,8 +406,8 @@ class TradeClient:
             "wallet": wallet
         }
         signed_payload = self._sign_payload(payload)
-        r = requests.post(self.URL + "/history", headers=signed_payload, verify=True)
-        json_resp = r.json()
+        r = self.session.post(self.URL + "/history", headers=signed_payload, verify=True)
+        json_resp = response_json(r)
 
         return json_resp
 
@@ -349,6 +420,9 @@ class Client:
     See https://www.bitfinex.com/pages/api for API documentation.
     """
 
+    def __init__(self):
+        self.session = get_session('BITFINEX')
+
     def server(self):
         return u"{0:s}://{1:s}/{2:s}".format(PROTOCOL, HOST, VERSION)
 
@@ -521,7 +595,7 @@ class Client:
 
 
     def _get(self, url):
-        return requests.get(url, timeout=TIMEOUT).json()
+        return response_json(self.session.get(url, timeout=TIMEOUT))
 
 
     def _build_parameters(self, parameters):
@@ -1,17 +1,23 @@
 from .exchange import Exchange, ExchangeLogHandler
 from .keyhandler import KeyHandler
 from .order import Order
+from .orderbook import OrderBook, IncrementalOrderBook
 from .logger import Logger as log
 from . import config
+from .sessions import warm_up
+from .pending import PendingRequests, OrderNotSent
 from .bitfinex.trade_client import TradeClient, Client
 from .bitfinex.client import BtfxWss
-from sortedcontainers import SortedDict
-import time, logging, threading
+import time, logging, asyncio, itertools
+from functools import partial
 
 BITFINEX_MAPPING_TABLE = {"IOTA":"IOT",
            "DASH":"DSH",
            "USDT":"USD" }
 BITFINEX_REVERSE_MAPPING_TABLE = dict((v,k) for k,v in BITFINEX_MAPPING_TABLE.items())
+# order types by time in force, for the REST (v1) and the websocket (v2) apis. the v1 api has no immediate-or-cancel orders
+BITFINEX_ORDER_TYPES = {'GTC': ("exchange limit", 'EXCHANGE LIMIT'),
+                        'FOK': ("exchange fill-or-kill", 'EXCHANGE FOK')}
 
 class BitfinexLogHandler(ExchangeLogHandler):
     def __init__(self, xchg):
@@ -26,6 +32,7 @@ class Bitfinex(Exchange):
     all_pairs = ("eth_btc", "xrp_btc", "ltc_btc", "neo_btc", "iota_btc", "trx_btc", "dash_btc", "eos_btc", "xmr_btc",
 #                                                  "neo_eth", "iota_eth", "trx_eth",             "eos_eth",
       "btc_usdt","eth_usdt","xrp_usdt")#,"ltc_usdt","neo_usdt","iota_usdt","trx_usdt","dash_usdt","eos_usdt","xmr_usdt")
+    time_in_force_modes = tuple(BITFINEX_ORDER_TYPES.keys())
     # must maintain this mapping table as Bitfinex uses trigrams in its API. we need to keep track which coins we support in both formats
 
     def __init__(self, keyfile, loop, has_error):
@@ -35,13 +42,27 @@ class Bitfinex(Exchange):
         log_handler.setLevel(logging.INFO)
         bitfinex_logger.addHandler(log_handler)
         self.public_api = BtfxWss()
+        self.public_api.queue_processor.on_book = self.on_book
         self.public_rest_api = Client()
         self.trade_api = None
-        self.updatelock = threading.Lock()
+        self.pending_orders = None # orders sent over the websocket, by client order id
         if self.keyhandler is not None:
             key = list(self.keyhandler.getKeys())[0]
             secret = self.keyhandler.getSecret(key)
             self.trade_api = TradeClient(key, secret)
+            warm_up('BITFINEX', self.trade_api.URL + '/symbols')
+            if 'BITFINEX' in config.WEBSOCKET_ORDER_ENTRY or 'BITFINEX' in config.USER_DATA_STREAMS:
+                self.public_api.key = key
+                self.public_api.secret = secret
+            if 'BITFINEX' in config.WEBSOCKET_ORDER_ENTRY:
+                self.pending_orders = PendingRequests()
+                self.client_ids = itertools.count(int(time.time() * 1000))
+                self.public_api.queue_processor.on_notification = self.on_notification
+                # the closing oc events carry the executed amount of the fill-or-kill orders
+                self.public_api.queue_processor.on_account = self.on_account
+            if 'BITFINEX' in config.USER_DATA_STREAMS:
+                self.user_stream = True
+                self.public_api.queue_processor.on_account = self.on_account
         self.name = 'BITFINEX'
         self.trading_fee = 0.002
         self.tick_count = 0
@@ -70,48 +91,31 @@ class Bitfinex(Exchange):
         mkt = symbol[3:].upper()
         return (BITFINEX_REVERSE_MAPPING_TABLE[ccy] if ccy in BITFINEX_REVERSE_MAPPING_TABLE else ccy, BITFINEX_REVERSE_MAPPING_TABLE[mkt] if mkt in BITFINEX_REVERSE_MAPPING_TABLE else mkt)
 
+    def on_book(self, pairstr, data, ts):
+        """
+        applies the book deltas as they arrive on the websocket thread, nothing is left to drain at tick time
+        """
+        indexed_depth = self.indexed_depths.get(pairstr)
+        if indexed_depth is None or len(data) == 0:
+            return
+        entry = data[0]
+        if type(entry) is not list or len(entry) == 0:
+            return
+        if type(entry[0]) is list:
+            # snapshot, sent on each (re)subscription
+            indexed_depth.reset(((elt[0], elt[2]) for elt in entry if elt[1] > 0 and elt[2] > 0),
+                                ((elt[0], elt[2] * -1) for elt in entry if elt[1] > 0 and elt[2] < 0))
+        elif entry[1] == 0:
+            indexed_depth.remove(entry[0])
+        elif entry[2] > 0:
+            indexed_depth.update_bid(entry[0], entry[2])
+        elif entry[2] < 0:
+            indexed_depth.update_ask(entry[0], entry[2] * -1)
+        if indexed_depth.changed:
+            self.publish_depth(pairstr, indexed_depth.publish())
+
     def get_depth(self, ccy, mkt):
         pairstr = self.format_pair((ccy, mkt))
-        book = self.public_api.books(pairstr)
-        while not book.empty():
-            entry = book.get()
-            if len(entry) == 0:
-                continue
-            entry = entry[0]
-            if len(entry) == 0:
-                continue
-            entry = entry[0]
-            if len(entry) == 0:
-                continue
-            if type(entry[0]) is not list:
-                entry = [entry]
-##            ask_update = False
-##            bid_update = False
-            with self.updatelock:
-                for elt in entry:
-                    if elt[1] == 0:
-                        self.indexed_depths[pairstr]['bids'].pop(elt[0], None)
-                        self.indexed_depths[pairstr]['asks'].pop(elt[0], None)
-                    elif elt[2] > 0:
-                        self.indexed_depths[pairstr]['bids'][elt[0]] = elt[2]
-    ##                    ask_update = True
-                    elif elt[2] < 0:
-                        self.indexed_depths[pairstr]['asks'][elt[0]] = elt[2] * -1
-    ##                    bid_update = True
-                self.depths[pairstr] = {'bids': [Order(key, val) for key, val in reversed(self.indexed_depths[pairstr]['bids'].items())],
-                                        'asks': [Order(key, val) for key, val in self.indexed_depths[pairstr]['asks'].items()]}
-            # order book consistency adjustment
-##            while self.depths[pairstr]['asks'][0].p <= self.depths[pairstr]['bids'][0].p:
-##                if ask_update:
-##                    self.depths[pairstr]['bids'].pop(0)
-##                    if len(self.depths[pairstr]['bids']) == 0:
-##                        break
-##                elif bid_update:
-##                    self.depths[pairstr]['asks'].pop(0)
-##                    if len(self.depths[pairstr]['asks']) == 0:
-##                        break
-##                else:
-##                    break
         # DEBUG - show best bid ask for each ccy pair
         #if len(self.depths[pairstr]['bids']) > 0 and len(self.depths[pairstr]['asks']) > 0:
         #    log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr]['bids'][0].p, self.depths[pairstr]['asks'][0].p))
@@ -134,15 +138,161 @@ class Bitfinex(Exchange):
 
     def submit_order(self, pair, side, price, volume):
         pairstr = Bitfinex.mapping(pair).lower()
+        time_in_force = self.get_time_in_force()
+        order_type = BITFINEX_ORDER_TYPES[time_in_force][0]
         order = None
         if side == "SELL":
-            order = self.trade_api.place_order(volume, price, "sell", "exchange limit", symbol=pairstr)
+            order = self.trade_api.place_order(volume, price, "sell", order_type, symbol=pairstr)
         elif side == "BUY":
-            order = self.trade_api.place_order(volume, price, "buy", "exchange limit", symbol=pairstr)
+            order = self.trade_api.place_order(volume, price, "buy", order_type, symbol=pairstr)
         else:
             raise RuntimeError("Unsupported order type: %s" % (side,))
         self.log_order(side, order)
-        return Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+        new_order = Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+        if time_in_force != 'GTC':
+            # the fill-or-kill orders are matched after the response of order/new, their status carries the executed amount
+            new_order.executed = self.get_executed(self.trade_api.status_order(order['id']))
+        return new_order
+
+    def get_executed(self, status):
+        if not isinstance(status, dict):
+            raise RuntimeError('order status unavailable: %s' % (str(status),))
+        return float(status['executed_amount'])
+
+    async def submit_order_async(self, pair, side, price, volume):
+        if self.pending_orders is not None:
+            try:
+                return await self.submit_order_ws(pair, side, price, volume)
+            except OrderNotSent as e:
+                log.warning('%s websocket order entry unavailable, sending the order through REST: %s' % (self.name, str(e)))
+        pairstr = Bitfinex.mapping(pair).lower()
+        time_in_force = self.get_time_in_force()
+        order_type = BITFINEX_ORDER_TYPES[time_in_force][0]
+        order = None
+        if side == "SELL":
+            order = await self.trade_api.place_order_async(volume, price, "sell", order_type, symbol=pairstr)
+        elif side == "BUY":
+            order = await self.trade_api.place_order_async(volume, price, "buy", order_type, symbol=pairstr)
+        else:
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        self.log_order(side, order)
+        new_order = Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+        if time_in_force != 'GTC':
+            new_order.executed = self.get_executed(await self.trade_api.status_order_async(order['id']))
+        return new_order
+
+    async def submit_order_ws(self, pair, side, price, volume):
+        if side not in ("SELL", "BUY"):
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        if not self.public_api.queue_processor.authenticated:
+            raise OrderNotSent('not authenticated')
+        time_in_force = self.get_time_in_force()
+        cid = next(self.client_ids)
+        future = self.pending_orders.add(('on', cid))
+        # the fill-or-kill orders are matched after their on-req notification, their executed amount comes with their oc event
+        closed = self.pending_orders.add(('closed', cid)) if time_in_force != 'GTC' else None
+        if not self.public_api.new_order(cid=cid, type=BITFINEX_ORDER_TYPES[time_in_force][1], symbol='t' + Bitfinex.mapping(pair),
+                                         amount=str(volume) if side == "BUY" else '-' + str(volume), price=str(price)):
+            self.pending_orders.discard(('on', cid))
+            self.pending_orders.discard(('closed', cid))
+            raise OrderNotSent('websocket disconnected')
+        try:
+            order = await self.pending_orders.wait(('on', cid), future)
+        except asyncio.TimeoutError:
+            # the order may be live: it is booked when its notification or its report on the authenticated channel arrives
+            self.pending_orders.discard(('closed', cid))
+            self.pending_orders.keep(('on', cid) if closed is None else ('closed', cid), partial(self.on_late_order, pair, side, price, volume, time_in_force))
+            raise
+        if closed is None:
+            return self.accept_order(order, pair, side, price, volume, time_in_force)
+        return await self.accept_closed_order(cid, order, closed, pair, side, price, volume, time_in_force)
+
+    async def accept_closed_order(self, cid, order, closed, pair, side, price, volume, time_in_force):
+        # the executed amount comes with the oc event of the order, matched by its id. without the event in time, with its v1 status
+        try:
+            closed_order = await self.pending_orders.wait(('closed', cid), closed)
+            if closed_order[0] == order[0]:
+                return self.accept_order(closed_order, pair, side, price, volume, time_in_force)
+            log.warning('%s order %s closed as order %s' % (self.name, str(order[0]), str(closed_order[0])))
+        except asyncio.TimeoutError:
+            log.warning('%s order %s not closed in time, its executed amount is queried' % (self.name, str(order[0])))
+        new_order = self.accept_order(order, pair, side, price, volume, time_in_force)
+        new_order.executed = self.get_executed(await self.trade_api.status_order_async(order[0]))
+        return new_order
+
+    def accept_order(self, order, pair, side, price, volume, time_in_force):
+        self.log_order(side, order)
+        new_order = Order(orderID=order[0], price=price, volume=volume, type=side, pair=pair)
+        if time_in_force != 'GTC':
+            # [ID, GID, CID, SYMBOL, MTS_CREATE, MTS_UPDATE, AMOUNT, AMOUNT_ORIG, ...], AMOUNT is what is left to execute
+            new_order.executed = abs(float(order[7])) - abs(float(order[6]))
+        return new_order
+
+    def on_late_order(self, pair, side, price, volume, time_in_force, order):
+        # called from the websocket thread with the notification or the report of an order which timed out
+        self.publish_late_order(self.accept_order(order, pair, side, price, volume, time_in_force), pair, side, price, volume)
+
+    def on_notification(self, notification, ts):
+        # called from the websocket thread: [MTS, TYPE, MESSAGE_ID, null, ORDER, CODE, STATUS, TEXT]
+        # the new orders are correlated by their client order id, the cancellations and updates by order id
+        request_type, order, status, text = notification[1], notification[4], notification[6], notification[7]
+        if request_type == 'on-req':
+            key = ('on', order[2])
+        elif request_type == 'oc-req':
+            key = ('oc', order[0])
+        elif request_type == 'ou-req':
+            key = ('ou', order[0])
+        else:
+            return
+        if status == 'SUCCESS':
+            self.pending_orders.resolve(key, order)
+        else:
+            self.pending_orders.resolve(key, error=RuntimeError('%s %s: %s' % (request_type, status, text)))
+
+    def replace_order(self, order, price, volume):
+        # the order is updated in place over the websocket, from the scheduler event loop
+        if self.pending_orders is None or not self.public_api.queue_processor.authenticated:
+            return None
+        return self.run_order_request(self.replace_order_ws(order, price, volume))
+
+    async def replace_order_ws(self, order, price, volume):
+        order_id = int(order.id)
+        future = self.pending_orders.add(('ou', order_id))
+        if not self.public_api.update_order(id=order_id, price=str(price), amount=str(volume) if order.type == "BUY" else '-' + str(volume)):
+            self.pending_orders.discard(('ou', order_id))
+            return None
+        new_order = await self.pending_orders.wait(('ou', order_id), future)
+        self.log_order(order.type, new_order)
+        return Order(orderID=new_order[0], price=price, volume=volume, type=order.type, pair=order.pair)
+
+    def on_account(self, event, payload, ts):
+        # called from the websocket thread with the wallets and the orders of the authenticated channel
+        if event in ('ws', 'wu') and self.user_stream:
+            # [WALLET_TYPE, CURRENCY, BALANCE, UNSETTLED_INTEREST, BALANCE_AVAILABLE], the available balance may not be calculated yet
+            for wallet in (payload if event == 'ws' else [payload]):
+                if wallet[0] == 'exchange' and len(wallet) > 4 and wallet[4] is not None:
+                    ccy = wallet[1].upper()
+                    self.publish_balance(BITFINEX_REVERSE_MAPPING_TABLE.get(ccy, ccy), float(wallet[4]))
+        elif event in ('os', 'on', 'ou', 'oc'):
+            if event == 'oc' and self.pending_orders is not None:
+                self.pending_orders.resolve(('closed', payload[2]), payload)
+            if event in ('on', 'oc') and self.pending_orders is not None:
+                self.pending_orders.resolve_late(('on', payload[2]), payload)
+            if not self.user_stream:
+                return
+            # [ID, GID, CID, SYMBOL, MTS_CREATE, MTS_UPDATE, AMOUNT, AMOUNT_ORIG, TYPE, TYPE_PREV, _, _, FLAGS, STATUS, _, _, PRICE, ...]
+            orders = [Order(orderID=order[0],
+                            price=float(order[16]),
+                            volume=abs(float(order[6])),
+                            type='BUY' if order[7] > 0 else 'SELL',
+                            pair=self.pair_from_symbol(order[3][1:])) for order in (payload if event == 'os' else [payload])]
+            if event == 'os':
+                self.publish_orders(orders)
+            else:
+                self.publish_order(orders[0], event != 'oc' and payload[13].startswith(('ACTIVE', 'PARTIALLY FILLED')))
+
+    def has_user_stream(self):
+        return self.user_stream and self.public_api.queue_processor.authenticated
 
     def query_active_orders(self):
         return [Order(orderID=order['id'],
@@ -158,14 +308,31 @@ class Bitfinex(Exchange):
             for order in orders:
                 self.trade_api.delete_order(int(order.id))
 
+    async def cancel_orders_async(self, orders = None):
+        if orders is None:
+            await super(Bitfinex, self).cancel_orders_async(orders)
+        else:
+            await asyncio.gather(*[self.cancel_order_async(int(order.id)) for order in orders])
+
+    async def cancel_order_async(self, order_id):
+        if self.pending_orders is not None and self.public_api.queue_processor.authenticated:
+            future = self.pending_orders.add(('oc', order_id))
+            if self.public_api.cancel_order(id=order_id):
+                return await self.pending_orders.wait(('oc', order_id), future)
+            self.pending_orders.discard(('oc', order_id))
+        return await self.trade_api.delete_order_async(order_id)
+
     def start(self):
         self.public_api.start()
         while not self.public_api.conn.connected.is_set():
             time.sleep(1)
+        if self.public_api.key:
+            self.public_api.authenticate()  # sent again by the connection when it reconnects
 
     def stop(self):
         self.public_api.stop()
         self.depths = {}
+        self.invalidate_depths()
         log.info("Closed Bitfinex websocket")
 
     def reconnect(self):
@@ -174,7 +341,8 @@ class Bitfinex(Exchange):
             if pair is None:
                 continue
             pairstr = self.format_pair(pair)
-            self.depths[pairstr] = {'bids': [], 'asks': []}
-            self.indexed_depths[pairstr] = {'bids': SortedDict(), 'asks': SortedDict()}
+            self.depths[pairstr] = OrderBook()
+            self.indexed_depths[pairstr] = IncrementalOrderBook(config.ORDERBOOK_DEPTH)
             self.public_api.subscribe_to_order_book(pairstr)
+        self.invalidate_depths()
         log.info("Connected to Bitfinex websocket")
\ No newline at end of file
@@ -15,10 +15,7 @@ except:
     from base64 import b64decode, b64encode
 from zlib import decompress, MAX_WBITS
 
-try:
-    from ujson import loads
-except:
-    from json import loads
+from ..codec import loads
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +12,10 @@ except ImportError:
     from queue import Queue
 
 try:
-    from ujson import dumps, loads
+    from ujson import dumps
 except:
-    from json import dumps, loads
+    from json import dumps
+from ..codec import loads
 
 
 class Connection(signalr.Connection, object):
@@ -22,7 +22,9 @@ else:
 
     encrypted = True
 
-import requests
+
+from ..codec import loads, response_json
+from ..sessions import get_session, request
 
 BUY_ORDERBOOK = 'buy'
 SELL_ORDERBOOK = 'sell'
@@ -72,11 +74,16 @@ def encrypt(api_key, api_secret, export=True, export_fn='secrets.json'):
 
 
 def using_requests(request_url, apisign):
-    return requests.get(
+    return response_json(get_session('BITTREX').get(
         request_url,
         headers={"apisign": apisign},
         timeout=10
-    ).json()
+    ))
+
+
+async def using_aiohttp(request_url, apisign):
+    status, content = await request('BITTREX', 'get', request_url, headers={"apisign": apisign})
+    return loads(content)
 
 
 class Bittrex(object):
@@ -84,12 +91,10 @@ class Bittrex(object):
     Used for requesting Bittrex with API key and API secret
     """
 
-    def __init__(self, api_key, api_secret, calls_per_second=1, dispatch=using_requests, api_version=API_V1_1):
+    def __init__(self, api_key, api_secret, dispatch=using_requests, api_version=API_V1_1):
         self.api_key = str(api_key) if api_key is not None else ''
         self.api_secret = str(api_secret) if api_secret is not None else ''
         self.dispatch = dispatch
-        self.call_rate = 1.0 / calls_per_second
-        self.last_call = None
         self.api_version = api_version
 
     def decrypt(self):
@@ -108,18 +113,6 @@ class Bittrex(object):
         else:
             raise ImportError('"pycrypto" module has to be installed')
 
-    def wait(self):
-        if self.last_call is None:
-            self.last_call = time.time()
-        else:
-            now = time.time()
-            passed = now - self.last_call
-            if passed < self.call_rate:
-                # print("sleep")
-                time.sleep(self.call_rate - passed)
-
-            self.last_call = time.time()
-
     def _api_query(self, protection=None, path_dict=None, options=None):
         """
         Queries Bittrex
@@ -129,6 +122,41 @@ class Bittrex(object):
         :return: JSON response from Bittrex
         :rtype : dict
         """
+        request_url, apisign = self._signed_url(protection, path_dict, options)
+
+        try:
+            return self.dispatch(request_url, apisign)
+
+        except Exception:
+            return {
+                'success': False,
+                'message': 'NO_API_RESPONSE',
+                'result': None
+            }
+
+    async def _api_query_async(self, protection=None, path_dict=None, options=None):
+        """
+        Non-blocking _api_query over aiohttp, to be awaited from the event loop
+        """
+        request_url, apisign = self._signed_url(protection, path_dict, options)
+
+        try:
+            return await using_aiohttp(request_url, apisign)
+
+        except Exception:
+            return {
+                'success': False,
+                'message': 'NO_API_RESPONSE',
+                'result': None
+            }
+
+    def _signed_url(self, protection, path_dict, options):
+        """
+        Builds the url of a query and its signature
+
+        :return: request url, apisign
+        :rtype : tuple
+        """
 
         if not options:
             options = {}
@@ -146,21 +174,11 @@ class Bittrex(object):
 
         request_url += urlencode(options)
 
-        try:
-            apisign = hmac.new(self.api_secret.encode(),
-                               request_url.encode(),
-                               hashlib.sha512).hexdigest()
-
-            self.wait()
-
-            return self.dispatch(request_url, apisign)
+        apisign = hmac.new(self.api_secret.encode(),
+                           request_url.encode(),
+                           hashlib.sha512).hexdigest()
 
-        except Exception:
-            return {
-                'success': False,
-                'message': 'NO_API_RESPONSE',
-                'result': None
-            }
+        return request_url, apisign
 
     def get_markets(self):
         """
@@ -390,6 +408,35 @@ class Bittrex(object):
             API_V2_0: '/key/market/tradecancel'
         }, options={'uuid': uuid, 'orderid': uuid}, protection=PROTECTION_PRV)
 
+    async def buy_limit_async(self, market, quantity, rate):
+        """
+        Non-blocking buy_limit, to be awaited from the event loop
+        """
+        return await self._api_query_async(path_dict={
+            API_V1_1: '/market/buylimit',
+        }, options={'market': market,
+                    'quantity': quantity,
+                    'rate': rate}, protection=PROTECTION_PRV)
+
+    async def sell_limit_async(self, market, quantity, rate):
+        """
+        Non-blocking sell_limit, to be awaited from the event loop
+        """
+        return await self._api_query_async(path_dict={
+            API_V1_1: '/market/selllimit',
+        }, options={'market': market,
+                    'quantity': quantity,
+                    'rate': rate}, protection=PROTECTION_PRV)
+
+    async def cancel_async(self, uuid):
+        """
+        Non-blocking cancel, to be awaited from the event loop
+        """
+        return await self._api_query_async(path_dict={
+            API_V1_1: '/market/cancel',
+            API_V2_0: '/key/market/tradecancel'
+        }, options={'uuid': uuid, 'orderid': uuid}, protection=PROTECTION_PRV)
+
     def get_open_orders(self, market=None):
         """
         Get all orders that you currently have opened.
@@ -2,11 +2,13 @@
 from .exchange import Exchange, ExchangeLogHandler
 from .keyhandler import KeyHandler
 from .order import Order
+from .orderbook import OrderBook, IncrementalOrderBook
+from . import config
+from .sessions import warm_up
 from .bittrex.bittrex import Bittrex as BittrexClient
 from .bittrex.websocket_client import BittrexSocket
 from functools import partial
-from sortedcontainers import SortedDict
-import logging, time, threading
+import asyncio, logging, time, threading
 
 class BittrexSocketClient(BittrexSocket):
     TY_ADD = 0
@@ -14,28 +16,33 @@ class BittrexSocketClient(BittrexSocket):
     TY_UPDATE = 2
     def __init__(self):
         super(BittrexSocketClient, self).__init__()
-        self.depths = {}
         self.indexed_depths = {}
         self.updatelock = threading.Lock()
-    def subscribe_to_orderbook(self, depths, tickers):
-        self.depths = depths
+        self.on_depth = None
+        self.on_user_data = None
+    def subscribe_to_orderbook(self, tickers, on_depth):
+        self.on_depth = on_depth
         for ticker in tickers:
-            self.indexed_depths[ticker] = {'bids': SortedDict(), 'asks': SortedDict()}
+            self.indexed_depths[ticker] = IncrementalOrderBook(config.ORDERBOOK_DEPTH)
         super(BittrexSocketClient, self).subscribe_to_exchange_deltas(tickers)
     def on_public(self, msg):
         with self.updatelock:
+            indexed_depth = self.indexed_depths[msg['M']]
             for o in msg['Z']:
                 if o['TY'] == BittrexSocketClient.TY_ADD or o['TY'] == BittrexSocketClient.TY_UPDATE:
-                    self.indexed_depths[msg['M']]['bids'][o['R']] = o['Q']
+                    indexed_depth.update_bid(o['R'], o['Q'])
                 elif o['TY'] == BittrexSocketClient.TY_REMOVE:
-                    self.indexed_depths[msg['M']]['bids'].pop(o['R'], None)
+                    indexed_depth.update_bid(o['R'], 0)
             for o in msg['S']:
                 if o['TY'] == BittrexSocketClient.TY_ADD or o['TY'] == BittrexSocketClient.TY_UPDATE:
-                    self.indexed_depths[msg['M']]['asks'][o['R']] = o['Q']
+                    indexed_depth.update_ask(o['R'], o['Q'])
                 elif o['TY'] == BittrexSocketClient.TY_REMOVE:
-                    self.indexed_depths[msg['M']]['asks'].pop(o['R'], None)
-            self.depths[msg['M']] = {'bids': [Order(key, val) for key, val in reversed(self.indexed_depths[msg['M']]['bids'].items())],
-                                    'asks': [Order(key, val) for key, val in self.indexed_depths[msg['M']]['asks'].items()]}
+                    indexed_depth.update_ask(o['R'], 0)
+            if indexed_depth.changed:
+                self.on_depth(msg['M'], indexed_depth.publish())
+    def on_private(self, msg):
+        if self.on_user_data is not None:
+            self.on_user_data(msg)
 
 class Bittrex(Exchange):
     all_pairs = ("eth_btc", "xrp_btc", "ltc_btc", "xvg_btc", "dash_btc", "xlm_btc", "neo_btc", "trx_btc", "xmr_btc",
@@ -53,11 +60,15 @@ class Bittrex(Exchange):
             key = list(self.keyhandler.getKeys())[0]
             api_secret = self.keyhandler.getSecret(key)
             self.api = BittrexClient(key, api_secret)
+            warm_up('BITTREX', 'https://bittrex.com/api/v1.1/public/getmarkets')
         self.name = 'BITTREX'
         self.trading_fee = 0.0025
         self.tickers = []
         self.bm = BittrexSocketClient()
         self.bm.enable_log()
+        if self.api is not None and self.name in config.USER_DATA_STREAMS:
+            self.user_stream = True
+            self.bm.on_user_data = self.process_user_message
         self.start()
 
     def format_pair(self, pair):
@@ -78,11 +89,25 @@ class Bittrex(Exchange):
         #    self.log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr]['bids'][0].p, self.depths[pairstr]['asks'][0].p))
         return self.depths[pairstr]
 
+    def process_user_message(self, msg):
+        # balance deltas {'d': {'c': currency, 'a': available, ...}} and order deltas {'TY': 0 open, 1 partial, 2 fill, 3 cancel, 'o': order}
+        if 'd' in msg:
+            self.publish_balance(msg['d']['c'].upper(), float(msg['d']['a']))
+        elif 'o' in msg:
+            order = msg['o']
+            self.publish_order(Order(orderID=order['OU'],
+                                     price=float(order['X']),
+                                     volume=float(order['q']),
+                                     type='SELL' if order['OT'] == 'LIMIT_SELL' else 'BUY',
+                                     pair=self.pair_from_symbol(order['E'])), msg['TY'] < 2)
+
     def get_ticker(self):
+        # the summaries of all the markets come in one request
+        pairs = {self.format_pair(pair): pair for pair in self.get_tradeable_pairs()}
         tickers = {}
-        for pair in self.get_tradeable_pairs():
-            ticker = self.api.get_ticker(self.format_pair(pair))['result']
-            tickers[pair] = (ticker['Ask'] + ticker['Bid']) / 2.0
+        for summary in self.api.get_market_summaries()['result']:
+            if summary['MarketName'] in pairs:
+                tickers[pairs[summary['MarketName']]] = (summary['Ask'] + summary['Bid']) / 2.0
         return tickers
 
     def get_balance(self):
@@ -101,6 +126,18 @@ class Bittrex(Exchange):
         self.log_order(side, order)
         return Order(orderID=order['result']['uuid'], price=price, volume=volume, type=side, pair=pair)
 
+    async def submit_order_async(self, pair, side, price, volume):
+        pairstr = self.format_pair(pair)
+        order = None
+        if side == "SELL":
+            order = await self.api.sell_limit_async(market=pairstr, quantity=volume, rate=price)
+        elif side == "BUY":
+            order = await self.api.buy_limit_async(market=pairstr, quantity=volume, rate=price)
+        else:
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        self.log_order(side, order)
+        return Order(orderID=order['result']['uuid'], price=price, volume=volume, type=side, pair=pair)
+
     def query_active_orders(self):
         return [Order(orderID=order['OrderUuid'],
                         price=float(order['Limit']),
@@ -114,17 +151,28 @@ class Bittrex(Exchange):
         for order in orders:
             self.api.cancel(uuid=order.id)
 
+    async def cancel_orders_async(self, orders = None):
+        if orders is None:
+            await super(Bittrex, self).cancel_orders_async(orders)
+        else:
+            await asyncio.gather(*[self.api.cancel_async(uuid=order.id) for order in orders])
+
     def start(self):
         self.reconnect()
+        if self.user_stream:
+            # the authentication is replayed by the socket when it reconnects
+            self.bm.authenticate(self.api.api_key, self.api.api_secret)
 
     def stop(self):
         self.bm.disconnect()
         self.depths = {}
+        self.invalidate_depths()
 
     def reconnect(self):
         self.tickers = []
         for pair in self.get_tradeable_pairs():
             pairstr = self.format_pair(pair)
             self.tickers.append(pairstr)
-            self.depths[pairstr] = {'bids': [], 'asks': []}
-        self.bm.subscribe_to_orderbook(self.depths, self.tickers)
\ No newline at end of file
+            self.depths[pairstr] = OrderBook()
+        self.bm.subscribe_to_orderbook(self.tickers, self.publish_depth)
+        self.invalidate_depths()
\ No newline at end of file
@@ -7,8 +7,9 @@
 import hmac
 import hashlib
 import time
-import urllib.request, urllib.parse, urllib.error
-import json
+
+from ..codec import loads
+from ..sessions import get_session, request
 
 
 class API(object):
@@ -22,6 +23,7 @@ class API(object):
         self.__username = username
         self.__api_key = api_key
         self.__api_secret = api_secret
+        self.__session = get_session('CEX')
 
     # get timestamp as nonce
     def __nonce(self):
@@ -34,10 +36,9 @@ class API(object):
         return signature
 
     def __post(self, url, param):  # Post Request (Low Level API call)
-        params = urllib.parse.urlencode(param).encode("utf-8")
-        req = urllib.request.Request(url, params, {'User-agent': 'bot-cex.io-' + self.__username})
-        page = urllib.request.urlopen(req).read()
-        return page
+        response = self.__session.post(url, data=param, headers={'User-agent': 'bot-cex.io-' + self.__username})
+        response.raise_for_status()
+        return response.content
 
     def api_call(self, method, param={}, private=0, couple=''):  # api call (Middle level)
         url = 'https://cex.io/api/' + method + '/'  # generate url
@@ -50,11 +51,27 @@ class API(object):
                 'signature': self.__signature(),
                 'nonce': self.__nonce_v})
         answer = self.__post(url, param)  # Post Request
-        return json.loads(answer)  # generate dict and return
+        return loads(answer)  # generate dict and return
+
+    async def api_call_async(self, method, param={}, private=0, couple=''):  # non-blocking api_call, to be awaited from the event loop
+        url = 'https://cex.io/api/' + method + '/'
+        if couple != '':
+            url = url + couple + '/'
+        if private == 1:
+            self.__nonce()
+            param.update({
+                'key': self.__api_key,
+                'signature': self.__signature(),
+                'nonce': self.__nonce_v})
+        status, answer = await request('CEX', 'post', url, data=param, headers={'User-agent': 'bot-cex.io-' + self.__username})
+        return loads(answer)
 
     def ticker(self, couple='GHS/BTC'):
         return self.api_call('ticker', {}, 0, couple)
 
+    def tickers(self, *currencies):  # tickers of all the pairs of the given currencies
+        return self.api_call('tickers', {}, 0, '/'.join(currencies))
+
     def order_book(self, couple='GHS/BTC'):
         return self.api_call('order_book', {}, 0, couple)
 
@@ -64,7 +81,7 @@ class API(object):
     def balance(self):
         return self.api_call('balance', {}, 1)
 
-    def current_orders(self, couple='GHS/BTC'):
+    def current_orders(self, couple='GHS/BTC'):  # the orders of all the pairs if couple is empty
         return self.api_call('open_orders', {}, 1, couple)
 
     def cancel_order(self, order_id):
@@ -73,6 +90,12 @@ class API(object):
     def place_order(self, ptype='buy', amount=1, price=1, couple='GHS/BTC'):
         return self.api_call('place_order', {"type": ptype, "amount": str(amount), "price": str(price)}, 1, couple)
 
+    async def place_order_async(self, ptype='buy', amount=1, price=1, couple='GHS/BTC'):
+        return await self.api_call_async('place_order', {"type": ptype, "amount": str(amount), "price": str(price)}, 1, couple)
+
+    async def cancel_order_async(self, order_id):
+        return await self.api_call_async('cancel_order', {"id": order_id}, 1)
+
     def price_stats(self, last_hours, max_resp_arr_size, couple='GHS/BTC'):
         return self.api_call(
                 'price_stats',
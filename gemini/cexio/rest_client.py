@@ -11,6 +11,7 @@ from asyncio import *
 import aiohttp
 
 from .exceptions import *
+from ..codec import loads
 
 
 logger = logging.getLogger(__name__)
@@ -94,7 +95,7 @@ class CEXRestClient:
 		with aiohttp.ClientSession() as session:
 			async with session.get(url, headers=headers) as response:
 				self._validate(url, response)
-				response = await response.json()
+				response = loads(await response.read())
 				logger.debug("REST.Resp> Response: {}".format(response))
 				return response
 
@@ -108,7 +109,7 @@ class CEXRestClient:
 
 			async with session.post(url, data=params) as response:
 				self._validate(url, response)
-				response = await response.json()
+				response = loads(await response.read())
 				logger.debug("REST.Resp> {}".format(response))
 				return response
 
@@ -23,6 +23,7 @@ from .messaging import *
 from .protocols_config import protocols_config
 from .version import version
 from ..logger import Logger as log
+from ..codec import loads
 
 __all__ = [
 	'CommonWebSocketClient',
@@ -260,7 +261,7 @@ class CommonWebSocketClient:
 		# it will simply grab the message from the queue - not exactly the one expected
 		message = await self.ws.recv()
 		try:
-			message = json.loads(message)
+			message = loads(message)
 		except Exception as ex:
 			raise ProtocolError(ex)
 
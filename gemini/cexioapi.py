@@ -1,14 +1,17 @@
 from .exchange import Exchange, ExchangeLogHandler
 from .keyhandler import KeyHandler
 from .order import Order
+from .orderbook import OrderBook
 from .logger import Logger as log
+from . import config
+from .sessions import warm_up
 from .cexio.rest_client import CEXRestClient
 from .cexio.ws_client import CommonWebSocketClient, WebSocketClientSingleCallback, MessageRouter
 from .cexio.messaging import RequestResponseFutureResolver
 from .cexio.exceptions import ErrorMessage, InvalidMessage
 from .cexio.cexapi import API
 from asyncio import sleep, run_coroutine_threadsafe
-import time, queue, copy, threading, _thread, logging, random, asyncio
+import time, queue, threading, _thread, logging, random, asyncio
 
 class CEXLogHandler(ExchangeLogHandler):
 	def __init__(self, xchg):
@@ -20,9 +23,9 @@ class CEXLogHandler(ExchangeLogHandler):
 		super(CEXLogHandler, self).emit(record)
 
 class WebSocketClientPublicData(CommonWebSocketClient):
-	def __init__(self, _config, depths):
+	def __init__(self, _config, on_depth):
 		super().__init__(_config)
-		self.depths = depths
+		self.on_depth = on_depth
 
 		def validator(message):
 			try:
@@ -60,12 +63,9 @@ class WebSocketClientPublicData(CommonWebSocketClient):
 		#log.info(message)
 		data = message['data']
 		pairstr = data['pair'].replace(':','-')
-		self.depths[pairstr]['bids'] = [Order(float(o[0]), float(o[1]) / 1000000.0) for o in data['buy'][:10]]
-			#log.info('bids')
-			#log.info(data['buy'][:10])
-		self.depths[pairstr]['asks'] = [Order(float(o[0]), float(o[1]) / 1000000.0) for o in data['sell'][:10]]
-			#log.info('asks')
-			#log.info(data['sell'][:10])
+		# volumes are published in millionths of the base currency
+		self.on_depth(pairstr, OrderBook.from_levels(((o[0], float(o[1]) / 1000000.0) for o in data['buy']),
+													 ((o[0], float(o[1]) / 1000000.0) for o in data['sell']), config.ORDERBOOK_DEPTH))
 		return message
 
 class CEX(Exchange):
@@ -98,7 +98,8 @@ class CEX(Exchange):
             	},
             }
 			self.trade_api = API(username, key, bytearray(secret, 'utf8'))
-			self.api = WebSocketClientPublicData(config, self.depths)
+			warm_up('CEX', 'https://cex.io/api/currency_limits')
+			self.api = WebSocketClientPublicData(config, self.publish_depth)
 		else:
 			config = {
             	'ws': {
@@ -109,7 +110,7 @@ class CEX(Exchange):
             	},
             	'authorize': False
             }
-			self.api = WebSocketClientPublicData(config, self.depths)
+			self.api = WebSocketClientPublicData(config, self.publish_depth)
 		self.name = 'CEX'
 		self.trading_fee = 0.0023 + 0.0002 # degrade the profit target on CEX.io due to less liquidity
 		self.start()
@@ -134,26 +135,27 @@ class CEX(Exchange):
 			if pair is None:
 				continue
 			pairstr = self.format_pair(pair)
-			self.depths[pairstr] = {'bids': [], 'asks': []}
+			self.depths[pairstr] = OrderBook()
 			self.indexed_depths[pairstr] = {'bids': {}, 'asks': {}}
-			self.loop.run_until_complete(self.api.send_subscribe({"e": "subscribe", "rooms": ["pair-%s" % pairstr]}))
+			self.run_coroutine(self.api.send_subscribe({"e": "subscribe", "rooms": ["pair-%s" % pairstr]}))
+		self.invalidate_depths()
 
 	def get_depth(self, base, alt):
 		pairstr = self.format_pair((base, alt))
 		if pairstr not in self.depths:
-			return {'bids':[], 'asks':[]}
-		bids = self.depths[pairstr]['bids']
-		asks = self.depths[pairstr]['asks']
+			return OrderBook()
 		# DEBUG - show best bid ask for each ccy pair
-		#if len(bids) > 0 and len(asks) > 0:
-		#	log.info("%s %s Highest bid: %.8g(%f), Lowest ask: %.8g(%f)" % (self.name, pairstr, bids[0].p, bids[0].v, asks[0].p, asks[0].v))
-		return copy.copy(self.depths[pairstr])
+		#if not self.depths[pairstr].is_empty():
+		#	log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr].best_bid(), self.depths[pairstr].best_ask()))
+		return self.depths[pairstr]
 
 	def get_ticker(self):
+		# one request for all the pairs, quoted as "ETH:BTC"
+		pairs = {pair[0] + ':' + pair[1]: pair for pair in self.get_tradeable_pairs()}
 		tickers = {}
-		for pair in self.get_tradeable_pairs():
-			ticker = self.trade_api.ticker(pair[0] + '/' + pair[1])
-			tickers[pair] = (ticker['bid'] + ticker['ask']) / 2.0
+		for ticker in self.trade_api.tickers(*sorted(set(pair[1] for pair in pairs.values())))['data']:
+			if ticker['pair'] in pairs:
+				tickers[pairs[ticker['pair']]] = (float(ticker['bid']) + float(ticker['ask'])) / 2.0
 		return tickers
 
 	def get_balance(self):
@@ -170,15 +172,26 @@ class CEX(Exchange):
 		self.log_order(side, order)
 		return Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
 
+	async def submit_order_async(self, pair, side, price, volume):
+		order = None
+		if side == "SELL":
+			order = await self.trade_api.place_order_async('sell', volume, price, '%s/%s' % (pair[0], pair[1]))
+		elif side == "BUY":
+			order = await self.trade_api.place_order_async('buy', volume, price, '%s/%s' % (pair[0], pair[1]))
+		else:
+			raise RuntimeError("Unsupported order type: %s" % (side,))
+		self.log_order(side, order)
+		return Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+
 	def query_active_orders(self):
-		orders = []
-		for pair in self.trading_pairs:
-			orders = orders + [Order(orderID=order['id'],
-                                price=float(order['price']),
-                                volume=float(order['pending']),
-                                type=order['type'].upper(),
-                                pair=pair) for order in self.trade_api.current_orders(pair[0] + '/' + pair[1]) if 'error' not in order]
-		return orders
+		# the open orders of all the pairs come in one request
+		pairs = set(self.trading_pairs)
+		return [Order(orderID=order['id'],
+					price=float(order['price']),
+					volume=float(order['pending']),
+					type=order['type'].upper(),
+					pair=(order['symbol1'].upper(), order['symbol2'].upper())) for order in self.trade_api.current_orders('')
+						if 'error' not in order and (order['symbol1'].upper(), order['symbol2'].upper()) in pairs]
 
 	def cancel_orders(self, orders = None):
 		if orders is None:
@@ -188,8 +201,15 @@ class CEX(Exchange):
 			for order in orders:
 				self.trade_api.cancel_order(order.id)
 
+	async def cancel_orders_async(self, orders = None):
+		if orders is None:
+			await super(CEX, self).cancel_orders_async(orders)
+		else:
+			await asyncio.gather(*[self.trade_api.cancel_order_async(order.id) for order in orders])
+
 	def start(self):
-		self.loop.run_until_complete(self.api.run())
+		self.run_coroutine(self.api.run())
 
 	def stop(self):
-		self.stop_updatebook_thread = True
\ No newline at end of file
+		self.stop_updatebook_thread = True
+		self.invalidate_depths()
\ No newline at end of file
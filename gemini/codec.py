@@ -0,0 +1,19 @@
+# json decoding shared by all the exchange clients, uses the fastest available decoder: orjson, ujson or json
+# loads accepts bytes as well as str, so the websocket and http payloads are decoded without an intermediate copy
+# the decoding errors are all ValueError subclasses
+try:
+    from orjson import loads
+    NAME = 'orjson'
+except ImportError:
+    try:
+        from ujson import loads
+        NAME = 'ujson'
+    except ImportError:
+        from json import loads
+        NAME = 'json'
+
+def response_json(response):
+    """
+    decodes the body of a requests response, replaces response.json()
+    """
+    return loads(response.content)
@@ -1,9 +1,9 @@
 import tempfile
 
 def setDefaultConfig():
-    global MODE, IS_SERVICE, EXCHANGES, BLACKLIST, PAIRS, APIKEY_DIR, LOG_DIR, LOG_FILENAME, TICK_TIME, TARGET_FILE, CRASH_FILE, STATE_FILE
+    global MODE, IS_SERVICE, EXCHANGES, BLACKLIST, PAIRS, APIKEY_DIR, LOG_DIR, LOG_FILENAME, TICK_TIME, TRADING_MODE, BINANCE_BOOK_MODE, BINANCE_SNAPSHOT_LIMIT, BINANCE_STREAM_CONNECTIONS, HTTP_POOL_SIZE, HTTP_WARMUP_CONNECTIONS, HTTP_TIMEOUT, PHASE_TIMEOUTS, EXCHANGE_PHASE_TIMEOUTS, RATE_LIMITS, RATE_LIMIT_RESERVE, WEBSOCKET_ORDER_ENTRY, WEBSOCKET_ORDER_TIMEOUT, WEBSOCKET_LATE_ORDER_TIMEOUT, TIME_IN_FORCE, USER_DATA_STREAMS, MAINTENANCE_INTERVALS, MAINTENANCE_POLL_TIME, EXCHANGE_WORKERS, EVALUATION_WORKERS, DISPATCH_WORKERS, TARGET_FILE, CRASH_FILE, STATE_FILE
     global MAX_BIDASK_SPREAD_PCT, NB_PRICE_DECIMALS, NB_VOLUME_DECIMALS, MIN_VOL, MAX_VOL, TRADING_UNIT, RESIDUAL_AMOUNT, LARGE_UNIT, MIN_PROFIT
-    global MIN_REBALANCING_PROFIT, MIN_ORDERBOOK_VOLUME, PROFIT_ADJUSTMENT, PROFIT_ADJUSTMENT_REBALANCING
+    global MIN_REBALANCING_PROFIT, MIN_ORDERBOOK_VOLUME, ORDERBOOK_DEPTH, PROFIT_ADJUSTMENT, PROFIT_ADJUSTMENT_REBALANCING
     global NO_REBALANCING_EXCHANGES, SIMULATION_BALANCES
     global BINANCE_KEYFILE, HITBTC_KEYFILE, BITFINEX_KEYFILE, CEX_KEYFILE, BITTREX_KEYFILE
 
@@ -18,6 +18,42 @@ def setDefaultConfig():
     LOG_DIR = tempfile.gettempdir()
     LOG_FILENAME = "cryptobot_session.txt"
     TICK_TIME = 1 # waiting time between two scans (sec)
+    TRADING_MODE = 'TICK' # TICK: scan all the pairs every TICK_TIME, EVENT: evaluate a pair as soon as one of its order books is updated
+    BINANCE_BOOK_MODE = 'DIFF' # PARTIAL: top 10 levels pushed by the @depth10 streams, DIFF: local books maintained from the diff depth streams
+    BINANCE_SNAPSHOT_LIMIT = 500 # number of levels of the REST snapshots used to synchronize the diff depth books
+    BINANCE_STREAM_CONNECTIONS = 1 # number of combined stream connections, the symbols are spread over them
+    HTTP_POOL_SIZE = 10 # number of keep-alive connections pooled per exchange for the REST calls
+    HTTP_WARMUP_CONNECTIONS = 2 # number of pooled connections opened at startup, before the first order
+    HTTP_TIMEOUT = 10 # REST request timeout (sec)
+    PHASE_TIMEOUTS = { # waiting time of each tick phase for its jobs (sec), the late jobs complete in the background
+        'DEPTH': 1.0,       # copy of the order books
+        'PROFITS': 1.0,     # profit calculation of the candidate pairs
+        'EXECUTE': 10.0     # dispatch of the accepted opportunities and acknowledgement of their legs
+    }
+    EXCHANGE_PHASE_TIMEOUTS = {} # phase timeouts by exchange, overriding PHASE_TIMEOUTS, e.g. {'CEX': {'EXECUTE': 20.0}}
+    RATE_LIMITS = { # REST request limits by exchange and endpoint class: (number of requests or weight, period in sec)
+        'BINANCE': {'REQUEST': (1200, 60), 'ORDER': (10, 1)},
+        'BITFINEX': {'REQUEST': (90, 60)},
+        'BITTREX': {'REQUEST': (60, 60)},
+        'HITBTC': {'REQUEST': (100, 1)},
+        'CEX': {'REQUEST': (600, 600)}
+    }
+    RATE_LIMIT_RESERVE = 0.2 # share of the rate limits kept for the orders, the queries wait when only this share is left
+    WEBSOCKET_ORDER_ENTRY = [] # exchanges sending their orders over the authenticated websocket, REST is used when the socket is down, e.g. ['HITBTC', 'BITFINEX']
+    WEBSOCKET_ORDER_TIMEOUT = 5 # waiting time for the response of an order sent over a websocket (sec)
+    WEBSOCKET_LATE_ORDER_TIMEOUT = 60 # an order which timed out is still booked if its response or its report arrives within this time (sec)
+    TIME_IN_FORCE = {} # time in force of the orders by exchange: GTC (default), IOC or FOK where the exchange supports it, e.g. {'BINANCE': 'IOC'}
+    USER_DATA_STREAMS = [] # exchanges pushing their balances and open orders over a private stream, e.g. ['BINANCE', 'BITFINEX', 'HITBTC', 'BITTREX']
+    MAINTENANCE_INTERVALS = { # REST maintenance jobs run by the background scheduler, interval between two runs on an exchange (sec)
+        'ORDERS': 25,           # active orders polling and repricing
+        'BALANCES': 50,         # balances of the exchanges without a user data stream
+        'RECONCILIATION': 500,  # balances of the exchanges with a user data stream
+        'BOOKCHECK': 100        # order books validated against the REST tickers
+    }
+    MAINTENANCE_POLL_TIME = 0.5 # waiting time of the maintenance scheduler between two checks of the due jobs (sec)
+    EXCHANGE_WORKERS = 3 # worker threads of each exchange for its orders, book copies and maintenance jobs, the queued orders run first
+    EVALUATION_WORKERS = 4 # worker threads of the profit calculations
+    DISPATCH_WORKERS = 8 # worker threads dispatching the accepted opportunities, each waits for the acknowledgement of its legs
     TARGET_FILE = "C:\\inetpub\\midax\\target.json"
     CRASH_FILE = "C:\\inetpub\\midax\\crash.json"
     STATE_FILE = "C:\\inetpub\\midax\\state.json"
@@ -132,6 +168,9 @@ def setDefaultConfig():
     # Minimum volume for orders in the order book
     MIN_ORDERBOOK_VOLUME = 0.00001
 
+    # Number of levels published on each side of the order books
+    ORDERBOOK_DEPTH = 10
+
     # Reduce profit to raise the chances of an instantaneous deal
     PROFIT_ADJUSTMENT = 0.001
     PROFIT_ADJUSTMENT_REBALANCING = 2.0
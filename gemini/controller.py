@@ -1,20 +1,22 @@
 # class for Controller
 from .logger import Logger as log
 from .order import Order
+from .orderbook import OrderBook
 from . import config
 from .exchange import Exchange
 from .profit_calculator import ProfitCalculator
-import sys, asyncio, logging, math, time, copy, threading, traceback
+import sys, asyncio, logging, math, time, copy, threading, traceback, contextlib
 from datetime import datetime, timedelta
 
 # wrapper for the controller multithreaded functions
-# it used as a decorator
+# it used as a decorator. the scheduler phases await the jobs themselves and pass no control_state
 def multithreaded(func):
     def func_wrapper(controller, loop, control_state, *kargs, **kwargs):
        res = func(controller, *kargs, **kwargs)
-       control_state[0] = control_state[0] - 1
-       if control_state[0] == 0:
-           loop.stop()
+       if control_state is not None:
+           control_state[0] = control_state[0] - 1
+           if control_state[0] == 0:
+               loop.stop()
        return res
     return func_wrapper
 
@@ -38,25 +40,64 @@ class Controller(object):
 
         # the exchange order book
         self.depth = {}
+        self.depth_versions = {} # exchange book versions of the copied books
         self.orders = {} # outstanding orders by id
         self.has_active_orders = False
         self.to_resubmit_orders = []
+        self.nb_reprices = 0
+        self.reprice_time = 0.0 # cumulated time to reprice the orders
         self.bad_prices = {pair:0 for pair in xchg.get_tradeable_pairs()}
+        self.balance_locks = None # (exchange, currency) locks of the scheduler, shared with the trades
+        xchg.add_balance_listener(self.on_balance)
+        xchg.add_order_listener(self.on_order)
+        xchg.add_late_order_listener(self.on_late_order)
 
     def submit_order(self, pair, side, price, volume):
         order = self.xchg.submit_order(pair, side, price, volume)
-        self.orders[order.id] = order
-        if side == 'BUY':
-            self.balances[pair[1]] = self.balances.get(pair[1],0.0) - float(volume) * float(price) * (1.0 + self.xchg.trading_fee)
-            self.offline_balances[pair[0]] = self.offline_balances.get(pair[0],0.0) + float(volume)
-            self.offline_balances[pair[1]] = self.offline_balances.get(pair[1],0.0) - float(volume) * float(price) * (1.0 + self.xchg.trading_fee)
-        else:
-            self.balances[pair[0]] = self.balances.get(pair[0],0.0) - float(volume)
-            self.offline_balances[pair[0]] = self.offline_balances.get(pair[0],0.0) - float(volume)
-            self.offline_balances[pair[1]] = self.offline_balances.get(pair[1],0.0) + float(volume) * float(price) * (1.0 - self.xchg.trading_fee)
-        log.info('%s Offline balances: %s' % (self.xchg.name, str({key:val for key, val in self.offline_balances.items() if val != 0})))
+        self.book_order(order, pair, side, price, volume)
+        return order
+
+    async def submit_order_async(self, pair, side, price, volume):
+        sent_time = time.time()
+        order = await self.xchg.submit_order_async(pair, side, price, volume)
+        order.sent_time = sent_time
+        order.ack_time = time.time()
+        # booking waits for the balance locks, it is handed off to the order lane so the event loop never blocks
+        await asyncio.get_event_loop().run_in_executor(self.xchg.order_executor, self.book_order, order, pair, side, price, volume)
         return order
 
+    def hold_balances(self, currencies):
+        # the balances are changed under the locks of the trades touching them, no lock is shared without a scheduler
+        if self.balance_locks is None:
+            return contextlib.nullcontext()
+        return self.balance_locks.hold([(self.xchg.name, ccy) for ccy in currencies])
+
+    def book_order(self, order, pair, side, price, volume):
+        # records a new order and its expected effect on the balances
+        with self.hold_balances(pair):
+            if order.executed is None:
+                self.orders[order.id] = order
+            else:
+                # immediate-or-cancel or fill-or-kill order: closed at once, only its executed volume changes the balances
+                if order.executed < float(volume):
+                    log.warning('%s %s %s/%s order %s executed %f of %s' % (self.xchg.name, side, pair[0], pair[1], str(order.id), order.executed, str(volume)))
+                    # the unfilled part of the volume reserved by the scheduler is given back
+                    unfilled = float(volume) - order.executed
+                    if side == 'BUY':
+                        self.balances[pair[1]] = self.balances.get(pair[1],0.0) + unfilled * float(price)
+                    else:
+                        self.balances[pair[0]] = self.balances.get(pair[0],0.0) + unfilled
+                volume = order.executed
+            if side == 'BUY':
+                self.balances[pair[1]] = self.balances.get(pair[1],0.0) - float(volume) * float(price) * (1.0 + self.xchg.trading_fee)
+                self.offline_balances[pair[0]] = self.offline_balances.get(pair[0],0.0) + float(volume)
+                self.offline_balances[pair[1]] = self.offline_balances.get(pair[1],0.0) - float(volume) * float(price) * (1.0 + self.xchg.trading_fee)
+            else:
+                self.balances[pair[0]] = self.balances.get(pair[0],0.0) - float(volume)
+                self.offline_balances[pair[0]] = self.offline_balances.get(pair[0],0.0) - float(volume)
+                self.offline_balances[pair[1]] = self.offline_balances.get(pair[1],0.0) + float(volume) * float(price) * (1.0 - self.xchg.trading_fee)
+            log.info('%s Offline balances: %s' % (self.xchg.name, str({key:val for key, val in self.offline_balances.items() if val != 0})))
+
     @multithreaded
     def async_submit_order(self, pair, side, price, volume):
         base, alt = pair
@@ -66,9 +107,29 @@ class Controller(object):
         except Exception as exc:
             log.error("%s failed to process a %s order: %f %s/%s at %.8g. %s" % (self.xchg.name, side, volume, base, alt, price, traceback.format_exc()))
 
+    async def submit_leg(self, pair, side, price, volume):
+        # one leg of an arbitrage, sent from the scheduler event loop. returns None if the order failed
+        base, alt = pair
+        try:
+            order = await self.submit_order_async(pair, side, self.format_price(pair,price), self.format_volume(pair,volume))
+            log.ok("%s %s Trade submitted: %f %s/%s at %.8g in %.1fms" % (self.xchg.name, side, volume, base, alt, price, (order.ack_time - order.sent_time) * 1000))
+            if order.executed is not None and len(self.orders) == 0:
+                # nothing left on the book, the exchange is free for the next opportunity
+                self.has_active_orders = False
+            return order
+        except Exception as exc:
+            log.error("%s failed to process a %s order: %f %s/%s at %.8g. %s" % (self.xchg.name, side, volume, base, alt, price, traceback.format_exc()))
+        return None
+
     def cancel_order(self, order):
         if order.id in self.orders:
             self.xchg.cancel_orders([order])
+            return self.release_order(order)
+        return None
+
+    def release_order(self, order):
+        # removes a cancelled order from the registry and reverts its expected effect on the balances
+        with self.hold_balances(order.pair):
             if order.type == 'SELL':
                 self.balances[order.pair[0]] += order.v
                 self.offline_balances[order.pair[0]] += order.v
@@ -79,7 +140,45 @@ class Controller(object):
                 self.offline_balances[order.pair[1]] += order.v * order.p * (1.0 + self.xchg.trading_fee)
             log.info('%s Offline balances: %s' % (self.xchg.name, str({key:val for key, val in self.offline_balances.items() if val != 0})))
             return self.orders.pop(order.id)
-        return None
+
+    def reprice_order(self, order, mid_price):
+        # moves an open order to mid-spread in one cycle, with the cancel-replace of the exchange where it has one
+        start = time.time()
+        pair = order.pair
+        volume = order.v
+        if order.type == 'BUY':
+            # adjust the volume to the new price and the amount available once the order is cancelled
+            xcgh_balance = self.balances[pair[1]] + order.v * order.p * (1.0 + self.xchg.trading_fee)
+            residual = config.RESIDUAL_AMOUNT[pair[1]]
+            if xcgh_balance - volume * mid_price * (1.0 + self.xchg.trading_fee) < residual:
+                volume = (xcgh_balance - residual) / (mid_price * (1.0 + self.xchg.trading_fee))
+                log.warning('%s %s/%s PRICE UPDATE. updated order volume from %f to %f' % (self.xchg.name, pair[0], pair[1], order.v, volume))
+                if volume <= 0:
+                    # nothing left to buy at the new price
+                    order_orig = self.cancel_order(order)
+                    log.warning('%s %s/%s PRICE UPDATE SUCCESS. cancelled order: %s' % (self.xchg.name, pair[0], pair[1], str(order_orig)))
+                    return None
+        price, volume = self.format_price(pair, mid_price), self.format_volume(pair, volume)
+        new_order = self.xchg.replace_order(order, price, volume)
+        if new_order is None:
+            order_orig = self.cancel_order(order)
+            log.warning('%s %s/%s PRICE UPDATE SUCCESS. cancelled order: %s' % (self.xchg.name, pair[0], pair[1], str(order_orig)))
+            try:
+                new_order = self.submit_order(pair, order.type, price, volume)
+            except:
+                # submitted again on the next cycle
+                order_orig.v = order.v
+                self.to_resubmit_orders.append(order_orig)
+                raise
+        else:
+            self.release_order(order)
+            self.book_order(new_order, pair, order.type, price, volume)
+        elapsed = time.time() - start
+        self.nb_reprices += 1
+        self.reprice_time += elapsed
+        log.warning('%s %s/%s PRICE UPDATE. updated order: %s in %.1fms (average %.1fms)' %
+                    (self.xchg.name, pair[0], pair[1], str(new_order), elapsed * 1000, self.reprice_time * 1000 / self.nb_reprices))
+        return new_order
 
     def check_active_orders(self):
         if not self.has_active_orders:
@@ -107,43 +206,39 @@ class Controller(object):
             pairstr = 'DEFAULT'
         return ('{:.' + str(config.NB_VOLUME_DECIMALS[pairstr]) + 'f}').format(ProfitCalculator.floor_volume(pair, volume))
 
+    def get_book(self, pairstr):
+        return self.depth.get(pairstr)
+
     def get_highest_bid(self, pair):
-        base, alt = pair
-        pairstr = base + "_" + alt
-        if pairstr in self.depth and len(self.depth[pairstr]['bids']) > 0:
-            return self.depth[pairstr]['bids'][0].p
-        return None
+        book = self.get_book(pair[0] + "_" + pair[1])
+        return book.best_bid() if book is not None else None
 
     def get_lowest_ask(self, pair):
-        base, alt = pair
-        pairstr = base + "_" + alt
-        if pairstr in self.depth and len(self.depth[pairstr]['asks']) > 0:
-            return self.depth[pairstr]['asks'][0].p
-        return None
+        book = self.get_book(pair[0] + "_" + pair[1])
+        return book.best_ask() if book is not None else None
 
     def get_best_bid_min_vol(self, pair):
-        base, alt = pair
-        pairstr = base + "_" + alt
-        volume = 0
-        order = Order(0, 0)
-        if pairstr in self.depth and len(self.depth[pairstr]['bids']) > 0:
-            for o in self.depth[pairstr]['bids']:
-                order = Order(o.p, order.v + o.v)
-                if order.v >= config.MIN_VOL[base]:
-                    break
-        return order
+        # price and cumulated volume of the first bid level reaching the minimum volume
+        book = self.get_book(pair[0] + "_" + pair[1])
+        if book is None:
+            return Order(0, 0)
+        price, volume = book.bids.min_volume_level(config.MIN_VOL[pair[0]])
+        return Order(price, volume)
 
     def get_best_ask_min_vol(self, pair):
-        base, alt = pair
-        pairstr = base + "_" + alt
-        volume = 0
-        order = Order(0, 0)
-        if pairstr in self.depth and len(self.depth[pairstr]['asks']) > 0:
-            for o in self.depth[pairstr]['asks']:
-                order = Order(o.p, order.v + o.v)
-                if order.v >= config.MIN_VOL[base]:
-                    break
-        return order
+        # price and cumulated volume of the first ask level reaching the minimum volume
+        book = self.get_book(pair[0] + "_" + pair[1])
+        if book is None:
+            return Order(0, 0)
+        price, volume = book.asks.min_volume_level(config.MIN_VOL[pair[0]])
+        return Order(price, volume)
+
+    def depth_changed(self, pair):
+        # True if the exchange book has been updated since it was last copied
+        pairstr = pair[0] + "_" + pair[1]
+        if self.xchg.has_error[0] or pairstr not in self.depth:
+            return True
+        return self.depth_versions.get(pairstr) != self.xchg.get_depth_version(pair)
 
     @multithreaded
     def update_depth(self, pair):
@@ -151,25 +246,71 @@ class Controller(object):
         pairstr = base + "_" + alt
         try:
             if self.xchg.has_error[0]:
-                self.depth[pairstr] = {'bids':[],'asks':[]}
+                self.depth[pairstr] = OrderBook()
+                self.depth_versions.pop(pairstr, None)
             else:
+                version = self.xchg.get_depth_version(pair)
+                if pairstr in self.depth and self.depth_versions.get(pairstr) == version:
+                    return
                 self.depth[pairstr] = self.xchg.get_depth(base, alt)
+                self.depth_versions[pairstr] = version
         except:
             # clear the book in case of an error
-            self.depth[pairstr] = {'bids':[],'asks':[]}
+            self.depth[pairstr] = OrderBook()
+            self.depth_versions.pop(pairstr, None)
+
+    def on_balance(self, xchg, ccy, balance):
+        # pushed by the user data stream from the websocket thread, the balances are first loaded from the REST api
+        if not self.balances:
+            return
+        with self.hold_balances([ccy]):
+            previous = self.previous_balances.get(ccy, 0.0)
+            self.balances[ccy] = balance
+            self.previous_balances[ccy] = balance
+            if ccy not in self.offline_balances:
+                self.offline_balances[ccy] = balance
+                self.initial_balances[ccy] = balance
+        if balance != previous:
+            self.new_balance_detected = True
+            log.info("%s streamed balance: %f%s Diff: %f" % (self.xchg.name, balance, ccy, balance - previous))
+
+    def on_order(self, xchg, order, is_open):
+        # pushed by the user data stream from the websocket thread, a filled order frees the exchange at once
+        if is_open:
+            self.has_active_orders = True
+            return
+        if order.id in self.orders:
+            log.info("%s order closed: %s" % (self.xchg.name, str(order)))
+        with xchg.stream_lock:
+            self.has_active_orders = len(xchg.stream_orders) > 0
+
+    def on_late_order(self, xchg, order, pair, side, price, volume):
+        # pushed from the websocket thread, the leg failed on its timeout but the order is live: it is booked now
+        self.book_order(order, pair, side, price, volume)
+        if order.executed is None:
+            self.has_active_orders = True
 
     @multithreaded
     def update_all_balances(self):
-        self.clear()
+        # the REST balances are fetched first, then published at once under the locks of their currencies
+        # so a trade never sees a partial update, nor waits for the REST api
         self.reconnecting = False
+        streamed = self.xchg.has_user_stream()
+        balances = None
         try:
-            if self.xchg.has_error[0]:
-                self.balances = None
-            else:
-                self.balances = self.xchg.get_all_balances()
+            if not self.xchg.has_error[0]:
+                balances = self.xchg.get_all_balances()
+                if streamed:
+                    missed = self.xchg.reconcile_active_orders()
+                    if len(missed) > 0:
+                        log.warning("%s user data stream out of sync, orders: %s" % (self.xchg.name, ', '.join(missed)))
         except Exception as exc:
             log.error("%s: error during update_all_balances. details: %s" % (self.xchg.name, traceback.format_exc()))
-            self.balances = None
+        with self.hold_balances(set(balances or {}) | set(self.balances or {})):
+            self.publish_balances(balances, streamed)
+
+    def publish_balances(self, balances, streamed):
+        self.balances = balances
         connection_lost_detected = False
         if self.balances is None or len(self.balances) == 0:
             connection_lost_detected = True
@@ -188,6 +329,8 @@ class Controller(object):
                         new_balance_detected = True
                         balance_diff[ccy] = self.balances[ccy]
             if new_balance_detected:
+                if streamed:
+                    log.warning("%s user data stream out of sync, balances: %s" % (self.xchg.name, str(balance_diff)))
                 for ccy, vol in balance_diff.items():
                     if len(self.to_resubmit_orders) == 0:
                         log.ok("%s new balance: %f%s" % (self.xchg.name, vol, ccy))
@@ -215,48 +358,45 @@ class Controller(object):
         try:
             if self.xchg.has_error[0]:
                 connection_lost_detected = True
+            elif len(self.orders) == 0 and len(self.to_resubmit_orders) == 0 and self.xchg.get_time_in_force() != 'GTC':
+                # the immediate-or-cancel and fill-or-kill orders never rest on the book
+                self.has_active_orders = False
             else:
                 if len(self.to_resubmit_orders) == 0:
-                    orders = self.xchg.query_active_orders()
+                    orders = self.xchg.get_active_orders()
                     if len(orders) > 0:
                         self.has_active_orders = True
-                        # cancel orders when the price is too far from mid-spread
-                        # place them in the to_resubmit_orders list for next tick to process them
-                        self.to_resubmit_orders = []
+                        # move the orders to mid-spread when their price is too far from it
                         for order in orders:
                             if order.id not in self.orders:
                                 log.error('%s detected a trade %s which is not in the registry' % (self.xchg.name, self.xchg.format_pair(order.pair)))
                                 continue
                             pair = order.pair
                             pairstr = pair[0] + '_' + pair[1]
-                            if self.depth[pairstr] is None or len(self.depth[pairstr]['bids']) == 0 or len(self.depth[pairstr]['asks']) == 0:
+                            book = self.get_book(pairstr)
+                            if book is None or book.is_empty():
                                 log.error('%s %s Cannot read order book while updating active orders' % (self.xchg.name, pairstr))
                             else:
-                                mid_price = (self.depth[pairstr]['bids'][0].p + self.depth[pairstr]['asks'][0].p) / 2
-                                if ((order.type == 'BUY' and mid_price > (order.p + self.depth[pairstr]['asks'][0].p) / 2) or
-                                    (order.type == 'SELL' and mid_price < (order.p + self.depth[pairstr]['bids'][0].p) / 2)):
-                                    order_orig = self.cancel_order(order)
-                                    success = order_orig is not None
-                                    status = 'SUCCESS' if success else 'FAILURE'
-                                    msg = '%s %s PRICE UPDATE %s. cancelled order: %s' % (self.xchg.name, pairstr, status, str(order_orig))
-                                    if success:
-                                        log.warning(msg)
-                                    else:
-                                        log.error(msg)
-                                    order_orig.v = order.v
-                                    self.to_resubmit_orders.append(order_orig)
+                                mid_price = (book.best_bid() + book.best_ask()) / 2
+                                if ((order.type == 'BUY' and mid_price > (order.p + book.best_ask()) / 2) or
+                                    (order.type == 'SELL' and mid_price < (order.p + book.best_bid()) / 2)):
+                                    try:
+                                        self.reprice_order(order, mid_price)
+                                    except Exception as exc:
+                                        log.error('%s %s PRICE UPDATE FAILURE. order: %s. %s' % (self.xchg.name, pairstr, str(order), traceback.format_exc()))
                     else:
                         self.has_active_orders = False
                 else:
-                    # update the order price to mid-spread
+                    # submit the orders cancelled before a crash at mid-spread
                     for order in self.to_resubmit_orders:
                         pair = order.pair
                         pairstr = pair[0] + '_' + pair[1]
-                        if self.depth[pairstr] is None or len(self.depth[pairstr]['bids']) == 0 or len(self.depth[pairstr]['asks']) == 0:
+                        book = self.get_book(pairstr)
+                        if book is None or book.is_empty():
                             log.error('%s %s Cannot read order book while updating active orders' % (self.xchg.name, pairstr))
                         else:
                             # caldulate mid-spread price
-                            mid_price = (self.depth[pairstr]['bids'][0].p + self.depth[pairstr]['asks'][0].p) / 2.0
+                            mid_price = (book.best_bid() + book.best_ask()) / 2.0
                             # adjust the volume according to the new price and available amount in the wallet
                             if order.type == 'BUY':
                                 xcgh_balance = self.balances[pair[1]]
@@ -296,12 +436,13 @@ class Controller(object):
             if not self.reconnecting and not self.connection_lost_detected and pair in tickers:
                 ticker = tickers[pair]
                 order_book = self.xchg.get_depth(pair[0], pair[1])
-                if (order_book['bids'][0].p - ticker) > 0.01 * order_book['bids'][0].p or (ticker - order_book['asks'][0].p) > 0.01 * order_book['asks'][0].p:
+                best_bid, best_ask = order_book.bids.prices[0], order_book.asks.prices[0]
+                if (best_bid - ticker) > 0.01 * best_bid or (ticker - best_ask) > 0.01 * best_ask:
                     pairstr = pair[0] + '_' + pair[1]
                     if self.bad_prices[pair] == 3:
-                        log.error('%s %s Bad price detected: %.8g not within (%.8g, %.8g)' % (self.xchg.name, pairstr, ticker, order_book['bids'][0].p, order_book['asks'][0].p))
+                        log.error('%s %s Bad price detected: %.8g not within (%.8g, %.8g)' % (self.xchg.name, pairstr, ticker, best_bid, best_ask))
                     elif self.bad_prices[pair] < 3:
-                        log.warning('%s %s price %.8g not within (%.8g, %.8g)' % (self.xchg.name, pairstr, ticker, order_book['bids'][0].p, order_book['asks'][0].p))
+                        log.warning('%s %s price %.8g not within (%.8g, %.8g)' % (self.xchg.name, pairstr, ticker, best_bid, best_ask))
                     self.bad_prices[pair] += 1
                 else:
                     self.bad_prices[pair] = 0
@@ -325,6 +466,7 @@ class Controller(object):
     def clear(self):
         self.balances = {}
         self.depth = {}
+        self.depth_versions = {}
 
     def shutdown(self):
         self.clear()
@@ -343,6 +485,10 @@ class ControllerTest(Controller):
         if depth is not None:
             self.depth = depth
 
+    def get_book(self, pairstr):
+        # unit tests describe the books as dicts of lists of orders
+        return OrderBook.from_depth(self.depth.get(pairstr))
+
 class ControllerSimulator(ControllerTest):
     def __init__(self, exchg):
         super(ControllerSimulator, self).__init__(exchg, config.SIMULATION_BALANCES)
@@ -364,6 +510,14 @@ class ControllerSimulator(ControllerTest):
                 self.offline_balances[pair[1]] += float(volume) * float(price)
         return order
 
+    async def submit_order_async(self, pair, side, price, volume):
+        # the simulated orders go through submit_order, they never reach the exchanges. it books them off the event loop
+        sent_time = time.time()
+        order = await asyncio.get_event_loop().run_in_executor(self.xchg.order_executor, self.submit_order, pair, side, price, volume)
+        order.sent_time = sent_time
+        order.ack_time = time.time()
+        return order
+
     @multithreaded
     def update_all_balances(self):
         pass
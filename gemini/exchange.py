@@ -3,7 +3,7 @@ from .order import Order
 from .logger import Logger as log
 from .keyhandler import KeyHandler
 from . import config
-import abc, asyncio, concurrent, logging, os
+import abc, asyncio, concurrent.futures, logging, os, threading, time
 from datetime import datetime, timedelta
 
 class ExchangeLogHandler(logging.StreamHandler):
@@ -21,6 +21,8 @@ class ExchangeLogHandler(logging.StreamHandler):
 
 class Exchange(object):
     __metaclass__ = abc.ABCMeta
+    time_in_force_modes = ('GTC',) # supported by the order entry of the exchange
+    order_executor = None # order lane of the exchange executor, set by the scheduler. None runs the blocking order calls in the default executor of the loop
 
     def __init__(self, pairs, keyfile, loop, has_error):
         super(Exchange, self).__init__()
@@ -33,16 +35,27 @@ class Exchange(object):
         self.tradeable_pairs = self.get_tradeable_pairs()
         self.set_tradeable_currencies()
         self.depths = {}
+        self.depth_versions = {} # incremented each time a book is updated
         self.poor_ccy = {}
         self.low_profits = {}
         self.bidask_spd_timestamps = {}
         self.pending_order_timestamp = datetime.now() - timedelta(seconds=60)
         self.trading_pairs = []
+        self.depth_listeners = []
+        # balances and open orders pushed by the private user data stream
+        self.user_stream = False # set by the exchanges once their user data stream is subscribed
+        self.stream_lock = threading.Lock()
+        self.stream_balances = {}
+        self.stream_orders = {} # open orders by id
+        self.balance_listeners = []
+        self.order_listeners = []
+        self.late_order_listeners = []
         for base, alt in self.get_tradeable_pairs():
             self.trading_pairs = self.trading_pairs + [(base, alt)]
             self.low_profits[base + '_' + alt] = datetime.now() - timedelta(seconds=60), 0.0
             self.bidask_spd_timestamps[base + '_' + alt] = datetime.now() - timedelta(seconds=60)
         self.ccies = [pair[0] for pair in self.trading_pairs] + ['BTC']
+        self.symbol_pairs = {self.format_pair(pair): pair for pair in self.trading_pairs} # pairs by exchange formatted symbol, for the depth listeners
 
     def get_tradeable_pairs(self):
         tradeable_pairs = []
@@ -71,9 +84,136 @@ class Exchange(object):
         If exchange does not support the base_alt market but supports
         the alt_base market instead, it is up to the exchange to convert
         retrieved data to the desired format.
+        returns an OrderBook, see orderbook.py
         '''
         return NotImplemented
 
+    def add_depth_listener(self, callback):
+        '''
+        registers callback(xchg, pair) to be notified from the websocket threads
+        each time the order book of a pair is updated
+        '''
+        self.depth_listeners.append(callback)
+
+    def notify_depth(self, pairstr):
+        '''
+        called by the connectors with the exchange formatted pair of the updated book
+        '''
+        self.depth_versions[pairstr] = self.depth_versions.get(pairstr, 0) + 1
+        if len(self.depth_listeners) == 0:
+            return
+        pair = self.symbol_pairs.get(pairstr)
+        if pair is None:
+            return
+        for callback in self.depth_listeners:
+            callback(self, pair)
+
+    def publish_depth(self, pairstr, book, notify=True):
+        '''
+        stamps the new book snapshot and swaps it by reference, readers never see a partially updated book.
+        the published books are never modified afterwards, so they can be shared without any lock or copy
+        '''
+        book.version = self.depth_versions.get(pairstr, 0) + (1 if notify else 0)
+        book.timestamp = time.time()
+        self.depths[pairstr] = book
+        if notify:
+            self.notify_depth(pairstr)
+
+    def get_depth_version(self, pair):
+        return self.depth_versions.get(self.format_pair(pair), 0)
+
+    def invalidate_depths(self):
+        '''
+        to be called when the books are reset, forces the controllers to copy them again
+        '''
+        for pairstr in list(self.depth_versions.keys()):
+            self.depth_versions[pairstr] += 1
+
+    def has_user_stream(self):
+        '''
+        True while the balances and the open orders are pushed by the user data stream,
+        they only need to be polled to reconcile them with the REST api
+        '''
+        return self.user_stream
+
+    def add_balance_listener(self, callback):
+        '''
+        registers callback(xchg, ccy, balance) to be notified from the websocket threads
+        each time the user data stream pushes an available balance
+        '''
+        self.balance_listeners.append(callback)
+
+    def add_order_listener(self, callback):
+        '''
+        registers callback(xchg, order, is_open) to be notified from the websocket threads
+        each time the user data stream pushes an order update, order.v is the remaining volume
+        '''
+        self.order_listeners.append(callback)
+
+    def add_late_order_listener(self, callback):
+        '''
+        registers callback(xchg, order, pair, side, price, volume) to be notified from the websocket threads
+        when an order sent over a websocket is answered or reported after its timeout
+        '''
+        self.late_order_listeners.append(callback)
+
+    def publish_balance(self, ccy, balance):
+        '''
+        called by the user data streams with the available balance of a currency
+        '''
+        self.stream_balances[ccy] = balance
+        for callback in self.balance_listeners:
+            callback(self, ccy, balance)
+
+    def publish_order(self, order, is_open):
+        '''
+        called by the user data streams with a new, updated, filled or cancelled order
+        '''
+        with self.stream_lock:
+            if is_open:
+                self.stream_orders[order.id] = order
+            else:
+                self.stream_orders.pop(order.id, None)
+        for callback in self.order_listeners:
+            callback(self, order, is_open)
+
+    def publish_orders(self, orders):
+        '''
+        called by the user data streams with the snapshot of the open orders, sent when they (re)subscribe
+        '''
+        with self.stream_lock:
+            self.stream_orders = {order.id: order for order in orders}
+        for order in orders:
+            for callback in self.order_listeners:
+                callback(self, order, True)
+
+    def publish_late_order(self, order, pair, side, price, volume):
+        '''
+        called by the websocket order entries with an order whose submission timed out, it is live and still to be booked
+        '''
+        log.warning('%s %s %s/%s order %s answered after its timeout' % (self.name, side, pair[0], pair[1], str(order.id)))
+        for callback in self.late_order_listeners:
+            callback(self, order, pair, side, price, volume)
+
+    def get_active_orders(self):
+        '''
+        open orders maintained by the user data stream, queried from the REST api when there is no stream
+        '''
+        if not self.has_user_stream():
+            return self.query_active_orders()
+        with self.stream_lock:
+            return list(self.stream_orders.values())
+
+    def reconcile_active_orders(self):
+        '''
+        replaces the streamed open orders by the REST ones. returns the ids of the orders the stream missed
+        '''
+        orders = {order.id: order for order in self.query_active_orders()}
+        with self.stream_lock:
+            missed = set(orders.keys()) ^ set(self.stream_orders.keys())
+            self.stream_orders = orders
+        return missed
+
     @abc.abstractmethod
     def get_ticker(self):
         return NotImplemented
@@ -106,10 +246,32 @@ class Exchange(object):
                 self.poor_ccy[ccy] = 0.0
         return balances
 
+    def get_time_in_force(self):
+        '''
+        time in force of the new orders (config.TIME_IN_FORCE), GTC when the exchange does not support the configured one.
+        the IOC and FOK orders report their executed volume in Order.executed and never rest on the book
+        '''
+        time_in_force = config.TIME_IN_FORCE.get(self.name, 'GTC')
+        return time_in_force if time_in_force in self.time_in_force_modes else 'GTC'
+
     @abc.abstractmethod
     def submit_order(self, pair, side, price, volume):
         return NotImplemented
 
+    async def submit_order_async(self, pair, side, price, volume):
+        '''
+        asyncio order entry, awaited from the scheduler event loop so the legs of an arbitrage go out together.
+        the exchanges send the order over their non-blocking http session, by default submit_order runs on the order lane of the exchange
+        '''
+        return await asyncio.get_event_loop().run_in_executor(self.order_executor, self.submit_order, pair, side, price, volume)
+
+    def replace_order(self, order, price, volume):
+        '''
+        cancels an open order and places a new order of the same side at price for volume in one operation, returns the new Order.
+        returns None when the exchange cannot replace orders atomically, the order is then cancelled and submitted again
+        '''
+        return None
+
     @abc.abstractmethod
     def query_active_orders(self):
         pass
@@ -118,6 +280,47 @@ class Exchange(object):
     def cancel_orders(self, order_ids = None):
         pass
 
+    async def cancel_orders_async(self, orders = None):
+        '''
+        asyncio version of cancel_orders, by default cancel_orders runs on the order lane of the exchange
+        '''
+        return await asyncio.get_event_loop().run_in_executor(self.order_executor, self.cancel_orders, orders)
+
+    def run_order_request(self, coro):
+        '''
+        sends a websocket order request from a controller or maintenance thread, on the scheduler loop which always runs on its own
+        thread. the request is cancelled when it is not answered in time, it is never sent after the caller gave up on it
+        '''
+        given_up = threading.Event()
+        async def send():
+            # the cancellation of a late request only reaches the loop after its first step, it is checked before sending
+            if given_up.is_set():
+                coro.close()
+                raise asyncio.CancelledError()
+            return await coro
+        future = asyncio.run_coroutine_threadsafe(send(), self.loop)
+        try:
+            return future.result(config.WEBSOCKET_ORDER_TIMEOUT + 1)
+        except concurrent.futures.TimeoutError:
+            given_up.set()
+            future.cancel()
+            raise
+
+    def run_coroutine(self, coro):
+        '''
+        runs a coroutine on the scheduler loop and waits for its result. the loop runs on its own thread once the scheduler
+        is started, a coroutine started from the loop itself is only scheduled
+        '''
+        if not self.loop.is_running():
+            return self.loop.run_until_complete(coro)
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            return self.loop.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
     @abc.abstractmethod
     def start(self):
         pass
@@ -0,0 +1,116 @@
+# bounded executors of the exchanges, the orders of an exchange never queue behind its book copies or its REST maintenance
+from concurrent.futures import Executor, Future
+import threading, itertools, queue, time
+
+LANES = ('ORDER', 'DEPTH', 'MAINTENANCE') # by priority
+
+class LaneExecutor(object):
+    '''
+    pool of at most max_workers threads fed by a priority queue, a free worker takes the oldest job of the most urgent lane.
+    a running job is never interrupted, the lanes only order the queued jobs
+    '''
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.idle = 0
+        self.queued = 0 # jobs not taken by a worker yet
+        self.closed = False
+        self.stats = {lane: [0, 0, 0, 0.0] for lane in LANES} # number of jobs, queued jobs, longest queue and cumulated waiting time by lane
+
+    def lane(self, lane):
+        return Lane(self, lane)
+
+    def submit(self, lane, fn, *args, **kwargs):
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError('%s executor is shut down' % (self.name,))
+            stats = self.stats[lane]
+            stats[0] += 1
+            stats[1] += 1
+            stats[2] = max(stats[2], stats[1])
+            self.queue.put((LANES.index(lane), next(self.counter), lane, future, fn, args, kwargs, time.time()))
+            self.queued += 1
+            # a burst of jobs starts as many workers as it needs, not only one when no worker is idle
+            if self.queued > self.idle and len(self.threads) < self.max_workers:
+                thread = threading.Thread(target=self.work, name='%s-%d' % (self.name, len(self.threads)), daemon=True)
+                self.threads.append(thread)
+                thread.start()
+        return future
+
+    def work(self):
+        while True:
+            with self.lock:
+                self.idle += 1
+            _, _, lane, future, fn, args, kwargs, queued_time = self.queue.get()
+            with self.lock:
+                self.idle -= 1
+                if lane is None:
+                    return
+                self.queued -= 1
+                stats = self.stats[lane]
+                stats[1] -= 1
+                stats[3] += time.time() - queued_time
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True):
+        # the queued jobs are run before the workers stop
+        with self.lock:
+            self.closed = True
+            threads = list(self.threads)
+        for _ in threads:
+            self.queue.put((len(LANES), next(self.counter), None, None, None, None, None, None))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def get_usage(self):
+        with self.lock:
+            return {lane: {'jobs': jobs, 'queued': queued, 'max_queued': longest, 'average_wait_ms': round(wait * 1000 / jobs, 1)}
+                    for lane, (jobs, queued, longest, wait) in self.stats.items() if jobs > 0}
+
+class Lane(Executor):
+    # one lane of an exchange executor, accepted by loop.run_in_executor
+    def __init__(self, executor, lane):
+        self.executor = executor
+        self.lane = lane
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(self.lane, fn, *args, **kwargs)
+
+class ExchangeExecutors(object):
+    '''
+    one LaneExecutor by exchange, created on first use
+    '''
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.executors = {}
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.executors:
+                self.executors[name] = LaneExecutor(name, self.config.EXCHANGE_WORKERS)
+            return self.executors[name]
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executors = list(self.executors.values())
+        for executor in executors:
+            executor.shutdown(wait)
+
+    def get_usage(self):
+        with self.lock:
+            executors = list(self.executors.values())
+        return {executor.name: executor.get_usage() for executor in executors}
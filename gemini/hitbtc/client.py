@@ -187,8 +187,10 @@ class HitBTC:
 
         Offical Endpoint Documentation:
             https://api.hitbtc.com/?python#place-new-order
+
+        :return: True if the request was sent
         """
-        self.conn.send('newOrder', custom_id=custom_id, **params)
+        return self.conn.send('newOrder', custom_id=custom_id, **params)
 
     def cancel_order(self, custom_id=None, **params):
         """
@@ -196,8 +198,10 @@ class HitBTC:
 
         Offical Endpoint Documentation:
             https://api.hitbtc.com/?python#cancel-order
+
+        :return: True if the request was sent
         """
-        self.conn.send('cancelOrder', custom_id=custom_id, **params)
+        return self.conn.send('cancelOrder', custom_id=custom_id, **params)
 
     def replace_order(self, custom_id=None, **params):
         """
@@ -205,5 +209,7 @@ class HitBTC:
 
         Offical Endpoint Documentation:
             https://api.hitbtc.com/?python#cancel-replace-orders
+
+        :return: True if the request was sent
         """
-        self.conn.send('cancelReplaceOrder', custom_id=custom_id, **params)
+        return self.conn.send('cancelReplaceOrder', custom_id=custom_id, **params)
@@ -5,11 +5,11 @@ import time
 import json
 import hmac
 import hashlib
-from threading import Timer
 from collections import defaultdict
 
 from .wss import WebSocketConnectorThread
 from .utils import response_types
+from ..codec import loads
 
 log = logging.getLogger(__name__)
 
@@ -41,8 +41,15 @@ class HitBTCConnector(WebSocketConnectorThread):
         self.requests = {}
         self.raw = raw
         self.logged_in = False
+        self.credentials = None
         self.silent = silent
         self.stdout_only = stdout_only
+        # Optional callable, receives (request, response) before the response is queued
+        # and returns True if it consumed the response
+        self.on_response = None
+        # Optional callable, receives (method, params) of the order reports
+        # ('activeOrders' snapshot and 'report' updates) instead of the queue
+        self.on_report = None
 
     def put(self, item, block=False, timeout=None):
         """Place the given item on the internal q."""
@@ -54,29 +61,18 @@ class HitBTCConnector(WebSocketConnectorThread):
         if not self.silent:
             print(msg)
 
-    def _start_timers(self):
-        """Reset and start timers for API connection."""
-        self._stop_timers()
-
-        # Automatically reconnect if we didnt receive data
-        self.connection_timer = Timer(self.connection_timeout,
-                                      self._connection_timed_out)
-        self.connection_timer.start()
-
-    def _stop_timers(self):
-        """Stop connection timer."""
-        if self.connection_timer:
-            self.connection_timer.cancel()
-
     def _on_message(self, ws, message):
         """Handle and pass received data to the appropriate handlers."""
 
+        # the connection timeout only covers the opening of the socket, a quiet subscription is not torn down
         self._stop_timer()
         if not self.raw:
-            decoded_message = json.loads(message)
+            decoded_message = loads(message)
             if 'jsonrpc' in decoded_message:
                 if 'result' in decoded_message or 'error' in decoded_message:
                     self._handle_response(decoded_message)
+                elif self.on_report is not None and decoded_message.get('method') in ('activeOrders', 'report'):
+                    self.on_report(decoded_message['method'], decoded_message['params'])
                 else:
                     try:
                         method = decoded_message['method']
@@ -113,6 +109,12 @@ class HitBTCConnector(WebSocketConnectorThread):
             log.error("Could not find Request relating to Response object %s", response)
             raise
 
+        if request['method'] == 'login':
+            self.logged_in = 'result' in response
+
+        if self.on_response is not None and self.on_response(request, response):
+            return
+
         if 'result' in response:
             self.put(('Response', 'Success', (request, response)))
         elif 'error' in response:
@@ -145,18 +147,30 @@ class HitBTCConnector(WebSocketConnectorThread):
         :param method: JSONRPC method to call
         :param custom_id: custom ID to identify response messages relating to this request
         :param kwargs: payload parameters as key=value pairs
+        :return: True if the payload was sent
         """
         if not self._is_connected:
             self.echo("Cannot Send payload - Connection not established!")
-            return
+            return False
         payload = {'method': method, 'params': params, 'id': custom_id or int(10000 * time.time())}
         if not self.raw:
             self.requests[payload['id']] = payload
         self.log.debug("Sending: %s", payload)
-        self.conn.send(json.dumps(payload))
+        try:
+            self.conn.send(json.dumps(payload))
+        except Exception as e:
+            self.requests.pop(payload['id'], None)
+            self.log.error("Cannot Send payload - %s", e)
+            return False
+        return True
 
     def authenticate(self, key, secret, basic=False, custom_nonce=None):
-        """Login to the HitBTC Websocket API using the given public and secret API keys."""
+        """Login to the HitBTC Websocket API using the given public and secret API keys.
+
+        The credentials are kept to login again each time the connection is re-opened.
+        """
+        self.credentials = (key, secret, basic)
+        self.logged_in = False
         if basic:
             algo = 'BASIC'
             skey = secret
@@ -175,3 +189,14 @@ class HitBTCConnector(WebSocketConnectorThread):
 
 
 
+
+    def _on_open(self, ws):
+        """Login again on the new connection if the client had logged in."""
+        super(HitBTCConnector, self)._on_open(ws)
+        if self.credentials is not None:
+            self.authenticate(*self.credentials)
+
+    def _on_close(self, ws, *args):
+        """The session ends with the connection."""
+        self.logged_in = False
+        super(HitBTCConnector, self)._on_close(ws, *args)
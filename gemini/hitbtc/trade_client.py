@@ -11,13 +11,15 @@ API Documentation:
  * Trade API v2 (https://github.com/hitbtc-com/hitbtc-api/blob/master/APIv2.md)
 '''
 import json
-import requests
 import datetime
 import hashlib
 import hmac
 import random
 import string
 import time
+
+from ..codec import loads, response_json
+from ..sessions import get_session, request
 import http.client
 import urllib.parse
 import urllib.request
@@ -28,44 +30,45 @@ class public_api(object):
     def __init__(self):
         self.url = 'http://api.hitbtc.com'
         self.conn = http.client.HTTPSConnection('api.hitbtc.com')
+        self.session = get_session('HITBTC')
 
     # function to return serv time
     def time(self):
-        response = requests.get(self.url + "/api/1/public/time")
+        response = self.session.get(self.url + "/api/1/public/time")
         # print(response.content)
-        return response.json()
+        return response_json(response)
 
     def symbols(self):
-        response = requests.get(self.url + "/api/1/public/symbols")
+        response = self.session.get(self.url + "/api/1/public/symbols")
         print(response.content)
-        return response.json()
+        return response_json(response)
 
     # function to return ticker information
     # @pair = Trading symbol (e.g. ETHUSD)
     def ticker(self, tpair):
-        response = requests.get(self.url + "/api/1/public/" + tpair + "/ticker")
+        response = self.session.get(self.url + "/api/1/public/" + tpair + "/ticker")
         #print(response.content)
-        return response.json()
+        return response_json(response)
 
     # function to return all ticker information
     def tickers(self):
-        response = requests.get(self.url + "/api/1/public/ticker")
+        response = self.session.get(self.url + "/api/1/public/ticker")
         #print(response.content)
-        return response.json()
+        return response_json(response)
 
     # function to return orderbook
     # @pair = Trading symbol (e.g. ETHUSD)
     def orderbook(self, tpair):
-        response = requests.get(self.url + "/api/1/public/" + tpair + "/orderbook")
+        response = self.session.get(self.url + "/api/1/public/" + tpair + "/orderbook")
         #print(response.content)
-        return response.json()
+        return response_json(response)
 
     # function to get lasts trades
     # @pair = Trading symbol (e.g. ETHUSD)
     def trades(self, tpair):
-        response = requests.get(self.url + "/api/1/public/" + tpair + "/trades")
+        response = self.session.get(self.url + "/api/1/public/" + tpair + "/trades")
         #print(response.content)
-        return response.json()
+        return response_json(response)
 
 
 # class trade api from hitBtc
@@ -75,6 +78,7 @@ class trade_api:
         self.secret = apiSecret
         self.nonce = self.rand()
         self.url = "https://api.hitbtc.com"
+        self.session = get_session('HITBTC')
 
     # function to create a unique value
     def rand(self):
@@ -82,41 +86,64 @@ class trade_api:
 
     #function return balance from all coins
     def balance(self):
-        response = requests.get(self.url+'/api/2/trading/balance', auth=(self.key, self.secret))
+        response = self.session.get(self.url+'/api/2/trading/balance', auth=(self.key, self.secret))
         #print(r.json())
-        return response.json()
+        return response_json(response)
 
     #function to set new order
     #@pair = Trading symbol
     #@transaction = tipe of transaction (sell or buy)
     #@price = trade price
     #@quantity = trade quantity
-    def new_order(self,tpair,transaction, quantity, price):
-        orderData = {'symbol': tpair, 'side': transaction.lower(), 'quantity': quantity, 'price': price }
-        response = requests.post(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+    def new_order(self,tpair,transaction, quantity, price, time_in_force='GTC'):
+        orderData = {'symbol': tpair, 'side': transaction.lower(), 'quantity': quantity, 'price': price, 'timeInForce': time_in_force }
+        response = self.session.post(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
         #print(r.json())
-        return response.json()
+        return response_json(response)
 
     #function to cancel orders
     #@pair = Trading symbol
     def cancel_orders(self, tpair=None):
         orderData = {'symbol': tpair}
-        response = requests.delete(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+        response = self.session.delete(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
         #print(r.json())
-        return response.json()
+        return response_json(response)
 
     #function to cancel an order
     #@pair = Trading symbol
     def cancel_order(self, order_id):
         orderData = {'id': order_id}
-        response = requests.delete(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+        response = self.session.delete(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
         #print(r.json())
-        return response.json()
+        return response_json(response)
+
+    #non-blocking new_order, to be awaited from the event loop
+    async def new_order_async(self, tpair, transaction, quantity, price, time_in_force='GTC'):
+        orderData = {'symbol': tpair, 'side': transaction.lower(), 'quantity': quantity, 'price': price, 'timeInForce': time_in_force }
+        status, content = await request('HITBTC', 'post', self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+        return loads(content)
+
+    #non-blocking cancel_order, to be awaited from the event loop
+    async def cancel_order_async(self, order_id):
+        orderData = {'id': order_id}
+        status, content = await request('HITBTC', 'delete', self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+        return loads(content)
+
+    #non-blocking lookup of an order by its client order id, active or closed. None if the exchange does not know it
+    async def get_order_async(self, client_order_id):
+        status, content = await request('HITBTC', 'get', self.url+'/api/2/order/'+client_order_id, auth=(self.key, self.secret))
+        order = loads(content)
+        if 'error' not in order:
+            return order
+        orderData = {'clientOrderId': client_order_id}
+        status, content = await request('HITBTC', 'get', self.url+'/api/2/history/order', params = orderData, auth=(self.key, self.secret))
+        orders = loads(content)
+        return orders[0] if isinstance(orders, list) and len(orders) > 0 else None
 
     #function to cancel orders
     #@pair = Trading symbol
     def active_orders(self, tpair=None):
         orderData = {'symbol': tpair}
-        response = requests.get(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
+        response = self.session.get(self.url+'/api/2/order', data = orderData, auth=(self.key, self.secret))
         #print(r.json())
-        return response.json()
+        return response_json(response)
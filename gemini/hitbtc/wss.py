@@ -5,7 +5,7 @@
 # Import Built-Ins
 import logging
 from queue import Queue
-from threading import Thread, Timer
+from threading import Thread
 import multiprocessing as mp
 
 import json
@@ -16,6 +16,8 @@ import ssl
 import websocket
 
 # Import home-grown
+from ..watchdog import watchdog
+from ..codec import loads
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
@@ -66,9 +68,10 @@ class WebSocketConnector:
         # Set up history of sent commands for re-subscription
         self.history = []
 
-        # Tracks Websocket Connection
-        self.connection_timer = None
+        # Tracks Websocket Connection, checked by the shared watchdog thread
         self.connection_timeout = timeout if timeout else 10
+        self.connection_timer = watchdog.watch(self.connection_timeout,
+                                               self._connection_timed_out)
 
         # Tracks responses from send_ping()
         self.pong_timer = None
@@ -148,13 +151,11 @@ class WebSocketConnector:
         :param message: received data as bytes
         :return:
         """
-        self._stop_timer()
-
         raw, received_at = message, time.time()
 
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
+            data = loads(raw)
+        except ValueError as e:
             # Something wrong with this data, log and discard
             self.log.exception("Exception %s for data %s; Discarding..", e, raw)
             return
@@ -210,18 +211,12 @@ class WebSocketConnector:
 
     def _stop_timer(self):
         """Stop connection timer."""
-
-        if self.connection_timer:
-            self.connection_timer.cancel()
+        self.connection_timer.cancel()
 
     def _start_timer(self):
         """Reset and start timer for API connection."""
-        self._stop_timer()
-
         # Automatically reconnect if we didnt receive data
-        self.connection_timer = Timer(self.connection_timeout,
-                                      self._connection_timed_out)
-        self.connection_timer.start()
+        self.connection_timer.touch()
 
     def send(self, data):
         """Send the given Payload to the API via the websocket connection.
@@ -4,10 +4,13 @@ from .hitbtc.trade_client import trade_api, public_api
 from .hitbtc.client import HitBTC
 from .hitbtc.connector import log as hitbtc_logger
 from .order import Order
+from .orderbook import OrderBook, IncrementalOrderBook
 from .logger import Logger as log
 from . import config
-import time, queue, copy, threading, _thread, logging, uuid
-from sortedcontainers import SortedDict
+from .sessions import warm_up
+from .pending import PendingRequests, OrderNotSent
+import time, queue, threading, _thread, logging, uuid, asyncio
+from functools import partial
 
 class HitbtcErrorHandler(logging.StreamHandler):
     """
@@ -42,21 +45,30 @@ class Hitbtc(Exchange):
     all_pairs = ("eth_btc", "xrp_btc", "ltc_btc", "xvg_btc", "trx_btc", "dash_btc", "neo_btc", "eos_btc", "xmr_btc",
                             "xrp_eth", "ltc_eth", "xvg_eth", "trx_eth", "dash_eth", "neo_eth", "eos_eth", "xmr_eth",
       "btc_usdt","eth_usdt","xrp_usdt",           "xvg_usdt",                       "neo_usdt") # "ltc_usdt","dash_usdt","trx_usdt" ,"eos_usdt","xmr_usdt"
+    time_in_force_modes = ('GTC', 'IOC', 'FOK')
 
     def __init__(self, keyfile, loop, has_error):
         super(Hitbtc, self).__init__(Hitbtc.all_pairs, keyfile, loop, has_error)
         self.stop_updatebook_thread = False
-        self.updatelock = threading.Lock()
         self.exitlock = threading.Lock()
         self.xchg_logger = hitbtc_logger
         self.xchg_logger.addHandler(HitbtcErrorHandler(self))
         self.trade_api = None
         self.public_rest_api = public_api()
+        self.pending_orders = None # orders sent over the websocket, by client order id
+        self.client_order_ids = {}
         if self.keyhandler is not None:
             key = list(self.keyhandler.getKeys())[0]
             secret = self.keyhandler.getSecret(key)
             self.public_api = HitBTC(key=key, secret=secret)
             self.trade_api = trade_api(key, secret)
+            warm_up('HITBTC', self.trade_api.url + '/api/2/public/symbol')
+            if 'HITBTC' in config.WEBSOCKET_ORDER_ENTRY:
+                self.pending_orders = PendingRequests()
+            if 'HITBTC' in config.USER_DATA_STREAMS:
+                self.user_stream = True
+                self.public_api.conn.on_report = self.on_report
+            self.public_api.conn.on_response = self.on_response
         else:
             self.public_api = HitBTC()
         self.name = 'HITBTC'
@@ -82,50 +94,36 @@ class Hitbtc(Exchange):
                 if pairstr not in self.trading_pairs:
                     continue
                 if book[0] == "snapshotOrderbook":
-                    bids = [{'price':float(bid['price']),'size':float(bid['size'])} for bid in book[2]['bid']]
-                    asks = [{'price':float(ask['price']),'size':float(ask['size'])} for ask in book[2]['ask']]
-                    with self.updatelock:
-                        self.depths[pairstr]['bids'] = [Order(bid['price'], bid['size']) for bid in bids][:10]
-                        self.depths[pairstr]['asks'] = [Order(ask['price'], ask['size']) for ask in asks][:10]
-                        self.indexed_depths[pairstr]['bids'] = SortedDict({order.p: order for order in self.depths[pairstr]['bids']})
-                        self.indexed_depths[pairstr]['asks'] = SortedDict({order.p: order for order in self.depths[pairstr]['asks']})
+                    self.indexed_depths[pairstr].reset(((float(bid['price']), float(bid['size'])) for bid in book[2]['bid']),
+                                                       ((float(ask['price']), float(ask['size'])) for ask in book[2]['ask']))
                 elif book[0] == "updateOrderbook":
+                    indexed_depth = self.indexed_depths[pairstr]
                     for bid in book[2]['bid']:
-                        bid_price = float(bid['price'])
                         bid_size = float(bid['size'])
-                        if bid_size < config.MIN_ORDERBOOK_VOLUME:
-                            self.indexed_depths[pairstr]['bids'].pop(bid_price, None)
-                        else:
-                            self.indexed_depths[pairstr]['bids'][bid_price] = Order(bid_price,bid_size)
+                        indexed_depth.update_bid(float(bid['price']), bid_size if bid_size >= config.MIN_ORDERBOOK_VOLUME else 0)
                     for ask in book[2]['ask']:
-                        ask_price = float(ask['price'])
                         ask_size = float(ask['size'])
-                        if ask_size < config.MIN_ORDERBOOK_VOLUME:
-                            self.indexed_depths[pairstr]['asks'].pop(ask_price, None)
-                        else:
-                            self.indexed_depths[pairstr]['asks'][ask_price] = Order(ask_price,ask_size)
+                        indexed_depth.update_ask(float(ask['price']), ask_size if ask_size >= config.MIN_ORDERBOOK_VOLUME else 0)
                 else:
                     err = "HitBTC unknown update %s" % (str(book[0]),)
                     log.error(err)
                     raise RuntimeError(err)
-                with self.updatelock:
-                    self.depths[pairstr]['bids'] = list(reversed(self.indexed_depths[pairstr]['bids'].values()))[:10]
-                    self.depths[pairstr]['asks'] = list(self.indexed_depths[pairstr]['asks'].values())[:10]
+                if not self.indexed_depths[pairstr].changed:
+                    continue
+                self.publish_depth(pairstr, self.indexed_depths[pairstr].publish())
 
     def get_depth(self, base, alt):
         if self.stop_updatebook_thread:
-            return {'bids':[], 'asks':[]}
+            return OrderBook()
         pairstr = self.format_pair((base, alt))
-        with self.updatelock:
-            if pairstr not in self.depths:
-                return {'bids':[], 'asks':[]}
-            bids = self.depths[pairstr]['bids']
-            asks = self.depths[pairstr]['asks']
-            # DEBUG - show best bid ask for each ccy pair
-            if self.init and len(self.depths[pairstr]['bids']) > 0 and len(self.depths[pairstr]['asks']) > 0 and pairstr == 'XRPBTC':
-                self.init = False
-                log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, self.depths[pairstr]['bids'][0].p, self.depths[pairstr]['asks'][0].p))
-            return copy.copy(self.depths[pairstr])
+        book = self.depths.get(pairstr)
+        if book is None:
+            return OrderBook()
+        # DEBUG - show best bid ask for each ccy pair
+        if self.init and not book.is_empty() and pairstr == 'XRPBTC':
+            self.init = False
+            log.info("%s %s Highest bid: %.8g, Lowest ask: %.8g" % (self.name, pairstr, book.best_bid(), book.best_ask()))
+        return book
 
     def get_ticker(self):
         tickers = {}
@@ -143,15 +141,149 @@ class Hitbtc(Exchange):
 
     def submit_order(self, pair, side, price, volume):
         pairstr = self.format_pair(pair)
+        time_in_force = self.get_time_in_force()
         order = None
         if side == "SELL":
-            order = self.trade_api.new_order(pairstr, "Sell", volume, price)
+            order = self.trade_api.new_order(pairstr, "Sell", volume, price, time_in_force)
         elif side == "BUY":
-            order = self.trade_api.new_order(pairstr, "Buy", volume, price)
+            order = self.trade_api.new_order(pairstr, "Buy", volume, price, time_in_force)
         else:
             raise RuntimeError("Unsupported order type: %s" % (side,))
         self.log_order(side, order)
-        return Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+        return self.make_order(order, pair, side, price, volume, time_in_force)
+
+    async def submit_order_async(self, pair, side, price, volume):
+        if self.pending_orders is not None:
+            try:
+                return await self.submit_order_ws(pair, side, price, volume)
+            except OrderNotSent as e:
+                log.warning('%s websocket order entry unavailable, sending the order through REST: %s' % (self.name, str(e)))
+        pairstr = self.format_pair(pair)
+        time_in_force = self.get_time_in_force()
+        order = None
+        if side == "SELL":
+            order = await self.trade_api.new_order_async(pairstr, "Sell", volume, price, time_in_force)
+        elif side == "BUY":
+            order = await self.trade_api.new_order_async(pairstr, "Buy", volume, price, time_in_force)
+        else:
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        self.log_order(side, order)
+        return self.make_order(order, pair, side, price, volume, time_in_force)
+
+    async def submit_order_ws(self, pair, side, price, volume):
+        if side not in ("SELL", "BUY"):
+            raise RuntimeError("Unsupported order type: %s" % (side,))
+        if not self.public_api.conn.logged_in:
+            raise OrderNotSent('not logged in')
+        time_in_force = self.get_time_in_force()
+        client_id = uuid.uuid4().hex
+        future = self.pending_orders.add(client_id)
+        if not self.public_api.place_order(custom_id=client_id, clientOrderId=client_id, symbol=self.format_pair(pair), side=side.lower(),
+                                           type='limit', timeInForce=time_in_force, quantity=str(volume), price=str(price)):
+            self.pending_orders.discard(client_id)
+            raise OrderNotSent('websocket disconnected')
+        try:
+            order = await self.pending_orders.wait(client_id, future)
+        except asyncio.TimeoutError:
+            # the order may be live: it is booked when its response or its report arrives, or now if the REST api knows it
+            self.pending_orders.keep(client_id, partial(self.on_late_order, client_id, pair, side, price, volume, time_in_force))
+            order = await self.find_order_async(client_id)
+            if order is None or not self.pending_orders.forget(client_id):
+                raise
+        return self.accept_order(client_id, order, pair, side, price, volume, time_in_force)
+
+    def accept_order(self, client_id, order, pair, side, price, volume, time_in_force):
+        self.log_order(side, order)
+        new_order = self.make_order(order, pair, side, price, volume, time_in_force)
+        if new_order.executed is None:
+            self.client_order_ids[str(order['id'])] = client_id
+        return new_order
+
+    async def find_order_async(self, client_id):
+        try:
+            return await self.trade_api.get_order_async(client_id)
+        except Exception as e:
+            log.warning('%s order %s lookup failed: %s' % (self.name, client_id, str(e)))
+        return None
+
+    def on_late_order(self, client_id, pair, side, price, volume, time_in_force, order):
+        # called from the websocket thread with the response or the report of an order which timed out
+        self.publish_late_order(self.accept_order(client_id, order, pair, side, price, volume, time_in_force), pair, side, price, volume)
+
+    def make_order(self, order, pair, side, price, volume, time_in_force):
+        # the execution reports of the REST and websocket apis carry the executed quantity, the IOC and FOK orders are closed once reported
+        new_order = Order(orderID=order['id'], price=price, volume=volume, type=side, pair=pair)
+        if time_in_force != 'GTC':
+            new_order.executed = float(order['cumQuantity'])
+        return new_order
+
+    def on_response(self, request, response):
+        # called from the websocket thread, returns True if the response is consumed
+        if request['method'] == 'login':
+            if self.user_stream and 'result' in response:
+                # the reports start with the snapshot of the active orders
+                self.public_api.subscribe_reports()
+                self.public_api.request_balance()
+            return False
+        if request['method'] == 'getTradingBalance':
+            for balance in response.get('result', []):
+                self.publish_balance('USDT' if balance['currency'].upper() == 'USD' else balance['currency'].upper(), float(balance['available']))
+            return True
+        if self.pending_orders is not None:
+            return self.on_order_response(request, response)
+        return False
+
+    def on_report(self, method, params):
+        # called from the websocket thread with the order reports, the balances are requested again after each execution report
+        orders = params if method == 'activeOrders' else [params]
+        orders = [Order(orderID=order['id'],
+                        price=float(order['price']),
+                        volume=float(order['quantity']) - float(order['cumQuantity']),
+                        type=order['side'].upper(),
+                        pair=self.pair_from_symbol(order['symbol'])) for order in orders]
+        if method == 'activeOrders':
+            self.publish_orders(orders)
+        else:
+            if self.pending_orders is not None:
+                self.pending_orders.resolve_late(params.get('clientOrderId'), params)
+            is_open = params['status'] in ('new', 'suspended', 'partiallyFilled')
+            if not is_open:
+                self.client_order_ids.pop(orders[0].id, None)
+            self.publish_order(orders[0], is_open)
+            self.public_api.request_balance()
+
+    def has_user_stream(self):
+        return self.user_stream and self.public_api.conn.logged_in
+
+    def replace_order(self, order, price, volume):
+        # called from the controller threads, the order is sent from the scheduler event loop
+        client_order_id = self.client_order_ids.get(order.id)
+        if self.pending_orders is None or client_order_id is None or not self.public_api.conn.logged_in:
+            return None
+        return self.run_order_request(self.replace_order_ws(order, client_order_id, price, volume))
+
+    async def replace_order_ws(self, order, client_order_id, price, volume):
+        client_id = uuid.uuid4().hex
+        future = self.pending_orders.add(client_id)
+        if not self.public_api.replace_order(custom_id=client_id, clientOrderId=client_order_id, requestClientId=client_id,
+                                             quantity=str(volume), price=str(price)):
+            self.pending_orders.discard(client_id)
+            return None
+        new_order = await self.pending_orders.wait(client_id, future)
+        self.log_order(order.type, new_order)
+        self.client_order_ids.pop(order.id, None)
+        self.client_order_ids[str(new_order['id'])] = client_id
+        return Order(orderID=new_order['id'], price=price, volume=volume, type=order.type, pair=order.pair)
+
+    def on_order_response(self, request, response):
+        # called from the websocket thread, the order responses carry the client order id of their request
+        if request['method'] not in ('newOrder', 'cancelOrder', 'cancelReplaceOrder'):
+            return False
+        if 'result' in response:
+            self.pending_orders.resolve(request['id'], response['result'])
+        else:
+            self.pending_orders.resolve(request['id'], error=RuntimeError("{code} - {message} - {description}".format(**response['error'])))
+        return True
 
     def query_active_orders(self):
         return [Order(orderID=order['id'],
@@ -167,12 +299,31 @@ class Hitbtc(Exchange):
             for order in orders:
                 self.trade_api.cancel_order(order.id)
 
+    async def cancel_orders_async(self, orders = None):
+        if orders is None:
+            await super(Hitbtc, self).cancel_orders_async(orders)
+        else:
+            await asyncio.gather(*[self.cancel_order_async(order) for order in orders])
+
+    async def cancel_order_async(self, order):
+        client_order_id = self.client_order_ids.pop(order.id, None)
+        if self.pending_orders is not None and client_order_id is not None and self.public_api.conn.logged_in:
+            client_id = uuid.uuid4().hex
+            future = self.pending_orders.add(client_id)
+            if self.public_api.cancel_order(custom_id=client_id, clientOrderId=client_order_id):
+                return await self.pending_orders.wait(client_id, future)
+            self.pending_orders.discard(client_id)
+        return await self.trade_api.cancel_order_async(order.id)
+
     def start(self):
         self.public_api.start()  # start the websocket connection
+        if self.pending_orders is not None or self.user_stream:
+            self.public_api.login()  # the connector logs in again on each new connection
 
     def stop(self):
         self.stop_updatebook_thread = True
         self.public_api.stop()
+        self.invalidate_depths()
         log.info("Closed Hitbtc websocket")
 
     def reconnect(self):
@@ -184,6 +335,7 @@ class Hitbtc(Exchange):
                 continue
             pairstr = self.format_pair(pair)
             self.trading_pairs = self.trading_pairs + [pairstr]
-            self.depths[pairstr] = {'bids': [], 'asks': []}
-            self.indexed_depths[pairstr] = {'bids': {}, 'asks': {}}
-            self.public_api.subscribe_book(symbol=pairstr)
\ No newline at end of file
+            self.depths[pairstr] = OrderBook()
+            self.indexed_depths[pairstr] = IncrementalOrderBook(config.ORDERBOOK_DEPTH)
+            self.public_api.subscribe_book(symbol=pairstr)
+        self.invalidate_depths()
\ No newline at end of file
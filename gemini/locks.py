@@ -0,0 +1,41 @@
+# locking of the balances a trade touches, the arbitrages on disjoint balances execute in parallel
+from contextlib import contextmanager
+import threading
+
+class BalanceLocks(object):
+    '''
+    one lock per (exchange, currency) balance. the locks of a trade are taken in the order of their keys,
+    so two trades sharing some balances wait for each other without deadlocking
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+        self.nb_acquired = 0
+        self.nb_contended = 0 # acquisitions which waited for another trade
+
+    def get_locks(self, keys):
+        with self.lock:
+            return [self.locks.setdefault(key, threading.Lock()) for key in sorted(set(keys))]
+
+    @contextmanager
+    def hold(self, keys):
+        locks = self.get_locks(keys)
+        contended = False
+        acquired = []
+        try:
+            for lock in locks:
+                if not lock.acquire(blocking=False):
+                    contended = True
+                    lock.acquire()
+                acquired.append(lock)
+            with self.lock:
+                self.nb_acquired += 1
+                self.nb_contended += contended
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def get_usage(self):
+        with self.lock:
+            return {'locks': len(self.locks), 'acquired': self.nb_acquired, 'contended': self.nb_contended}
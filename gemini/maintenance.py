@@ -0,0 +1,96 @@
+# background scheduler of the REST maintenance jobs, the trading thread never waits for them
+from .logger import Logger as log
+import threading, time, traceback
+
+class MaintenanceScheduler(object):
+    '''
+    runs the balance refresh, the active orders polling and the order book validation of each exchange on its own cadence.
+    an exchange has at most one job running, on the maintenance lane of its executor, so a slow REST api only delays its own
+    maintenance. the controllers publish the results under the balance locks, then on_update(controller, job) notifies the trading scheduler
+    '''
+    JOBS = ('BALANCES', 'ORDERS', 'BOOKCHECK') # by priority when several jobs of an exchange are due
+
+    def __init__(self, config, controllers, pairs, on_update, executors):
+        self.config = config
+        self.controllers = controllers
+        self.pairs = pairs # tradeable pairs by controller
+        self.on_update = on_update
+        self.executors = executors # ExchangeExecutors of the scheduler
+        self.lock = threading.Lock()
+        self.running = {} # job queued or running by controller
+        self.last_runs = {} # start time of the last run by (controller, job)
+        self.stats = {} # number of runs, cumulated time and longest time by job
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='maintenance', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.submit_due_jobs(time.time())
+            self.stop_event.wait(self.config.MAINTENANCE_POLL_TIME)
+
+    def get_interval(self, controller, job):
+        # the balances pushed by the user data streams are only reconciled with the REST api
+        if job == 'BALANCES' and controller.xchg.has_user_stream():
+            job = 'RECONCILIATION'
+        return self.config.MAINTENANCE_INTERVALS[job]
+
+    def get_due_job(self, controller, now):
+        for job in self.JOBS:
+            last_run = self.last_runs.get((controller, job))
+            if last_run is None or now - last_run >= self.get_interval(controller, job):
+                return job
+        return None
+
+    def submit_due_jobs(self, now):
+        with self.lock:
+            for controller in self.controllers:
+                if controller in self.running:
+                    continue
+                job = self.get_due_job(controller, now)
+                if job is None:
+                    continue
+                self.running[controller] = job
+                self.last_runs[(controller, job)] = now
+                self.executors.get(controller.xchg.name).submit('MAINTENANCE', self.run_job, controller, job)
+
+    def run_job(self, controller, job):
+        start = time.time()
+        done = False
+        try:
+            if job == 'BALANCES':
+                controller.update_all_balances(None, None)
+            elif job == 'ORDERS':
+                controller.query_active_orders(None, None)
+            else:
+                tickers = {}
+                controller.get_tickers(None, None, tickers)
+                for pair in self.pairs[controller]:
+                    controller.validate_order_book(None, None, pair, tickers)
+            done = True
+        except Exception as exc:
+            log.error('%s %s maintenance failed: %s' % (controller.xchg.name, job, traceback.format_exc()))
+        finally:
+            elapsed = time.time() - start
+            with self.lock:
+                del self.running[controller]
+                stats = self.stats.setdefault(job, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+        # the exchange is free for its next job once the trading scheduler is notified
+        if done:
+            self.on_update(controller, job)
+
+    def get_timings(self):
+        with self.lock:
+            return {job: {'runs': runs, 'average_ms': round(total * 1000 / runs, 1), 'max_ms': round(longest * 1000, 1)}
+                    for job, (runs, total, longest) in self.stats.items()}
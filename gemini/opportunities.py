@@ -0,0 +1,67 @@
+# cross-pair collection of the arbitrage opportunities of a tick, the most profitable are executed first
+from .logger import Logger as log
+import threading
+
+class Opportunity(object):
+    __slots__ = ('pair', 'bidder', 'asker', 'profit_obj', 'value')
+
+    def __init__(self, pair, bidder, asker, profit_obj, value):
+        self.pair = pair
+        self.bidder = bidder # controller selling the base currency
+        self.asker = asker # controller buying the base currency
+        self.profit_obj = profit_obj
+        self.value = value # profit in BTC, to rank the opportunities of pairs with different alt currencies
+
+class OpportunityQueue(object):
+    '''
+    collects the opportunities of all the pairs from the calculation threads, then accepts them greedily by decreasing profit
+    against a snapshot of the controller balances, so the accepted trades never oversubscribe the same funds
+    '''
+    def __init__(self, rates):
+        self.rates = rates # value in BTC of one unit of each alt currency, None when unknown
+        self.lock = threading.Lock()
+        self.opportunities = []
+        self.deferred = [] # opportunities skipped by allocate because one of their exchanges had active orders
+
+    def add(self, pair, bidder, asker, profit_obj):
+        rate = self.rates.get(pair[1])
+        value = profit_obj["profit"] * rate if rate is not None else 0.0
+        with self.lock:
+            self.opportunities.append(Opportunity(pair, bidder, asker, profit_obj, value))
+
+    def rank(self):
+        with self.lock:
+            return sorted(self.opportunities, key=lambda opportunity: (opportunity.value, opportunity.profit_obj["profit_pct"]), reverse=True)
+
+    def allocate(self, controllers):
+        '''
+        returns the opportunities to execute, the best first. an opportunity is skipped when one of its exchanges has active orders,
+        when the order book of one of its legs is already used by a better opportunity, or when the balances left cannot fund it
+        '''
+        # the user data streams update the balances from the websocket threads, they are copied before they are iterated
+        balances = {(controller.xchg.name, ccy): balance for controller in controllers for ccy, balance in dict(controller.balances).items()}
+        busy = {}
+        books = set()
+        accepted = []
+        for opportunity in self.rank():
+            (base, alt), bidder, asker = opportunity.pair, opportunity.bidder, opportunity.asker
+            for controller in (bidder, asker):
+                if controller not in busy:
+                    busy[controller] = controller.check_active_orders()
+            if busy[bidder] or busy[asker]:
+                self.deferred.append(opportunity)
+                continue
+            legs = ((bidder.xchg.name, opportunity.pair), (asker.xchg.name, opportunity.pair))
+            if legs[0] in books or legs[1] in books:
+                continue
+            bidder_order, asker_order = opportunity.profit_obj["bidder_order"], opportunity.profit_obj["asker_order"]
+            sell = (bidder.xchg.name, base), bidder_order.v
+            buy = (asker.xchg.name, alt), asker_order.p * asker_order.v
+            if balances.get(sell[0], 0.0) < sell[1] or balances.get(buy[0], 0.0) < buy[1]:
+                log.info('%s/%s opportunity between %s and %s skipped, the funds are allocated to better opportunities' % (base, alt, bidder.xchg.name, asker.xchg.name))
+                continue
+            balances[sell[0]] -= sell[1]
+            balances[buy[0]] -= buy[1]
+            books.update(legs)
+            accepted.append(opportunity)
+        return accepted
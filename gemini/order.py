@@ -2,6 +2,8 @@
 # very simple data structure!
 
 class Order(object):
+    __slots__ = ('p', 'v', 'type', 'pair', 'id', 'time', 'sent_time', 'ack_time', 'executed')
+
     def __init__(self, price, volume, type=None, pair=None, orderID=None, timestamp=None):
         """
         markets are usually expressed in terms of BASE_ALT where you buy
@@ -16,6 +18,9 @@ class Order(object):
         self.pair = (pair[0].upper(), pair[1].upper()) if pair is not None else None # market we are trading on
         self.id = str(orderID) if orderID is not None else None
         self.time = timestamp
+        self.sent_time = None # when the order was sent to the exchange
+        self.ack_time = None # when the exchange acknowledged it
+        self.executed = None # executed volume of an immediate-or-cancel or fill-or-kill order, closed once acknowledged
 
     def __str__(self):
         return self.type + " " + str(self.v) + self.pair[0] + " at " + str(self.p) + self.pair[1] + ", ID: " + str(self.id)
@@ -0,0 +1,162 @@
+# compact order book representation
+# prices and volumes are stored in contiguous arrays, best level first
+
+from .order import Order
+from array import array
+from itertools import islice
+from sortedcontainers import SortedDict
+
+class BookSide(object):
+    """
+    one side (bids or asks) of an order book
+    """
+    __slots__ = ('prices', 'volumes')
+
+    def __init__(self, prices=None, volumes=None):
+        self.prices = prices if prices is not None else array('d')
+        self.volumes = volumes if volumes is not None else array('d')
+
+    def from_levels(levels, depth=None):
+        """
+        levels = iterable of (price, volume), best level first. prices and volumes can be strings
+        depth = maximum number of levels to keep
+        """
+        side = BookSide()
+        for price, volume in (levels if depth is None else islice(levels, depth)):
+            side.prices.append(float(price))
+            side.volumes.append(float(volume))
+        return side
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __getitem__(self, idx):
+        # list of orders compatibility, allocates new Order objects
+        if isinstance(idx, slice):
+            return [Order(price, volume) for price, volume in zip(self.prices[idx], self.volumes[idx])]
+        return Order(self.prices[idx], self.volumes[idx])
+
+    def __iter__(self):
+        for price, volume in zip(self.prices, self.volumes):
+            yield Order(price, volume)
+
+    def best_price(self):
+        return self.prices[0] if len(self.prices) > 0 else None
+
+    def top(self, n):
+        return BookSide(self.prices[:n], self.volumes[:n])
+
+    def min_volume_level(self, min_volume):
+        """
+        returns (price, cumulative volume) of the first level where the cumulative volume reaches min_volume,
+        or of the last level if the whole side does not reach it. (0, 0) for an empty side
+        """
+        price, cumulated = 0.0, 0.0
+        for price, volume in zip(self.prices, self.volumes):
+            cumulated += volume
+            if cumulated >= min_volume:
+                break
+        return price, cumulated
+
+class OrderBook(object):
+    """
+    bids sorted by decreasing price, asks by increasing price
+    book['bids'] and book['asks'] are still supported for the former dict of lists of orders layout
+    published books are immutable snapshots, stamped with the exchange book version and receive time
+    """
+    __slots__ = ('bids', 'asks', 'version', 'timestamp')
+
+    def __init__(self, bids=None, asks=None, version=0, timestamp=None):
+        self.bids = bids if bids is not None else BookSide()
+        self.asks = asks if asks is not None else BookSide()
+        self.version = version
+        self.timestamp = timestamp
+
+    def from_levels(bids, asks, depth=None):
+        return OrderBook(BookSide.from_levels(bids, depth), BookSide.from_levels(asks, depth))
+
+    def from_depth(depth):
+        """
+        converts a {'bids': [Order], 'asks': [Order]} dict, books are returned as is
+        """
+        if depth is None or isinstance(depth, OrderBook):
+            return depth
+        return OrderBook.from_levels([(o.p, o.v) for o in depth['bids']], [(o.p, o.v) for o in depth['asks']])
+
+    def __getitem__(self, side):
+        if side == 'bids':
+            return self.bids
+        if side == 'asks':
+            return self.asks
+        raise KeyError(side)
+
+    def is_empty(self):
+        return len(self.bids.prices) == 0 or len(self.asks.prices) == 0
+
+    def best_bid(self):
+        return self.bids.best_price()
+
+    def best_ask(self):
+        return self.asks.best_price()
+
+    def top(self, n):
+        return OrderBook(self.bids.top(n), self.asks.top(n))
+
+class IncrementalOrderBook(object):
+    """
+    full depth book maintained from add/update/remove deltas in O(log n)
+    only the top depth levels are published, a new OrderBook is built only when one of them changed
+    """
+    def __init__(self, depth):
+        self.depth = depth
+        self.bids = SortedDict()
+        self.asks = SortedDict()
+        self.changed = True
+        self.book = OrderBook()
+
+    def in_top(self, levels, price, descending):
+        # rank of the price from the best level, the price has to be a key of the levels
+        idx = levels.index(price)
+        return (len(levels) - 1 - idx if descending else idx) < self.depth
+
+    def set_level(self, levels, price, volume, descending):
+        if volume > 0:
+            if price in levels and levels[price] == volume:
+                return
+            levels[price] = volume
+            if self.in_top(levels, price, descending):
+                self.changed = True
+        elif price in levels:
+            if self.in_top(levels, price, descending):
+                self.changed = True
+            del levels[price]
+
+    def update_bid(self, price, volume):
+        """
+        sets the bid volume at the given price, the level is removed if volume is 0
+        """
+        self.set_level(self.bids, price, volume, True)
+
+    def update_ask(self, price, volume):
+        self.set_level(self.asks, price, volume, False)
+
+    def remove(self, price):
+        self.set_level(self.bids, price, 0, True)
+        self.set_level(self.asks, price, 0, False)
+
+    def reset(self, bids=(), asks=()):
+        """
+        replaces the whole book with the given (price, volume) levels
+        """
+        self.bids = SortedDict(bids)
+        self.asks = SortedDict(asks)
+        self.changed = True
+
+    def publish(self):
+        """
+        returns the top of the book, rebuilt only if it changed since the last call
+        """
+        if self.changed:
+            self.book = OrderBook.from_levels(reversed(self.bids.items()), self.asks.items(), self.depth)
+            self.changed = False
+        return self.book
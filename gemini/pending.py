@@ -0,0 +1,88 @@
+# correlation of the orders sent over the websockets with their responses
+from . import config
+import asyncio, threading, time
+
+class OrderNotSent(ConnectionError):
+    '''
+    the request could not be written to the socket, it can safely be sent again through the REST api
+    '''
+    pass
+
+class PendingRequests(object):
+    '''
+    requests awaited from the event loop by client order id, resolved from the websocket threads when their response arrives
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures = {}
+        self.late = {} # callbacks of the timed out requests still expecting their response, by client order id
+
+    def add(self, client_id):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        with self.lock:
+            self.futures[client_id] = (loop, future)
+        return future
+
+    def discard(self, client_id):
+        with self.lock:
+            self.futures.pop(client_id, None)
+
+    def resolve(self, client_id, result=None, error=None):
+        '''
+        called from the websocket threads, returns False if no request is waiting for this response
+        '''
+        with self.lock:
+            entry = self.futures.pop(client_id, None)
+        if entry is None:
+            if error is not None:
+                return self.forget(client_id)
+            return self.resolve_late(client_id, result)
+        loop, future = entry
+        loop.call_soon_threadsafe(PendingRequests.set_future, future, result, error)
+        return True
+
+    def keep(self, client_id, callback):
+        '''
+        keeps a request which timed out, callback(result) is called from the websocket threads if its response or its report
+        arrives later. the requests kept for longer than WEBSOCKET_LATE_ORDER_TIMEOUT are dropped
+        '''
+        now = time.time()
+        with self.lock:
+            self.late = {key: entry for key, entry in self.late.items() if now - entry[1] < config.WEBSOCKET_LATE_ORDER_TIMEOUT}
+            self.late[client_id] = (callback, now)
+
+    def forget(self, client_id):
+        '''
+        returns False if the request is not kept anymore, its late response was already handled
+        '''
+        with self.lock:
+            return self.late.pop(client_id, None) is not None
+
+    def resolve_late(self, client_id, result):
+        '''
+        called from the websocket threads with a response or a report, returns False if no timed out request is kept for it
+        '''
+        with self.lock:
+            entry = self.late.pop(client_id, None)
+        if entry is None:
+            return False
+        entry[0](result)
+        return True
+
+    def set_future(future, result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def wait(self, client_id, future, timeout=None):
+        '''
+        returns the response of the request, raises the error it was resolved with or asyncio.TimeoutError
+        '''
+        try:
+            return await asyncio.wait_for(future, config.WEBSOCKET_ORDER_TIMEOUT if timeout is None else timeout)
+        finally:
+            self.discard(client_id)
@@ -10,16 +10,24 @@ class ProfitCalculator(object):
     class for computing a profit matrix from a given set of controllers
     and their orderbooks
     """
-    def __init__(self, controllers, pair):
+    def __init__(self, controllers, pair, matrix=None):
+        """
+        matrix = optional ProfitMatrix in which the spreads and order book checks
+        were already computed for this pair
+        """
         self.controllers = controllers
         self.pair = pair
+        self.matrix = matrix
         self.prices = {}        # maintains hi_bids and lo_asks for each controller
         self.balances = {}      # base and alt balances for each exchange
         self.profit_spread = {} # price spreads with transaction fees applied
         self.profits = {}       # actual ALT profits, accounting for balances and volumes
 
         self.update_balances()
-        self.update_profit_spread() # automatically perform calculations upon initialization
+        if matrix is None:
+            self.update_profit_spread() # automatically perform calculations upon initialization
+        else:
+            self.prices = matrix.get_prices(pair)
         self.error = False
 
     def update_profit_spread(self):
@@ -55,57 +63,72 @@ class ProfitCalculator(object):
         # 1) account needs to have sufficient balance to fill the minimum order volume
         # 2) after computing the max tradeable volume (limited by my balance),
         base, alt = self.pair
+        slug = base + "_" + alt
         success = False
         self.profits = {b.xchg.name:{a.xchg.name : None for a in self.controllers} for b in self.controllers}
+        if self.matrix is None:
+            cells = self.check_order_books()
+        elif self.pair in self.matrix.corrupted:
+            cells = None
+        else:
+            cells = self.matrix.cells.get(self.pair, [])
+        if cells is None:
+            self.error = True
+            return False
+        for bidder, asker in cells:
+            (b,a) = (bidder.xchg.name, asker.xchg.name)
+            profit_obj = self.calculate_order(bidder, bidder.get_book(slug).bids, asker, asker.get_book(slug).asks)
+            if profit_obj is not None:
+                self.profits[b][a] = profit_obj
+                success = True
+
+        return success # return True if there are any profits at all
+
+    def check_order_books(self):
+        # returns the (bidder, asker) combinations to examine, None if an order book is corrupted
+        base, alt = self.pair
+        slug = base + "_" + alt
+        cells = []
         for bidder in self.controllers:
+            bidder_book = bidder.get_book(slug)
             for asker in self.controllers:
-                slug = base + "_" + alt
-                if bidder == asker or slug not in bidder.depth or slug not in asker.depth:
+                asker_book = asker.get_book(slug)
+                if bidder == asker or bidder_book is None or asker_book is None:
                     continue
-                (b,a) = (bidder.xchg.name, asker.xchg.name)
-                spread = self.profit_spread[b][a]
-                bidder_bids = bidder.depth[slug]['bids']
-                bidder_asks = bidder.depth[slug]['asks']
-                asker_bids = asker.depth[slug]['bids']
-                asker_asks = asker.depth[slug]['asks']
-                if len(bidder_bids) == 0 or len(bidder_asks) == 0 or len(asker_bids) == 0 or len(asker_asks) == 0:
+                if bidder_book.is_empty() or asker_book.is_empty():
                     continue
+                bidder_bid, bidder_ask = bidder_book.best_bid(), bidder_book.best_ask()
+                asker_bid, asker_ask = asker_book.best_bid(), asker_book.best_ask()
                 if bidder.xchg.name in config.MAX_BIDASK_SPREAD_PCT:
                     xchg_spds = config.MAX_BIDASK_SPREAD_PCT[bidder.xchg.name]
                     max_bidask_spd = xchg_spds[slug] if slug in xchg_spds else xchg_spds['DEFAULT']
                 else:
                     max_bidask_spd = config.MAX_BIDASK_SPREAD_PCT['DEFAULT'][alt]
                 max_bidask_spd /= 100.0
-                if (bidder.depth[slug]['asks'][0].p - bidder_bids[0].p) / bidder_bids[0].p > max_bidask_spd:
+                if (bidder_ask - bidder_bid) / bidder_bid > max_bidask_spd:
                     last_time = bidder.xchg.bidask_spd_timestamps[slug]
                     if datetime.now() > last_time + timedelta(seconds=300):
                         bidder.xchg.bidask_spd_timestamps[slug] = datetime.now()
-                        log.info("Bid-Ask spread too high on %s pair %s: highest bid %.8g, lowest ask %.8g" % (bidder.xchg.name, slug, bidder_bids[0].p, bidder.depth[slug]['asks'][0].p))
+                        log.info("Bid-Ask spread too high on %s pair %s: highest bid %.8g, lowest ask %.8g" % (bidder.xchg.name, slug, bidder_bid, bidder_ask))
                 if asker.xchg.name in config.MAX_BIDASK_SPREAD_PCT:
                     xchg_spds = config.MAX_BIDASK_SPREAD_PCT[asker.xchg.name]
                     max_bidask_spd = xchg_spds[slug] if slug in xchg_spds else xchg_spds['DEFAULT']
                 else:
                     max_bidask_spd = config.MAX_BIDASK_SPREAD_PCT['DEFAULT'][alt]
                 max_bidask_spd /= 100.0
-                if (asker_asks[0].p - asker.depth[slug]['bids'][0].p) / asker.depth[slug]['bids'][0].p > max_bidask_spd:
+                if (asker_ask - asker_bid) / asker_bid > max_bidask_spd:
                     last_time = asker.xchg.bidask_spd_timestamps[slug]
                     if datetime.now() > last_time + timedelta(seconds=300):
                         asker.xchg.bidask_spd_timestamps[slug] = datetime.now()
-                        log.info("Bid-Ask spread too high on %s pair %s: highest bid %.8g, lowest ask %.8g" % (asker.xchg.name, slug, asker.depth[slug]['bids'][0].p, asker_asks[0].p))
-                if bidder_bids[0].p > bidder.depth[slug]['asks'][0].p:
-                    log.error("Corrupted order book on %s pair %s: highest bid %f > lowest ask %f" % (bidder.xchg.name, slug, bidder_bids[0].p, bidder.depth[slug]['asks'][0].p))
-                    self.error = True
-                    return False
-                if asker.depth[slug]['bids'][0].p > asker_asks[0].p:
-                    log.error("Corrupted order book on %s pair %s: highest bid %f > lowest ask %f" % (asker.xchg.name, slug, asker.depth[slug]['bids'][0].p, asker_asks[0].p))
-                    self.error = True
-                    return False
-                profit_obj = self.calculate_order(bidder, bidder_bids, asker, asker_asks)
-                if profit_obj is not None:
-                    self.profits[b][a] = profit_obj
-                    success = True
-
-        return success # return True if there are any profits at all
+                        log.info("Bid-Ask spread too high on %s pair %s: highest bid %.8g, lowest ask %.8g" % (asker.xchg.name, slug, asker_bid, asker_ask))
+                if bidder_bid > bidder_ask:
+                    log.error("Corrupted order book on %s pair %s: highest bid %f > lowest ask %f" % (bidder.xchg.name, slug, bidder_bid, bidder_ask))
+                    return None
+                if asker_bid > asker_ask:
+                    log.error("Corrupted order book on %s pair %s: highest bid %f > lowest ask %f" % (asker.xchg.name, slug, asker_bid, asker_ask))
+                    return None
+                cells.append((bidder, asker))
+        return cells
 
     def floor_volume(pair, volume):
         base, alt = pair
@@ -243,6 +266,14 @@ class ProfitCalculator(object):
 
         return (hi_bidder, lo_asker, best_profit_obj)
 
+    def get_trades(self):
+        """
+        all the profitable (bidder, asker, profit_obj) deals of the pair, the best first
+        """
+        trades = [(bidder, asker, self.profits[bidder.xchg.name][asker.xchg.name]) for bidder in self.controllers for asker in self.controllers
+                  if self.profits[bidder.xchg.name][asker.xchg.name] is not None]
+        return sorted(trades, key=lambda trade: trade[2]["profit_pct"], reverse=True)
+
 
     def get_profit_spread(self, bidder_fee, bid_price, asker_fee, ask_price):
         # simple formula
@@ -0,0 +1,112 @@
+from .logger import Logger as log
+from . import config
+from datetime import datetime, timedelta
+import numpy as np
+
+class ProfitMatrix(object):
+    """
+    vectorized profit spread calculation for all the pairs and exchange combinations at once.
+    top of book prices are stored in preallocated (pair, exchange) arrays, the ProfitCalculator
+    then only runs the volume logic on the (bidder, asker) cells which can make a profit
+    """
+    def __init__(self, controllers, pairs):
+        self.controllers = controllers
+        self.pairs = list(pairs)
+        self.pair_index = {pair: idx for idx, pair in enumerate(self.pairs)}
+        shape = (len(self.pairs), len(self.controllers))
+        self.bids = np.full(shape, np.nan)          # highest bid of each book
+        self.asks = np.full(shape, np.nan)          # lowest ask of each book
+        self.fees = np.array([controller.xchg.trading_fee for controller in self.controllers], dtype=float)
+        self.max_bidask_spds = np.zeros(shape)
+        for idx, (base, alt) in enumerate(self.pairs):
+            slug = base + "_" + alt
+            for jdx, controller in enumerate(self.controllers):
+                if controller.xchg.name in config.MAX_BIDASK_SPREAD_PCT:
+                    xchg_spds = config.MAX_BIDASK_SPREAD_PCT[controller.xchg.name]
+                    max_bidask_spd = xchg_spds[slug] if slug in xchg_spds else xchg_spds['DEFAULT']
+                else:
+                    max_bidask_spd = config.MAX_BIDASK_SPREAD_PCT['DEFAULT'].get(alt, np.inf)
+                self.max_bidask_spds[idx, jdx] = max_bidask_spd / 100.0
+        self.cells = {}         # (bidder, asker) controllers which passed the spread test, by pair
+        self.corrupted = set()  # pairs with a crossed order book
+
+    def update(self, pairs=None):
+        """
+        reads the top of the controller books, for the given pairs only if specified
+        """
+        pairs = self.pairs if pairs is None else pairs
+        for pair in pairs:
+            idx = self.pair_index[pair]
+            slug = pair[0] + "_" + pair[1]
+            for jdx, controller in enumerate(self.controllers):
+                book = controller.get_book(slug)
+                if book is None or book.is_empty():
+                    self.bids[idx, jdx] = np.nan
+                    self.asks[idx, jdx] = np.nan
+                else:
+                    self.bids[idx, jdx] = book.bids.prices[0]
+                    self.asks[idx, jdx] = book.asks.prices[0]
+
+    def compute(self, pairs=None):
+        """
+        computes the net profit spreads, bid-ask spread filters and corrupted book checks in one pass
+        """
+        pairs = self.pairs if pairs is None else pairs
+        if len(pairs) == 0:
+            return
+        rows = np.array([self.pair_index[pair] for pair in pairs])
+        bids = self.bids[rows]
+        asks = self.asks[rows]
+        valid = ~np.isnan(bids) & ~np.isnan(asks)
+        # an exchange book is only checked if there is another exchange to trade with
+        checked = valid & (np.count_nonzero(valid, axis=1) >= 2)[:, None]
+        with np.errstate(invalid='ignore'):
+            wide = checked & ((asks - bids) / bids > self.max_bidask_spds[rows])
+            crossed = checked & (bids > asks)
+            # ALT profit with fees applied, see ProfitCalculator.get_profit_spread
+            spreads = bids[:, :, None] * (1.0 - self.fees)[None, None, :] * (1.0 - self.fees)[None, :, None] - asks[:, None, :]
+        tradeable = valid[:, :, None] & valid[:, None, :] & ~np.eye(len(self.controllers), dtype=bool)[None, :, :]
+        if config.MIN_PROFIT > 0:
+            # a positive profit requires a positive spread, the volume adjustments can only reduce it
+            tradeable &= spreads > 0
+        for idx, jdx in zip(*np.nonzero(wide)):
+            self.log_bidask_spread(pairs[idx], self.controllers[jdx], bids[idx, jdx], asks[idx, jdx])
+        for idx, pair in enumerate(pairs):
+            if crossed[idx].any():
+                jdx = int(np.argmax(crossed[idx]))
+                log.error("Corrupted order book on %s pair %s: highest bid %f > lowest ask %f" % (self.controllers[jdx].xchg.name, pair[0] + "_" + pair[1], bids[idx, jdx], asks[idx, jdx]))
+                self.corrupted.add(pair)
+            else:
+                self.corrupted.discard(pair)
+            self.cells[pair] = [(self.controllers[b], self.controllers[a]) for b, a in zip(*np.nonzero(tradeable[idx]))]
+
+    def log_bidask_spread(self, pair, controller, bid, ask):
+        slug = pair[0] + "_" + pair[1]
+        last_time = controller.xchg.bidask_spd_timestamps[slug]
+        if datetime.now() > last_time + timedelta(seconds=300):
+            controller.xchg.bidask_spd_timestamps[slug] = datetime.now()
+            log.info("Bid-Ask spread too high on %s pair %s: highest bid %.8g, lowest ask %.8g" % (controller.xchg.name, slug, bid, ask))
+
+    def get_prices(self, pair):
+        idx = self.pair_index[pair]
+        return {controller.xchg.name : {"bid": None if np.isnan(self.bids[idx, jdx]) else float(self.bids[idx, jdx]),
+                                        "ask": None if np.isnan(self.asks[idx, jdx]) else float(self.asks[idx, jdx])} for jdx, controller in enumerate(self.controllers)}
+
+    def has_candidates(self, pair):
+        return pair in self.corrupted or len(self.cells.get(pair, [])) > 0
+
+    def get_rate(self, ccy, quote='BTC'):
+        """
+        value in quote of one unit of ccy, averaged over the mid prices of the exchanges. None if no traded pair links them
+        """
+        if ccy == quote:
+            return 1.0
+        for pair, inverse in (((ccy, quote), False), ((quote, ccy), True)):
+            if pair in self.pair_index:
+                idx = self.pair_index[pair]
+                mids = (self.bids[idx] + self.asks[idx]) / 2.0
+                mids = mids[~np.isnan(mids)]
+                if len(mids) > 0:
+                    mid = float(np.mean(mids))
+                    return 1.0 / mid if inverse else mid
+        return None
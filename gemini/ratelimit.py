@@ -0,0 +1,122 @@
+# request rate limiting of the REST apis, one token bucket per exchange and endpoint class (config.RATE_LIMITS)
+# the orders have priority: they can use the share of the buckets config.RATE_LIMIT_RESERVE holds back from the queries
+from . import config
+from urllib.parse import urlsplit
+import asyncio, threading, time
+
+# (path fragment, http methods or None for all, priority, {bucket: weight}) by exchange, the first match applies.
+# the other requests weigh 1 on the REQUEST bucket
+ENDPOINTS = {
+    'BINANCE': [('/order', ('POST',), True, {'REQUEST': 1, 'ORDER': 1}),
+                ('/order', ('DELETE',), True, {'REQUEST': 1}),
+                ('/openOrders', None, False, {'REQUEST': 40}), # all symbols
+                ('/account', None, False, {'REQUEST': 5}),
+                ('/depth', None, False, {'REQUEST': 5}), # 500 levels snapshot
+                ('/ticker/bookTicker', None, False, {'REQUEST': 2})],
+    'BITFINEX': [('/order/', None, True, {'REQUEST': 1})],
+    'BITTREX': [('/market/buylimit', None, True, {'REQUEST': 1}),
+                ('/market/selllimit', None, True, {'REQUEST': 1}),
+                ('/market/cancel', None, True, {'REQUEST': 1})],
+    'HITBTC': [('/order', ('POST', 'PUT', 'DELETE'), True, {'REQUEST': 1})],
+    'CEX': [('/place_order/', None, True, {'REQUEST': 1}),
+            ('/cancel_order/', None, True, {'REQUEST': 1})],
+}
+
+class TokenBucket(object):
+    '''
+    refilled at limit tokens per period, up to limit tokens. the queries only take the tokens above the reserve.
+    not thread safe, the buckets are locked by their RateLimiter
+    '''
+    def __init__(self, limit, period, reserve=0.0):
+        self.rate = float(limit) / period
+        self.capacity = float(limit)
+        self.reserve = self.capacity * reserve
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        # usage counters
+        self.nb_requests = 0
+        self.weight = 0
+        self.nb_throttled = 0
+        self.throttled_time = 0.0
+
+    def delay(self, weight, priority, now):
+        '''
+        returns the time until weight tokens are available, 0 if they are
+        '''
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        floor = 0.0 if priority else self.reserve
+        weight = min(weight, self.capacity - floor)
+        return max(0.0, (floor + weight - self.tokens) / self.rate)
+
+    def take(self, weight):
+        self.tokens -= min(weight, self.tokens)
+        self.nb_requests += 1
+        self.weight += weight
+
+    def get_usage(self):
+        return {'requests': self.nb_requests, 'weight': self.weight, 'throttled': self.nb_throttled,
+                'throttled_time': round(self.throttled_time, 3), 'tokens': round(self.tokens, 1)}
+
+class RateLimiter(object):
+    '''
+    token buckets of an exchange, the requests are charged to the buckets of their endpoint
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        limits = config.RATE_LIMITS.get(name, {})
+        self.buckets = {bucket: TokenBucket(limit, period, config.RATE_LIMIT_RESERVE) for bucket, (limit, period) in limits.items()}
+        self.endpoints = ENDPOINTS.get(name, [])
+
+    def classify(self, method, url):
+        '''
+        returns the priority and the weights by bucket of a request
+        '''
+        path = urlsplit(url).path
+        method = method.upper()
+        for fragment, methods, priority, weights in self.endpoints:
+            if fragment in path and (methods is None or method in methods):
+                return priority, weights
+        return False, {'REQUEST': 1}
+
+    def take(self, priority, weights):
+        '''
+        takes the tokens of a request from all its buckets and returns 0,
+        or returns the time until they are all available without taking any
+        '''
+        buckets = [(self.buckets[bucket], weight) for bucket, weight in weights.items() if bucket in self.buckets]
+        with self.lock:
+            now = time.monotonic()
+            delay = max([bucket.delay(weight, priority, now) for bucket, weight in buckets] + [0.0])
+            for bucket, weight in buckets:
+                if delay > 0:
+                    bucket.nb_throttled += 1
+                    bucket.throttled_time += delay
+                else:
+                    bucket.take(weight)
+        return delay
+
+    def acquire(self, method, url):
+        '''
+        waits for the tokens of a request, returns at once while the buckets are not empty
+        '''
+        priority, weights = self.classify(method, url)
+        delay = self.take(priority, weights)
+        while delay > 0:
+            time.sleep(delay)
+            delay = self.take(priority, weights)
+
+    async def acquire_async(self, method, url):
+        '''
+        asyncio version of acquire, the event loop keeps running while the request waits for its tokens
+        '''
+        priority, weights = self.classify(method, url)
+        delay = self.take(priority, weights)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.take(priority, weights)
+
+    def get_usage(self):
+        with self.lock:
+            return {bucket: self.buckets[bucket].get_usage() for bucket in self.buckets}
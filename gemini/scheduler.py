@@ -5,6 +5,7 @@
 
 from .logger import Logger as log
 from .profit_calculator import ProfitCalculator
+from .profit_matrix import ProfitMatrix
 from .order import Order # Order class needs to be present for de-serialization of orders
 from .controller import Controller
 from .binanceapi import Binance
@@ -13,7 +14,13 @@ from .hitbtcapi import Hitbtc
 from .cexioapi import CEX
 from .bittrexapi import Bittrex
 from .exchange import ExchangeLogHandler
+from .sessions import close_async_sessions, get_rate_limit_usage
+from .locks import BalanceLocks
+from .opportunities import OpportunityQueue
+from .maintenance import MaintenanceScheduler
+from .executors import ExchangeExecutors
 import threading, os, time, asyncio, json, abc
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 if os.name == 'nt':
     import wmi
@@ -22,8 +29,7 @@ from os.path import abspath
 import logging, traceback
 
 class Scheduler(object):
-    trading_lock = threading.Lock()
-    executor = ThreadPoolExecutor(max_workers=8)
+    balance_locks = BalanceLocks() # by (exchange, currency), the trades on disjoint balances are not serialized
 
     def __init__(self, config, name):
         """
@@ -35,6 +41,27 @@ class Scheduler(object):
         self.name = name
         self.error = [False]
         self.tick_count = 0
+        # pairs whose order books were updated since the last evaluation (event driven mode)
+        self.updated_pairs = set()
+        self.updated_pairs_lock = threading.Lock()
+        self.depth_event = threading.Event()
+        # book versions of each pair at its last evaluation
+        self.evaluated_versions = {}
+        # pairs whose opportunities were skipped because of active orders, with their exchanges
+        self.deferred_pairs = {}
+        # executor jobs of the tick phases still running, by key, and the jobs which missed their deadline
+        self.running_jobs = {}
+        self.late_jobs = {}
+        self.nb_evaluations = 0 # the profit calculations of each evaluation have their own jobs, a late one is never reused
+        self.phase_stats = {} # number of runs, cumulated time, longest time and number of late jobs by phase
+        # the jobs of each exchange run on its own bounded workers, the orders first. the profit calculations and the dispatch
+        # of the opportunities have their own pools, so they never queue behind the REST calls
+        self.executors = ExchangeExecutors(config)
+        self.evaluation_executor = ThreadPoolExecutor(max_workers=config.EVALUATION_WORKERS)
+        self.dispatch_executor = ThreadPoolExecutor(max_workers=config.DISPATCH_WORKERS)
+        # balances, active orders and book checks refreshed by the maintenance scheduler since the last tick
+        self.maintenance = None
+        self.maintenance_updated = threading.Event()
         self.read_target_file()
         self.loop = asyncio.new_event_loop()
         self.controllers = self.create_exchanges()
@@ -50,6 +77,7 @@ class Scheduler(object):
                     err = "Another instance of Python is already running"
                     log.error(err)
                     raise RuntimeError(err)
+        self.start_loop()
 
     def create_exchanges(self):
         # returns an array of Controller objects
@@ -148,19 +176,28 @@ class Scheduler(object):
         try:
             # initialization
             for controller in self.controllers:
+                controller.balance_locks = Scheduler.balance_locks
+                controller.xchg.order_executor = self.executors.get(controller.xchg.name).lane('ORDER')
                 self.pairs[controller] = []
                 for pair in self.config.PAIRS:
                     if controller.xchg.get_validated_pair(pair) is not None:
                         self.pairs[controller].append(pair)
                         self.nb_pairs = self.nb_pairs + 1
+                if self.config.TRADING_MODE == 'EVENT':
+                    controller.xchg.add_depth_listener(self.on_depth_update)
+            self.profit_matrix = ProfitMatrix(self.controllers, self.config.PAIRS)
+            self.maintenance = MaintenanceScheduler(self.config, self.controllers, self.pairs, self.on_maintenance, self.executors)
 
             # run
-            asyncio.set_event_loop(self.loop)
             start = time.time()
             last_tick = start - sleep
             while not self.error[0]:
                 delta = time.time() - last_tick
                 if (delta < sleep):
+                    if self.init and self.config.TRADING_MODE == 'EVENT':
+                        # evaluate the updated pairs until the next tick is due
+                        self.wait_for_updates(sleep-delta)
+                        continue
                     # sleep for the remaining seconds
                     time.sleep(sleep-delta)
                 self.tick()
@@ -198,6 +235,22 @@ class Scheduler(object):
                 controller.shutdown()
 
     def stop(self):
+        if self.maintenance is not None:
+            self.maintenance.stop()
+        self.executors.shutdown(wait=False)
+        self.evaluation_executor.shutdown(wait=False)
+        self.dispatch_executor.shutdown(wait=False)
+        asyncio.run_coroutine_threadsafe(close_async_sessions(), self.loop).result()
+        self.stop_loop()
+
+    def start_loop(self):
+        # the event loop runs on its own thread, the legs and the websocket orders are never frozen between two tick phases
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name='loop', daemon=True)
+        self.loop_thread.start()
+
+    def stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
         self.loop.close()
 
     def check_active_orders(self, bidder, asker):
@@ -206,97 +259,245 @@ class Scheduler(object):
         return False
 
     def get_calculator(self, pair):
-        return ProfitCalculator(self.controllers, pair)
+        return ProfitCalculator(self.controllers, pair, self.profit_matrix)
+
+    def get_phase_timeout(self, phase, name):
+        return self.config.EXCHANGE_PHASE_TIMEOUTS.get(name, {}).get(phase, self.config.PHASE_TIMEOUTS[phase])
+
+    def get_executor(self, phase, name):
+        if phase == 'PROFITS':
+            return self.evaluation_executor
+        if phase == 'EXECUTE':
+            return self.dispatch_executor
+        # the book copies of an exchange wait for its queued orders
+        return self.executors.get(name).lane(phase)
+
+    def run_phase(self, phase, jobs):
+        '''
+        runs the (key, exchange name, function, args) jobs of a tick phase on the executor of the phase, returns the results of the jobs done in time by key.
+        each job is waited until the deadline of its exchange for the phase. a late job keeps running in the background and is not started
+        again until it completes, its result is applied to the controllers on a next tick without blocking the other exchanges
+        '''
+        return asyncio.run_coroutine_threadsafe(self.wait_jobs(phase, jobs), self.loop).result()
 
-    def trade_pair(self, pair, control_state):
+    async def wait_jobs(self, phase, jobs):
+        start = time.time()
+        deadlines = {}
+        for key, name, func, args in jobs:
+            future = self.running_jobs.get(key)
+            if future is None:
+                future = self.loop.run_in_executor(self.get_executor(phase, name), func, *args)
+                future.add_done_callback(partial(self.on_job_done, key))
+                self.running_jobs[key] = future
+            deadlines[future] = (key, start + self.get_phase_timeout(phase, name))
+        pending = set(deadlines.keys())
+        while len(pending) > 0:
+            timeout = min(deadlines[future][1] for future in pending) - time.time()
+            if timeout > 0:
+                _, pending = await asyncio.wait(pending, timeout=timeout)
+            pending = {future for future in pending if deadlines[future][1] > time.time()}
+        elapsed = time.time() - start
+        results = {}
+        nb_late = 0
+        for future, (key, deadline) in deadlines.items():
+            if not future.done():
+                nb_late += 1
+                if key not in self.late_jobs:
+                    self.late_jobs[key] = start
+                    log.warning('%s %s phase: %s still running after %.3fs, its result is applied on a next tick' % (self.name, phase, str(key), elapsed))
+            elif not future.cancelled() and future.exception() is None:
+                results[key] = future.result()
+        stats = self.phase_stats.setdefault(phase, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        stats[3] += nb_late
+        return results
+
+    def on_job_done(self, key, future):
+        # called from the event loop once a job of a tick phase completes
+        if self.running_jobs.get(key) is future:
+            del self.running_jobs[key]
+        if key in self.late_jobs:
+            log.info('%s %s completed after %.3fs' % (self.name, str(key), time.time() - self.late_jobs.pop(key)))
+            if key[0] == 'PROFITS':
+                # its opportunities are stale, the pair is evaluated again with the current books
+                self.on_depth_update(None, key[1])
+        if not future.cancelled() and future.exception() is not None:
+            exc = future.exception()
+            log.error('%s %s failed: %s' % (self.name, str(key), ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))))
+
+    def get_phase_timings(self):
+        return {phase: {'runs': runs, 'average_ms': round(total * 1000 / runs, 1), 'max_ms': round(longest * 1000, 1), 'late': nb_late}
+                for phase, (runs, total, longest, nb_late) in self.phase_stats.items()}
+
+    def collect_opportunities(self, pair):
+        # computes the profits of a pair on a worker thread, returns all its profitable deals for the opportunity queue of the tick
         if self.error[0]:
-            return
-        base, alt = pair
+            return []
         pc = self.get_calculator(pair)
         if pc.check_profits():
-            (bidder, asker, profit_obj) = pc.get_best_trade()
-            if profit_obj is not None:
-                bidder_order = profit_obj["bidder_order"]
-                asker_order = profit_obj["asker_order"]
-                trade_type = 'Rebalancing' if profit_obj["rebalancing"] else 'Arbitrage'
-                if not self.check_active_orders(bidder, asker):
-                    with Scheduler.trading_lock:
-                        if not self.check_active_orders(bidder, asker):
-                            bidder.has_active_orders = True
-                            asker.has_active_orders = True
-                            self.perform_arbitrage(control_state, pair, bidder, asker, bidder_order, asker_order)
-                            log.ok('%s %s: Bought %f %s for %.8g %s from %s and sell %f %s for %.8g %s at %s. Profit : %.8g%s (%fpct)' %
-                                      (self.name, trade_type, asker_order.v,base,asker_order.p* asker_order.v,alt,asker.xchg.name,
-                                       bidder_order.v,base,bidder_order.p * bidder_order.v,alt,bidder.xchg.name,profit_obj["profit"],alt,profit_obj["profit_pct"]))
-                            log.info('%s Updated balances: %s' % (bidder.xchg.name, str({key:val for key, val in bidder.balances.items() if val != 0})))
-                            log.info('%s Offline balances: %s' % (bidder.xchg.name, str({key:val for key, val in bidder.offline_balances.items() if val != 0})))
-                            log.info('%s Updated balances: %s' % (asker.xchg.name, str({key:val for key, val in asker.balances.items() if val != 0})))
-                            log.info('%s Offline balances: %s' % (asker.xchg.name, str({key:val for key, val in asker.offline_balances.items() if val != 0})))
-        else:
-            if pc.error:
-                self.error[0] = True
-        control_state[0] = control_state[0] - 1
-        if control_state[0] == 0:
-            self.loop.stop()
+            return [(pair, bidder, asker, profit_obj) for bidder, asker, profit_obj in pc.get_trades()]
+        if pc.error:
+            self.error[0] = True
+        return []
+
+    def execute_opportunity(self, opportunity):
+        # the opportunities accepted in the same tick are dispatched in parallel, they only wait for each other on shared balances
+        # the worker thread then waits for the acknowledgement of both legs, sent from the event loop
+        pair, bidder, asker, profit_obj = opportunity.pair, opportunity.bidder, opportunity.asker, opportunity.profit_obj
+        base, alt = pair
+        bidder_order = profit_obj["bidder_order"]
+        asker_order = profit_obj["asker_order"]
+        trade_type = 'Rebalancing' if profit_obj["rebalancing"] else 'Arbitrage'
+        balances = [(controller.xchg.name, ccy) for controller in (bidder, asker) for ccy in pair]
+        with Scheduler.balance_locks.hold(balances):
+            bidder.has_active_orders = True
+            asker.has_active_orders = True
+            legs = self.perform_arbitrage(pair, bidder, asker, bidder_order, asker_order)
+            log.ok('%s %s: Bought %f %s for %.8g %s from %s and sell %f %s for %.8g %s at %s. Profit : %.8g%s (%fpct)' %
+                      (self.name, trade_type, asker_order.v,base,asker_order.p* asker_order.v,alt,asker.xchg.name,
+                       bidder_order.v,base,bidder_order.p * bidder_order.v,alt,bidder.xchg.name,profit_obj["profit"],alt,profit_obj["profit_pct"]))
+            log.info('%s Updated balances: %s' % (bidder.xchg.name, str({key:val for key, val in bidder.balances.items() if val != 0})))
+            log.info('%s Offline balances: %s' % (bidder.xchg.name, str({key:val for key, val in bidder.offline_balances.items() if val != 0})))
+            log.info('%s Updated balances: %s' % (asker.xchg.name, str({key:val for key, val in asker.balances.items() if val != 0})))
+            log.info('%s Offline balances: %s' % (asker.xchg.name, str({key:val for key, val in asker.offline_balances.items() if val != 0})))
+        if legs is not None:
+            legs.result()
+
+    def on_maintenance(self, controller, job):
+        # called from the maintenance threads once a job has published its results into a controller, the next tick applies them
+        self.maintenance_updated.set()
+
+    def on_depth_update(self, xchg, pair):
+        # called from the websocket threads, the evaluation itself happens on the scheduler thread
+        with self.updated_pairs_lock:
+            self.updated_pairs.add(pair)
+        self.depth_event.set()
+
+    def wait_for_updates(self, timeout):
+        if not self.depth_event.wait(timeout):
+            return
+        with self.updated_pairs_lock:
+            self.depth_event.clear()
+            pairs = [pair for pair in self.config.PAIRS if pair in self.updated_pairs]
+            self.updated_pairs = set()
+        if len(pairs) > 0:
+            self.evaluate_pairs(pairs)
+
+    def evaluate_pairs(self, pairs):
+        # copy the updated books and look for trade opportunities on the given pairs only
+        self.update_depths(pairs)
+        if self.error[0]:
+            return
+        self.trade_pairs(pairs)
+
+    def update_depths(self, pairs):
+        # only the books updated by the exchanges since the last copy are copied
+        updates = [(controller, pair) for controller in self.controllers for pair in pairs if pair in self.pairs[controller] and controller.depth_changed(pair)]
+        if len(updates) == 0:
+            return
+        self.run_phase('DEPTH', [(('DEPTH', controller.xchg.name, pair), controller.xchg.name, controller.update_depth, (None, None, pair)) for controller, pair in updates])
+
+    def get_depth_versions(self, pair):
+        pairstr = pair[0] + '_' + pair[1]
+        return tuple([controller.depth_versions.get(pairstr) for controller in self.controllers])
+
+    def get_dirty_pairs(self, pairs):
+        # pairs with at least one book updated since the pair was last evaluated
+        dirty_pairs = []
+        for pair in pairs:
+            versions = self.get_depth_versions(pair)
+            if self.evaluated_versions.get(pair) != versions:
+                self.evaluated_versions[pair] = versions
+                dirty_pairs.append(pair)
+        return dirty_pairs
+
+    def get_released_pairs(self):
+        released = [pair for pair, controllers in self.deferred_pairs.items() if not any(controller.has_active_orders for controller in controllers)]
+        for pair in released:
+            del self.deferred_pairs[pair]
+        return released
+
+    def trade_pairs(self, pairs):
+        dirty_pairs = self.get_dirty_pairs(pairs)
+        # the spreads of all the updated pairs are computed at once
+        # only the pairs with a positive spread (or a corrupted book) need the full calculation
+        self.profit_matrix.update(dirty_pairs)
+        self.profit_matrix.compute(dirty_pairs)
+        candidates = [pair for pair in dirty_pairs if self.profit_matrix.has_candidates(pair)]
+        if len(candidates) == 0:
+            return
+        # the opportunities of all the pairs are ranked together by their profit in BTC
+        queue = OpportunityQueue({alt: self.profit_matrix.get_rate(alt) for alt in set(pair[1] for pair in candidates)})
+        self.nb_evaluations += 1
+        jobs = [(('PROFITS', pair, self.nb_evaluations), None, self.collect_opportunities, (pair,)) for pair in candidates]
+        results = self.run_phase('PROFITS', jobs)
+        if self.error[0]:
+            return
+        for key, _, _, _ in jobs:
+            if key in results:
+                for trade in results[key]:
+                    queue.add(*trade)
+            else:
+                # the versions are not recorded, the pair is evaluated again on the next tick
+                self.evaluated_versions.pop(key[1], None)
+        opportunities = queue.allocate(self.controllers)
+        for opportunity in queue.deferred:
+            # the versions are not recorded, the pair is evaluated again once its exchanges are free
+            self.evaluated_versions.pop(opportunity.pair, None)
+            self.deferred_pairs[opportunity.pair] = (opportunity.bidder, opportunity.asker)
+        if len(opportunities) > 0:
+            log.info('%s %d opportunities accepted out of %d, profit %.8g BTC' %
+                     (self.name, len(opportunities), len(queue.opportunities), sum(opportunity.value for opportunity in opportunities)))
+            self.run_phase('EXECUTE', [(('EXECUTE', opportunity.pair, opportunity.bidder.xchg.name, opportunity.asker.xchg.name), None, self.execute_opportunity, (opportunity,))
+                                       for opportunity in opportunities])
+            self.evaluated_versions = {}
 
     def tick(self):
         try:
             # new cycle
             if self.tick_count == 5000:
                 log.info('5000 ticks')
+                log.info('Rate limits usage: %s' % (str(get_rate_limit_usage()),))
+                log.info('Balance locks usage: %s' % (str(Scheduler.balance_locks.get_usage()),))
+                log.info('Tick phases: %s' % (str(self.get_phase_timings()),))
+                log.info('Maintenance jobs: %s' % (str(self.maintenance.get_timings()),))
+                log.info('Exchange executors: %s' % (str(self.executors.get_usage()),))
                 self.tick_count = 0
+            # in event driven mode, trading happens in evaluate_pairs once gemini is initialized
+            # the tick still refreshes the order books to catch dropped connections
+            event_driven = self.init and self.config.TRADING_MODE == 'EVENT'
+
+            # the pairs deferred by active orders wait for the next order book update, unless their exchanges are free again
+            if event_driven:
+                for pair in self.get_released_pairs():
+                    self.on_depth_update(None, pair)
 
             # update the order books
             if self.tick_count > 5 or self.init:
-                control_state = [self.nb_pairs]
-                for controller in self.controllers:
-                    for pair in self.pairs[controller]:
-                        asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, controller.update_depth, self.loop, control_state, pair))
-                self.loop.run_forever()
+                self.update_depths(self.config.PAIRS)
                 if self.error[0]:
                     return
 
             # look for trade opportunities
-            if self.tick_count > 10 or self.init:
+            if (self.tick_count > 10 or self.init) and not event_driven:
                 if not self.init:
                     self.init = True
+                    self.maintenance.start()
                     log.info("Gemini is initialized")
-                control_state = [len(self.config.PAIRS)]
-                for pair in self.config.PAIRS:
-                    asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, self.trade_pair, pair, control_state))
-                self.loop.run_forever()
+                self.trade_pairs(self.config.PAIRS)
                 if self.error[0]:
                     return
 
-            # update balances and active orders
-            if self.init and self.tick_count % 25 == 0:
+            # apply the balances, active orders and book checks refreshed in the background
+            if self.maintenance_updated.is_set():
+                self.maintenance_updated.clear()
                 for controller in self.controllers:
                     for pair in self.pairs[controller]:
                         if controller.bad_prices[pair] >= 3:
                             self.error[0] = True
                             return
-                check_order_book = self.tick_count % 100 == 0
-                control_state = [len(self.controllers)]
-                if check_order_book:
-                    tickers = {}
-                    for controller in self.controllers:
-                        tickers[controller.xchg.name] = {}
-                        asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, controller.get_tickers, self.loop, control_state, tickers[controller.xchg.name]))
-                    self.loop.run_forever()
-                    control_state = [self.nb_pairs]
-                    for controller in self.controllers:
-                        for pair in self.pairs[controller]:
-                            asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, controller.validate_order_book, self.loop, control_state, pair, tickers[controller.xchg.name]))
-                else:
-                    check_balances = self.tick_count % 50 == 0
-                    for controller in self.controllers:
-                        if check_balances:
-                            asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, controller.update_all_balances, self.loop, control_state))
-                        else:
-                            asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, controller.query_active_orders, self.loop, control_state))
-                self.loop.run_forever()
-                if self.error[0]:
-                    return
                 new_balance_detected = False
                 for controller in self.controllers:
                     if controller.new_balance_detected:
@@ -304,11 +505,17 @@ class Scheduler(object):
                         controller.new_balance_detected = False
                 if new_balance_detected:
                     self.log_assets()
+                # balances and active orders may have changed, all the pairs need to be evaluated again
+                self.evaluated_versions = {}
+                if event_driven:
+                    for pair in self.config.PAIRS:
+                        self.on_depth_update(None, pair)
         finally:
-            self.loop.call_soon(self.read_target_file)
+            self.loop.call_soon_threadsafe(self.read_target_file)
             self.tick_count = self.tick_count + 1
 
-    def perform_arbitrage(self, control_state, pair, bidder, asker, bidder_order, asker_order):
+    def perform_arbitrage(self, pair, bidder, asker, bidder_order, asker_order):
+        # returns the future of the legs sent from the event loop, None if the arbitrage is aborted
         base, alt = pair
         # sanity check: negative balances
         if bidder.balances[base] - bidder_order.v < 0 or asker.balances[alt] - asker_order.p * asker_order.v < 0:
@@ -334,6 +541,13 @@ class Scheduler(object):
             return
         bidder.balances[base] -= bidder_order.v
         asker.balances[alt] -= asker_order.p * asker_order.v
-        control_state[0] = control_state[0] + 2
-        asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, asker.async_submit_order, self.loop, control_state, pair, "BUY", asker_order.p, asker_order.v))
-        asyncio.ensure_future(self.loop.run_in_executor(Scheduler.executor, bidder.async_submit_order, self.loop, control_state, pair, "SELL", bidder_order.p, bidder_order.v))
+        return asyncio.run_coroutine_threadsafe(self.submit_legs(pair, bidder, asker, bidder_order, asker_order), self.loop)
+
+    async def submit_legs(self, pair, bidder, asker, bidder_order, asker_order):
+        # both legs are sent from the event loop at once, without waiting for a worker thread
+        buy, sell = await asyncio.gather(asker.submit_leg(pair, "BUY", asker_order.p, asker_order.v),
+                                         bidder.submit_leg(pair, "SELL", bidder_order.p, bidder_order.v))
+        if buy is not None and sell is not None:
+            log.info('%s legs sent %.3fms apart, acknowledged in %.1fms by %s and %.1fms by %s' %
+                     (self.name, abs(buy.sent_time - sell.sent_time) * 1000, (buy.ack_time - buy.sent_time) * 1000, asker.xchg.name,
+                      (sell.ack_time - sell.sent_time) * 1000, bidder.xchg.name))
@@ -0,0 +1,111 @@
+# long-lived http sessions, one per exchange, shared by all the REST clients of the exchange
+# the connections are kept alive in a pool so the orders do not pay the DNS, TCP and TLS setup
+# all the requests of an exchange share its rate limiter
+from . import config
+from .logger import Logger as log
+from .ratelimit import RateLimiter
+from requests.adapters import HTTPAdapter
+import aiohttp, requests, threading
+
+sessions = {}
+sessions_lock = threading.Lock()
+async_sessions = {}
+limiters = {}
+limiters_lock = threading.Lock()
+
+class RateLimitedAdapter(HTTPAdapter):
+    '''
+    pooled adapter waiting for the tokens of the exchange rate limiter before sending a request
+    '''
+    def __init__(self, name, **kwargs):
+        super(RateLimitedAdapter, self).__init__(**kwargs)
+        self.limiter = get_limiter(name)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.method, request.url)
+        return super(RateLimitedAdapter, self).send(request, **kwargs)
+
+def get_limiter(name):
+    with limiters_lock:
+        limiter = limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(name)
+            limiters[name] = limiter
+        return limiter
+
+def get_rate_limit_usage():
+    '''
+    usage counters of the rate limiters by exchange and bucket, for monitoring
+    '''
+    return {name: limiter.get_usage() for name, limiter in list(limiters.items())}
+
+def mount(name, session):
+    '''
+    mounts a pooled and rate limited adapter of the exchange on a session
+    '''
+    adapter = RateLimitedAdapter(name, pool_connections=4, pool_maxsize=config.HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session(name):
+    '''
+    returns the pooled session of the exchange, created on first use with config.HTTP_POOL_SIZE connections per host
+    '''
+    with sessions_lock:
+        session = sessions.get(name)
+        if session is None:
+            session = mount(name, requests.Session())
+            sessions[name] = session
+        return session
+
+def warm_up(name, url, nb_connections=None):
+    '''
+    opens nb_connections (config.HTTP_WARMUP_CONNECTIONS by default) concurrently in the background,
+    they stay in the pool of the session until the first orders. returns the warm-up thread
+    '''
+    session = get_session(name)
+    nb_connections = config.HTTP_WARMUP_CONNECTIONS if nb_connections is None else nb_connections
+    def connect():
+        try:
+            session.head(url, timeout=config.HTTP_TIMEOUT)
+        except Exception as e:
+            log.warning('%s: connection warm-up failed: %s' % (name, str(e)))
+    def run():
+        threads = [threading.Thread(target=connect) for _ in range(min(nb_connections, config.HTTP_POOL_SIZE))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    thread = threading.Thread(target=run, name='%s warm-up' % name)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+def get_async_session(name):
+    '''
+    returns the non-blocking session of the exchange, for the order entry from the scheduler event loop.
+    must be called from the event loop, the session is bound to it
+    '''
+    session = async_sessions.get(name)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=config.HTTP_POOL_SIZE)
+        session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT))
+        async_sessions[name] = session
+    return session
+
+async def request(name, method, url, auth=None, **kwargs):
+    '''
+    sends a request over the non-blocking session of the exchange, auth is a (user, password) tuple as for requests.
+    returns the http status and the body of the response
+    '''
+    if auth is not None:
+        kwargs['auth'] = aiohttp.BasicAuth(*auth)
+    await get_limiter(name).acquire_async(method, url)
+    async with get_async_session(name).request(method.upper(), url, **kwargs) as response:
+        return response.status, await response.read()
+
+async def close_async_sessions():
+    for session in async_sessions.values():
+        await session.close()
+    async_sessions.clear()
@@ -0,0 +1,79 @@
+# single thread watching the timeouts of all the websocket connections
+from .logger import Logger as log
+import heapq, itertools, threading, time
+
+class Watch(object):
+    """
+    calls callback when touch() has not been called for timeout seconds, then stays idle until the next touch()
+    """
+    def __init__(self, watchdog, timeout, callback):
+        self.watchdog = watchdog
+        self.timeout = timeout
+        self.callback = callback
+        self.last_time = None   # time of the last touch, None when idle or cancelled
+        self.scheduled = False  # True while the watch has an entry in the deadline heap
+
+    def touch(self):
+        self.watchdog.touch(self)
+
+    def cancel(self):
+        self.last_time = None
+
+class Watchdog(object):
+    """
+    the deadlines are kept in a heap checked by one thread. touching a watch only records the time,
+    its heap entry is rescheduled lazily when it expires, so there is no thread or timer created per message
+    """
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.heap = []  # (deadline, seq, watch), a deadline is never later than the actual one
+        self.seq = itertools.count()
+        self.thread = None
+
+    def watch(self, timeout, callback):
+        return Watch(self, timeout, callback)
+
+    def touch(self, watch):
+        with self.cond:
+            watch.last_time = time.time()
+            if not watch.scheduled:
+                watch.scheduled = True
+                self.push(watch.last_time + watch.timeout, watch)
+
+    def push(self, deadline, watch):
+        heapq.heappush(self.heap, (deadline, next(self.seq), watch))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='watchdog')
+            self.thread.daemon = True
+            self.thread.start()
+        if self.heap[0][2] is watch:
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            expired = []
+            with self.cond:
+                while len(self.heap) == 0:
+                    self.cond.wait()
+                now = time.time()
+                while len(self.heap) > 0 and self.heap[0][0] <= now:
+                    deadline, _, watch = heapq.heappop(self.heap)
+                    if watch.last_time is None:
+                        watch.scheduled = False
+                    elif watch.last_time + watch.timeout > now:
+                        # touched since it was scheduled
+                        self.push(watch.last_time + watch.timeout, watch)
+                    else:
+                        watch.scheduled = False
+                        watch.last_time = None
+                        expired.append(watch)
+                if len(expired) == 0:
+                    self.cond.wait(self.heap[0][0] - now if len(self.heap) > 0 else None)
+            for watch in expired:
+                try:
+                    watch.callback()
+                except Exception as e:
+                    log.error('Watchdog callback failed: %s' % str(e))
+
+# shared by all the connections
+watchdog = Watchdog()
@@ -9,7 +9,8 @@ setup(
     author='Jonathan Betser',
     license='AGPLv3',
     author_email='jonathan.betser@gmail.com',
-    install_requires=['cryptography', 'requests', 'colorama', 'aiohttp', 'sortedcontainers', 'websockets', 'autobahn', 'wmi', 'signalr-client', 'cfscrape', 'events'],
+    install_requires=['cryptography', 'requests', 'colorama', 'aiohttp', 'sortedcontainers', 'websockets', 'autobahn', 'wmi', 'signalr-client', 'cfscrape', 'events', 'numpy'],
+    extras_require={'fast': ['orjson']},
     keywords='binance hitbtc bitfinex cexio exchange arbitrage bitcoin ethereum ripple btc eth xrp',
     classifiers=[
           'Intended Audience :: Developers',
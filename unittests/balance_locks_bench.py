@@ -0,0 +1,43 @@
+# executed trades per tick in a multi-pair simulation, with the former global trading lock and the (exchange, currency) balance locks
+# each trade holds its locks for TRADE_TIME, the time of the balance checks and of the order dispatch
+# PYTHONPATH=. python unittests/balance_locks_bench.py
+from gemini.locks import BalanceLocks
+from concurrent.futures import ThreadPoolExecutor
+import random, threading, time
+
+NB_TICKS = 50
+TRADE_TIME = 0.002
+EXCHANGES = ('BINANCE', 'BITFINEX', 'HITBTC', 'BITTREX', 'CEX')
+PAIRS = (('ETH', 'BTC'), ('XRP', 'BTC'), ('LTC', 'BTC'), ('NEO', 'BTC'), ('XRP', 'USDT'), ('ETH', 'USDT'), ('NEO', 'ETH'), ('TRX', 'ETH'))
+
+class GlobalLock(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+    def hold(self, keys):
+        return self.lock
+
+def trade(locks, pair, bidder, asker):
+    with locks.hold([(name, ccy) for name in (bidder, asker) for ccy in pair]):
+        time.sleep(TRADE_TIME)
+
+def opportunities(rand):
+    # one opportunity per pair and tick, between two random exchanges
+    return [(pair,) + tuple(rand.sample(EXCHANGES, 2)) for pair in PAIRS]
+
+def bench(locks):
+    rand = random.Random(42)
+    executor = ThreadPoolExecutor(max_workers=8)
+    start = time.time()
+    for _ in range(NB_TICKS):
+        futures = [executor.submit(trade, locks, pair, bidder, asker) for pair, bidder, asker in opportunities(rand)]
+        for future in futures:
+            future.result()
+    elapsed = time.time() - start
+    executor.shutdown()
+    return elapsed
+
+if __name__ == "__main__":
+    nb_trades = NB_TICKS * len(PAIRS)
+    for name, locks in (('global lock', GlobalLock()), ('balance locks', BalanceLocks())):
+        elapsed = bench(locks)
+        print('%-13s: %d trades in %.3fs, %.1fms per tick, %.0f trades/s' % (name, nb_trades, elapsed, elapsed * 1000 / NB_TICKS, nb_trades / elapsed))
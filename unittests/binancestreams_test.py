@@ -0,0 +1,80 @@
+from gemini.binanceapi import Binance
+from gemini.exchange import Exchange
+from gemini import config
+from geminitest import GeminiTest
+import unittest
+
+class SocketManager(object):
+    # records the combined stream connections instead of opening them
+    def __init__(self):
+        self.sockets = []
+
+    def start_multiplex_socket(self, streams, callback, custom_factory=None):
+        self.sockets.append((streams, callback, custom_factory))
+
+class DepthManager(object):
+    def __init__(self):
+        self.events = []
+        self.nb_invalidations = 0
+
+    def invalidate(self):
+        self.nb_invalidations += 1
+
+    def process_event(self, event):
+        self.events.append(event)
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def create_exchange(self):
+        xchg = Binance.__new__(Binance)
+        Exchange.__init__(xchg, Binance.all_pairs, None, None, [False])
+        xchg.name = 'BINANCE'
+        xchg.depth_managers = {}
+        xchg.stream_callbacks = {}
+        xchg.bm = SocketManager()
+        return xchg
+
+    def test_stream_connections(self):
+        config.BINANCE_BOOK_MODE = 'PARTIAL'
+        config.BINANCE_STREAM_CONNECTIONS = 3
+        xchg = self.create_exchange()
+        xchg.reconnect()
+        # the symbols are spread over the connections, each one is streamed once
+        self.assertEqual(len(xchg.bm.sockets), 3)
+        streams = [stream for socket in xchg.bm.sockets for stream in socket[0]]
+        self.assertEqual(sorted(streams), sorted(xchg.format_pair(pair).lower() + '@depth10' for pair in xchg.get_tradeable_pairs()))
+        self.assertLessEqual(max(len(socket[0]) for socket in xchg.bm.sockets) - min(len(socket[0]) for socket in xchg.bm.sockets), 1)
+        for socket_streams, callback, factory in xchg.bm.sockets:
+            self.assertEqual(callback, xchg.process_stream_message)
+            self.assertTrue(factory.url.endswith('stream?streams=' + '/'.join(socket_streams)))
+        # the events are routed to the book of their stream
+        version = xchg.get_depth_version(('ETH', 'BTC'))
+        xchg.process_stream_message({'stream': 'ethbtc@depth10', 'data': {'lastUpdateId': 1, 'bids': [['0.03', '1.0']], 'asks': [['0.031', '2.0']]}})
+        self.assertEqual((xchg.depths['ETHBTC'].best_bid(), xchg.depths['ETHBTC'].best_ask()), (0.03, 0.031))
+        self.assertEqual(xchg.get_depth_version(('ETH', 'BTC')), version + 1)
+        # the unknown streams are ignored
+        versions = dict(xchg.depth_versions)
+        xchg.process_stream_message({'stream': 'foobtc@depth10', 'data': {'lastUpdateId': 1, 'bids': [], 'asks': []}})
+        xchg.process_stream_message({'result': None, 'id': 1})
+        self.assertEqual(xchg.depth_versions, versions)
+
+    def test_diff_streams(self):
+        config.BINANCE_BOOK_MODE = 'DIFF'
+        config.BINANCE_STREAM_CONNECTIONS = 10
+        xchg = self.create_exchange()
+        xchg.depth_managers = {xchg.format_pair(pair): DepthManager() for pair in xchg.get_tradeable_pairs()}
+        xchg.reconnect()
+        # a reconnection resynchronizes the books from new snapshots
+        self.assertTrue(all(manager.nb_invalidations == 1 for manager in xchg.depth_managers.values()))
+        self.assertEqual(len(xchg.bm.sockets), 10)
+        # the diff events go to the depth cache of their symbol
+        event = {'e': 'depthUpdate', 's': 'XRPETH', 'U': 1, 'u': 2, 'b': [], 'a': []}
+        xchg.process_stream_message({'stream': 'xrpeth@depth', 'data': event})
+        xchg.process_stream_message({'stream': 'xrpeth@depth10', 'data': event})
+        self.assertEqual(xchg.depth_managers['XRPETH'].events, [event])
+        self.assertEqual(sum(len(manager.events) for manager in xchg.depth_managers.values()), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# throughput of the Bitfinex book pipeline, from the connection to the order book
+# queued: multiprocessing queues drained at tick time (former pipeline), push: deltas applied as they arrive
+# PYTHONPATH=. python unittests/bitfinex_queue_bench.py
+from gemini.bitfinex.queue_processor import QueueProcessor
+from gemini.orderbook import IncrementalOrderBook
+from collections import defaultdict
+import multiprocessing, queue, random, time
+
+NB_MESSAGES = 50000
+SYMBOL = 'ETHBTC'
+
+def make_messages():
+    random.seed(0)
+    messages = []
+    for idx in range(NB_MESSAGES):
+        price = round(0.07 + random.randint(-200, 200) * 0.00001, 5)
+        count = random.randint(0, 3)
+        amount = random.uniform(0.1, 10.0) * (1 if price < 0.07 else -1)
+        messages.append(('data', [1, [price, count, amount]], time.time()))
+    return messages
+
+def apply_delta(book, data):
+    entry = data[0]
+    if entry[1] == 0:
+        book.remove(entry[0])
+    elif entry[2] > 0:
+        book.update_bid(entry[0], entry[2])
+    else:
+        book.update_ask(entry[0], entry[2] * -1)
+    if book.changed:
+        book.publish()
+
+def bench_queued(messages):
+    data_q = multiprocessing.Queue()
+    processor = QueueProcessor(data_q)
+    processor.books = defaultdict(multiprocessing.Queue)
+    processor.channel_directory[1] = ('book', SYMBOL)
+    processor.start()
+    book = IncrementalOrderBook(10)
+    book_q = processor.books[('book', SYMBOL)]
+    start = time.time()
+    for message in messages:
+        data_q.put(message)
+    # drained by get_depth at tick time
+    for _ in range(len(messages)):
+        data, ts = book_q.get()
+        apply_delta(book, data)
+    elapsed = time.time() - start
+    processor.join()
+    return elapsed
+
+def bench_push(messages):
+    processor = QueueProcessor(queue.Queue())
+    processor.channel_directory[1] = ('book', SYMBOL)
+    book = IncrementalOrderBook(10)
+    processor.on_book = lambda symbol, data, ts: apply_delta(book, data)
+    start = time.time()
+    for message in messages:
+        processor.handle_message(message)
+    return time.time() - start
+
+if __name__ == "__main__":
+    messages = make_messages()
+    for name, bench in (('queued', bench_queued), ('push', bench_push)):
+        elapsed = bench(messages)
+        print('%-6s: %d book deltas in %.3fs, %.0f msg/s' % (name, len(messages), elapsed, len(messages) / elapsed))
@@ -0,0 +1,68 @@
+from gemini.bitfinexapi import Bitfinex
+from gemini.bitfinex.client import BtfxWss
+from gemini.exchange import Exchange
+from gemini.orderbook import OrderBook, IncrementalOrderBook
+from gemini import config
+from geminitest import GeminiTest
+import unittest, threading
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def create_exchange(self):
+        xchg = Bitfinex.__new__(Bitfinex)
+        Exchange.__init__(xchg, Bitfinex.all_pairs, None, None, [False])
+        xchg.name = 'BITFINEX'
+        xchg.depths['ETHBTC'] = OrderBook()
+        xchg.indexed_depths = {'ETHBTC': IncrementalOrderBook(config.ORDERBOOK_DEPTH)}
+        return xchg
+
+    def best_prices(self, xchg):
+        return (xchg.depths['ETHBTC'].best_bid(), xchg.depths['ETHBTC'].best_ask())
+
+    def test_book_deltas(self):
+        xchg = self.create_exchange()
+        # the snapshot replaces the book, the negative amounts are asks
+        xchg.on_book('ETHBTC', [[[0.03, 2, 1.5], [0.029, 1, 2.0], [0.031, 1, -1.0], [0.032, 3, -4.0]]], 0)
+        self.assertEqual(self.best_prices(xchg), (0.03, 0.031))
+        self.assertEqual(xchg.get_depth_version(('ETH', 'BTC')), 1)
+        xchg.on_book('ETHBTC', [[0.0305, 1, 0.5]], 0)
+        xchg.on_book('ETHBTC', [[0.0308, 1, -2.0]], 0)
+        self.assertEqual(self.best_prices(xchg), (0.0305, 0.0308))
+        self.assertEqual(xchg.depths['ETHBTC'].bids[0].v, 0.5)
+        self.assertEqual(xchg.depths['ETHBTC'].asks[0].v, 2.0)
+        # a count of 0 removes the price level
+        xchg.on_book('ETHBTC', [[0.0305, 0, 1]], 0)
+        xchg.on_book('ETHBTC', [[0.0308, 0, -1]], 0)
+        self.assertEqual(self.best_prices(xchg), (0.03, 0.031))
+        self.assertEqual(xchg.get_depth_version(('ETH', 'BTC')), 5)
+        # the heartbeats and the unknown pairs are ignored
+        xchg.on_book('ETHBTC', ['hb'], 0)
+        xchg.on_book('XRPBTC', [[0.0001, 1, 1.0]], 0)
+        self.assertEqual(xchg.get_depth_version(('ETH', 'BTC')), 5)
+        # a new snapshot, sent on a resubscription, drops the previous levels
+        xchg.on_book('ETHBTC', [[[0.02, 1, 1.0], [0.021, 1, -1.0]]], 0)
+        self.assertEqual(self.best_prices(xchg), (0.02, 0.021))
+        self.assertEqual((len(xchg.depths['ETHBTC'].bids), len(xchg.depths['ETHBTC'].asks)), (1, 1))
+
+    def test_push_delivery(self):
+        xchg = self.create_exchange()
+        wss = BtfxWss()
+        self.assertEqual(wss.conn.on_data, wss.queue_processor.handle_message)
+        threads = []
+        def on_book(pairstr, data, ts):
+            threads.append(threading.current_thread())
+            xchg.on_book(pairstr, data, ts)
+        wss.queue_processor.on_book = on_book
+        wss.conn.pass_to_client('subscribed', {'event': 'subscribed', 'channel': 'book', 'chanId': 17, 'symbol': 'tETHBTC',
+                                               'prec': 'P0', 'freq': 'F0', 'len': '25', 'pair': 'ETHBTC'}, 0)
+        # the book messages are applied on the connection thread as they arrive, nothing is queued
+        wss.conn.pass_to_client('data', [17, [[0.03, 1, 1.0], [0.031, 1, -1.0]]], 0)
+        wss.conn.pass_to_client('data', [17, [0.0305, 1, 0.5]], 0)
+        self.assertEqual(threads, [threading.current_thread()] * 2)
+        self.assertEqual(self.best_prices(xchg), (0.0305, 0.031))
+        self.assertTrue(wss.conn.q.empty())
+
+if __name__ == "__main__":
+    unittest.main()
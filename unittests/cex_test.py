@@ -0,0 +1,30 @@
+from gemini.exchange import Exchange
+from gemini.cexioapi import CEX
+from geminitest import GeminiTest
+import unittest
+
+class CEXApi(object):
+    def __init__(self):
+        self.requests = []
+    def current_orders(self, couple='GHS/BTC'):
+        self.requests.append(couple)
+        return [{'id': '1', 'type': 'buy', 'price': '0.05', 'amount': '2', 'pending': '1.5', 'symbol1': 'ETH', 'symbol2': 'BTC'},
+                {'id': '2', 'type': 'sell', 'price': '6000', 'amount': '1', 'pending': '1', 'symbol1': 'BTC', 'symbol2': 'USD'},
+                {'id': '3', 'type': 'sell', 'price': '0.0001', 'amount': '100', 'pending': '100', 'symbol1': 'XRP', 'symbol2': 'BTC'}]
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_active_orders(self):
+        xchg = CEX.__new__(CEX)
+        Exchange.__init__(xchg, CEX.all_pairs, None, None, [False])
+        xchg.trade_api = CEXApi()
+        orders = xchg.query_active_orders()
+        # one request for all the pairs, the untraded pairs are left out
+        self.assertEqual(xchg.trade_api.requests, [''])
+        self.assertEqual([(order.id, order.type, order.pair, order.v) for order in orders],
+                         [('1', 'BUY', ('ETH', 'BTC'), 1.5), ('3', 'SELL', ('XRP', 'BTC'), 100.0)])
+
+if __name__ == "__main__":
+    unittest.main()
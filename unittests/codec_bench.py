@@ -0,0 +1,40 @@
+# json parsing throughput per exchange, over messages recorded from the feeds
+# compares the decoder picked by gemini.codec with the former json.loads(payload.decode())
+# PYTHONPATH=. python unittests/codec_bench.py
+from gemini import codec
+import json, time
+
+NB_ROUNDS = 20000
+
+MESSAGES = {
+    'binance': b'{"stream":"ethbtc@depth","data":{"e":"depthUpdate","E":1537266545201,"s":"ETHBTC","U":266587442,"u":266587447,'
+               b'"b":[["0.03187400","2.38500000",[]],["0.03187300","0.00000000",[]],["0.03186200","12.64000000",[]]],'
+               b'"a":[["0.03188600","0.00000000",[]],["0.03188900","3.41600000",[]],["0.03190100","0.19000000",[]]]}}',
+    'bitfinex': b'[60891,[[0.031872,2,4.55926],[0.031871,1,0.5],[0.03187,3,12.3291],[0.031869,1,2.04],[0.031881,1,-1.2],'
+                b'[0.031882,2,-8.1],[0.031883,1,-0.3],[0.031885,4,-20.7745]]]',
+    'hitbtc': b'{"jsonrpc":"2.0","method":"updateOrderbook","params":{"ask":[{"price":"0.031889","size":"0.000"},'
+              b'{"price":"0.031902","size":"1.250"}],"bid":[{"price":"0.031861","size":"4.200"},{"price":"0.031855","size":"0.000"}],'
+              b'"symbol":"ETHBTC","sequence":53481934}}',
+    'cexio': b'{"e":"md","data":{"id":218419185,"buy":[[3187400,120000000],[3186200,1264000000],[3185000,50000000]],'
+             b'"sell":[[3188600,341600000],[3190100,19000000],[3191000,75000000]],"buy_total":1523.3,"sell_total":2201.1,'
+             b'"pair":"ETH:BTC"}}',
+    'bittrex': b'{"MarketName":"BTC-ETH","Nonce":412093,"Buys":[{"Type":0,"Rate":0.03187400,"Quantity":2.38500000},'
+               b'{"Type":1,"Rate":0.03187300,"Quantity":0.0}],"Sells":[{"Type":2,"Rate":0.03188600,"Quantity":3.41600000}],'
+               b'"Fills":[{"OrderType":"BUY","Rate":0.03188600,"Quantity":0.5,"TimeStamp":"2018-09-18T10:29:05.2"}]}',
+}
+
+def bench(decode, payload):
+    start = time.time()
+    for _ in range(NB_ROUNDS):
+        decode(payload)
+    return NB_ROUNDS / (time.time() - start)
+
+def stdlib_loads(payload):
+    return json.loads(payload.decode('utf8'))
+
+if __name__ == "__main__":
+    print('decoder: %s' % codec.NAME)
+    for exchange, payload in sorted(MESSAGES.items()):
+        assert codec.loads(payload) == stdlib_loads(payload)
+        print('%-8s: %s %8.0f msg/s, json.loads(str) %8.0f msg/s'
+              % (exchange, codec.NAME, bench(codec.loads, payload), bench(stdlib_loads, payload)))
@@ -0,0 +1,52 @@
+from gemini import codec
+from geminitest import GeminiTest
+import unittest, importlib.util, sys, json
+
+class Response(object):
+    def __init__(self, content):
+        self.content = content
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def load_codec(self, missing):
+        # loads a separate copy of the module with the given decoders not installed
+        saved = {name: sys.modules.get(name) for name in missing}
+        try:
+            for name in missing:
+                sys.modules[name] = None
+            spec = importlib.util.spec_from_file_location('codec_copy', codec.__file__)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+        finally:
+            for name, module in saved.items():
+                if module is None:
+                    del sys.modules[name]
+                else:
+                    sys.modules[name] = module
+
+    def test_decode(self):
+        payload = {'bids': [['0.03', '1.0']], 'asks': [], 'lastUpdateId': 12, 'symbol': 'ETHBTC'}
+        for text in (json.dumps(payload), json.dumps(payload).encode()):
+            self.assertEqual(codec.loads(text), payload)
+        self.assertEqual(codec.response_json(Response(b'[0, "hb"]')), [0, 'hb'])
+        with self.assertRaises(ValueError):
+            codec.loads(b'{"bids": [')
+
+    def test_fallback(self):
+        available = [name for name in ('orjson', 'ujson') if importlib.util.find_spec(name) is not None] + ['json']
+        self.assertEqual(codec.NAME, available[0])
+        # each decoder is replaced by the next available one, they all accept bytes and str and raise ValueError
+        for missing in (['orjson'], ['orjson', 'ujson']):
+            module = self.load_codec(missing)
+            self.assertEqual(module.NAME, [name for name in available if name not in missing][0])
+            self.assertEqual(module.loads(b'{"price": 0.03}'), {'price': 0.03})
+            self.assertEqual(module.loads('{"price": 0.03}'), {'price': 0.03})
+            self.assertEqual(module.response_json(Response(b'[1, 2]')), [1, 2])
+            with self.assertRaises(ValueError):
+                module.loads(b'{"price": ')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+from gemini.binance.depthcache import DepthCacheManager
+from geminitest import GeminiTest
+import unittest, time
+
+class SnapshotClient(object):
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+
+    def get_order_book(self, symbol, limit):
+        return self.snapshots.pop(0)
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def wait_synced(self, manager):
+        for _ in range(100):
+            with manager._lock:
+                if manager._last_update_id is not None and not manager._resyncing:
+                    return
+            time.sleep(0.01)
+        self.fail('depth cache not synchronized')
+
+    def test_diff_depth(self):
+        books = []
+        client = SnapshotClient([{'lastUpdateId': 100, 'bids': [['10.0', '1.0'], ['9.0', '2.0']], 'asks': [['11.0', '1.0'], ['12.0', '2.0']]},
+                                 {'lastUpdateId': 120, 'bids': [['10.5', '1.0']], 'asks': [['11.5', '1.0']]}])
+        manager = DepthCacheManager(client, 'XRPBTC', lambda depth_cache: books.append(depth_cache.get_order_book()), 2, 100, bm=object())
+        manager.RESYNC_DELAY = 0.01
+        # buffered while the snapshot is requested, replayed on top of it
+        manager.process_event({'U': 95, 'u': 101, 'b': [['10.0', '3.0']], 'a': []})
+        self.wait_synced(manager)
+        self.assertEqual(list(books[-1].bids.volumes), [3.0, 2.0])
+        manager.process_event({'U': 102, 'u': 103, 'b': [], 'a': [['11.0', '0.00000000']]})
+        self.assertEqual(list(books[-1].asks.prices), [12.0])
+        # gap between 103 and 110, the book is resynchronized
+        manager.process_event({'U': 110, 'u': 121, 'b': [['10.5', '2.0']], 'a': []})
+        self.wait_synced(manager)
+        self.assertEqual(manager._last_update_id, 121)
+        self.assertEqual(list(books[-1].bids.prices), [10.5])
+        self.assertEqual(list(books[-1].bids.volumes), [2.0])
+        self.assertEqual(manager.get_depth_cache().get_asks(), [[11.5, 1.0]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+from gemini.scheduler import Scheduler
+from gemini.exchange import DummyExchange
+from gemini import config
+from geminitest import GeminiTest
+import unittest, threading
+
+class SymbolExchange(DummyExchange):
+    def format_pair(self, pair):
+        return pair[0] + pair[1]
+
+class EventScheduler(Scheduler):
+    def __init__(self):
+        # no exchange is created, the evaluations are recorded
+        self.config = config
+        self.updated_pairs = set()
+        self.updated_pairs_lock = threading.Lock()
+        self.depth_event = threading.Event()
+        self.evaluations = []
+
+    def evaluate_pairs(self, pairs):
+        self.evaluations.append(pairs)
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_notify_depth(self):
+        xchg = SymbolExchange("FOO1")
+        self.assertEqual(xchg.symbol_pairs["XVGBTC"], ("XVG", "BTC"))
+        # the versions are counted with or without listeners
+        xchg.notify_depth("ETHBTC")
+        self.assertEqual(xchg.depth_versions["ETHBTC"], 1)
+        updates = []
+        xchg.add_depth_listener(lambda xchg, pair: updates.append((xchg.name, pair)))
+        xchg.notify_depth("ETHBTC")
+        self.assertEqual(updates, [("FOO1", ("ETH", "BTC"))])
+        self.assertEqual(xchg.depth_versions["ETHBTC"], 2)
+        # an unknown symbol is not notified
+        xchg.notify_depth("FOOBAR")
+        self.assertEqual(updates, [("FOO1", ("ETH", "BTC"))])
+        self.assertEqual(xchg.depth_versions["FOOBAR"], 1)
+
+    def test_updated_pairs(self):
+        config.PAIRS = [("ETH", "BTC"), ("XRP", "BTC"), ("XVG", "BTC")]
+        scheduler = EventScheduler()
+        xchg = SymbolExchange("FOO1")
+        xchg.add_depth_listener(scheduler.on_depth_update)
+        scheduler.wait_for_updates(0.01)
+        self.assertEqual(scheduler.evaluations, [])
+        # notified from the websocket threads, a pair updated twice is evaluated once and the pairs not traded are ignored
+        threads = [threading.Thread(target=xchg.notify_depth, args=(symbol,)) for symbol in ("XVGBTC", "ETHBTC", "XVGBTC", "TRXBTC")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scheduler.wait_for_updates(1.0)
+        self.assertEqual(scheduler.evaluations, [[("ETH", "BTC"), ("XVG", "BTC")]])
+        self.assertEqual(scheduler.updated_pairs, set())
+        self.assertFalse(scheduler.depth_event.is_set())
+        # only the pairs updated since are evaluated next
+        xchg.notify_depth("XRPBTC")
+        scheduler.wait_for_updates(1.0)
+        self.assertEqual(scheduler.evaluations[1:], [[("XRP", "BTC")]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+from gemini.executors import LaneExecutor, ExchangeExecutors
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, threading, time
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_priority_lanes(self):
+        executor = LaneExecutor('TEST', 1)
+        release = threading.Event()
+        calls = []
+        busy = executor.submit('MAINTENANCE', release.wait)
+        # queued behind the running balance refresh, the order goes before the book copies submitted earlier
+        futures = [executor.submit('DEPTH', calls.append, 'depth%d' % i) for i in range(3)]
+        futures.append(executor.submit('ORDER', calls.append, 'order'))
+        self.assertEqual(executor.get_usage()['DEPTH']['queued'], 3)
+        release.set()
+        for future in futures:
+            future.result(1.0)
+        self.assertTrue(busy.result())
+        self.assertEqual(calls, ['order', 'depth0', 'depth1', 'depth2'])
+        usage = executor.get_usage()
+        self.assertEqual((usage['DEPTH']['jobs'], usage['DEPTH']['queued'], usage['DEPTH']['max_queued']), (3, 0, 3))
+        self.assertEqual(usage['ORDER']['jobs'], 1)
+        executor.shutdown()
+        self.assertEqual(len(executor.threads), 1)
+
+    def test_burst(self):
+        executor = LaneExecutor('TEST', 4)
+        threads = set()
+        def copy():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+        # the first worker is idle when the burst arrives
+        executor.submit('DEPTH', sum, [1, 2]).result(1.0)
+        time.sleep(0.05)
+        start = time.time()
+        # the book copies of a burst of updates run in parallel, they do not wait for each other on the first worker
+        futures = [executor.submit('DEPTH', copy) for i in range(4)]
+        for future in futures:
+            future.result(1.0)
+        self.assertLess(time.time() - start, 0.35)
+        self.assertGreater(len(threads), 1)
+        executor.shutdown()
+
+    def test_failed_job(self):
+        executor = LaneExecutor('TEST', 2)
+        def fail():
+            raise RuntimeError('connection lost')
+        with self.assertRaises(RuntimeError):
+            executor.submit('ORDER', fail).result(1.0)
+        self.assertEqual(executor.submit('ORDER', sum, [1, 2]).result(1.0), 3)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            executor.submit('ORDER', sum, [1, 2])
+
+    def test_event_loop(self):
+        # the order lane of an exchange replaces the default executor of the loop
+        executors = ExchangeExecutors(config)
+        lane = executors.get('BITTREX').lane('ORDER')
+        loop = asyncio.new_event_loop()
+        result = loop.run_until_complete(loop.run_in_executor(lane, threading.current_thread))
+        self.assertTrue(result.name.startswith('BITTREX'))
+        self.assertIs(executors.get('BITTREX'), lane.executor)
+        self.assertEqual(executors.get_usage()['BITTREX']['ORDER']['jobs'], 1)
+        executors.shutdown()
+        loop.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,13 @@
 from gemini.gemini import Gemini, DummyBot
+from gemini.scheduler import Scheduler
+from gemini.order import Order
 import asyncio, threading
 from gemini import config
 from gemini.controller import ControllerTest
 from gemini.exchange import DummyExchange
 from gemini.logger import Logger as log
 from geminitest import GeminiTest
-import unittest, os, asyncio
+import unittest, os, asyncio, time
 
 class TestMethods(GeminiTest):
     def test_trading(self):
@@ -37,5 +39,52 @@ class TestMethods(GeminiTest):
         self.assertEqual(xchg_ask.orders['DUMMYORD0'].v, 1000.0)
         self.assertEqual(xchg_bid.orders['DUMMYORD0'].v, 1000.0)
 
+    def test_concurrent_legs(self):
+        class SlowExchange(DummyExchange):
+            async def submit_order_async(self, pair, side, price, volume):
+                await asyncio.sleep(0.2)
+                return self.submit_order(pair, side, price, volume)
+        xchg_ask = ControllerTest(SlowExchange("FOO1", {"BTC": 0.17053, "XVG": 0.0}))
+        xchg_bid = ControllerTest(DummyExchange("FOO2", {"BTC": 0.0, "XVG": 20.0}))
+        async def submit_legs():
+            return await asyncio.gather(xchg_ask.submit_leg(("XVG","BTC"), "BUY", 0.01, 1510.0),
+                                        xchg_bid.submit_leg(("XVG","BTC"), "SELL", 0.01, 1510.0))
+        loop = asyncio.new_event_loop()
+        start = time.time()
+        buy, sell = loop.run_until_complete(submit_legs())
+        loop.close()
+        self.assertEqual(len(xchg_ask.orders), 1)
+        self.assertEqual(len(xchg_bid.orders), 1)
+        self.assertEqual(xchg_ask.orders['DUMMYORD0'].v, 1000.0)
+        # both legs are sent at once, the slow exchange does not delay the other leg
+        self.assertLess(abs(buy.sent_time - sell.sent_time), 0.1)
+        self.assertLess(sell.ack_time, buy.ack_time)
+        self.assertGreaterEqual(buy.ack_time - buy.sent_time, 0.2)
+        self.assertLess(time.time() - start, 0.4)
+        # a failed leg returns None
+        xchg_bid = ControllerTest(DummyExchange("FOO2"))
+        loop = asyncio.new_event_loop()
+        self.assertIsNone(loop.run_until_complete(xchg_bid.submit_leg(("XVG","BTC"), "SELL", 0.01, 1510.0)))
+        loop.close()
+
+    def test_legs_between_phases(self):
+        class SlowExchange(DummyExchange):
+            async def submit_order_async(self, pair, side, price, volume):
+                await asyncio.sleep(0.2)
+                return self.submit_order(pair, side, price, volume)
+        scheduler = Scheduler.__new__(Scheduler)
+        scheduler.name = 'TEST'
+        scheduler.loop = asyncio.new_event_loop()
+        scheduler.start_loop()
+        asker = ControllerTest(SlowExchange("FOO1"), {"BTC": 0.17053, "XVG": 0.0})
+        bidder = ControllerTest(DummyExchange("FOO2"), {"BTC": 0.0, "XVG": 20.0})
+        scheduler.controllers = [asker, bidder]
+        # no tick phase is running, the legs are sent and acknowledged from the loop thread
+        legs = scheduler.perform_arbitrage(("XVG", "BTC"), bidder, asker, Order(0.01, 10.0), Order(0.01, 10.0))
+        legs.result(1.0)
+        self.assertEqual(len(asker.orders), 1)
+        self.assertEqual(len(bidder.orders), 1)
+        scheduler.stop_loop()
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
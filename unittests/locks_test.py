@@ -0,0 +1,86 @@
+from gemini.locks import BalanceLocks
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from geminitest import GeminiTest
+from concurrent.futures import ThreadPoolExecutor
+import unittest, threading, time, asyncio
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def hold(self, locks, keys, duration, events):
+        with locks.hold(keys):
+            events.append(('start', keys[0][1]))
+            time.sleep(duration)
+            events.append(('end', keys[0][1]))
+
+    def test_disjoint_balances(self):
+        locks = BalanceLocks()
+        events = []
+        eth = [('BINANCE', 'ETH'), ('BINANCE', 'BTC'), ('HITBTC', 'ETH'), ('HITBTC', 'BTC')]
+        xrp = [('BITFINEX', 'XRP'), ('BITFINEX', 'USDT'), ('BITTREX', 'XRP'), ('BITTREX', 'USDT')]
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(self.hold, locks, eth, 0.2, events)
+            executor.submit(self.hold, locks, xrp, 0.2, events)
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual(locks.get_usage(), {'locks': 8, 'acquired': 2, 'contended': 0})
+
+    def test_shared_balances(self):
+        locks = BalanceLocks()
+        events = []
+        eth = [('BINANCE', 'ETH'), ('BINANCE', 'BTC'), ('HITBTC', 'ETH'), ('HITBTC', 'BTC')]
+        # listed in the reverse order, the locks are still taken in the same order
+        xrp = [('HITBTC', 'XRP'), ('HITBTC', 'BTC'), ('BINANCE', 'XRP'), ('BINANCE', 'BTC')]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(self.hold, locks, eth, 0.1, events)
+            time.sleep(0.02)
+            executor.submit(self.hold, locks, xrp, 0.1, events)
+        self.assertEqual(events, [('start', 'ETH'), ('end', 'ETH'), ('start', 'XRP'), ('end', 'XRP')])
+        self.assertEqual(locks.get_usage()['contended'], 1)
+
+    def test_release_on_error(self):
+        locks = BalanceLocks()
+        with self.assertRaises(RuntimeError):
+            with locks.hold([('BINANCE', 'ETH')]):
+                raise RuntimeError('aborted')
+        self.assertFalse(any(lock.locked() for lock in locks.locks.values()))
+
+    def test_legs_in_flight(self):
+        locks = BalanceLocks()
+        asker = ControllerTest(DummyExchange("FOO1"), {"BTC": 20.0, "XVG": 0.0})
+        bidder = ControllerTest(DummyExchange("FOO2"), {"BTC": 0.0, "XVG": 2000.0})
+        asker.balance_locks = bidder.balance_locks = locks
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        released = threading.Event()
+        def update_balances():
+            # a slow balance update of the asker holds its locks
+            with locks.hold([("FOO1", "BTC"), ("FOO1", "XVG")]):
+                released.wait()
+        updater = threading.Thread(target=update_balances, daemon=True)
+        updater.start()
+        try:
+            time.sleep(0.02)
+            buy = asyncio.run_coroutine_threadsafe(asker.submit_leg(("XVG", "BTC"), "BUY", 0.01, 1510.0), loop)
+            sell = asyncio.run_coroutine_threadsafe(bidder.submit_leg(("XVG", "BTC"), "SELL", 0.01, 1510.0), loop)
+            # the other leg and the event loop are not blocked by the contended locks
+            self.assertEqual(sell.result(0.5).v, 1000.0)
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(0.5)
+            self.assertFalse(buy.done())
+            self.assertAlmostEqual(bidder.balances["XVG"], 1000.0)
+        finally:
+            released.set()
+        # the booking of the asker leg completes once the balance update is published
+        self.assertEqual(buy.result(0.5).v, 1000.0)
+        self.assertEqual(len(asker.orders), 1)
+        self.assertAlmostEqual(asker.balances["BTC"], 20.0 - 10.0 * (1.0 + asker.xchg.trading_fee))
+        updater.join()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+if __name__ == "__main__":
+    unittest.main()
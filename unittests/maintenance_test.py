@@ -0,0 +1,139 @@
+from gemini.maintenance import MaintenanceScheduler
+from gemini.controller import Controller
+from gemini.exchange import Exchange, DummyExchange
+from gemini.bitfinexapi import Bitfinex
+from gemini.pending import PendingRequests
+from gemini.order import Order
+from gemini.locks import BalanceLocks
+from gemini.executors import ExchangeExecutors
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, concurrent.futures, threading, time
+
+class SlowExchange(DummyExchange):
+    def __init__(self, name, balances, release):
+        super(SlowExchange, self).__init__(name)
+        self.rest_balances = balances
+        self.release = release
+
+    def get_all_balances(self):
+        self.release.wait()
+        return dict(self.rest_balances)
+
+class OrderSocket(object):
+    # websocket of the order entry, the updates are answered from another thread
+    def __init__(self, xchg):
+        self.xchg = xchg
+        self.authenticated = True
+        self.queue_processor = self
+        self.updates = []
+
+    def update_order(self, id, price, amount):
+        self.updates.append((id, price, amount, time.time()))
+        threading.Timer(0.01, self.xchg.pending_orders.resolve, args=(('ou', id), [id + 1])).start()
+        return True
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def wait_for(self, updates, expected):
+        start = time.time()
+        while len(updates) < expected and time.time() - start < 2.0:
+            time.sleep(0.01)
+
+    def test_slow_exchange(self):
+        config.MAINTENANCE_INTERVALS = {'ORDERS': 25, 'BALANCES': 50, 'RECONCILIATION': 500, 'BOOKCHECK': 100}
+        locks = BalanceLocks()
+        released, hung = threading.Event(), threading.Event()
+        released.set()
+        fast = Controller(SlowExchange('FAST', {'BTC': 1.0, 'ETH': 10.0}, released))
+        slow = Controller(SlowExchange('SLOW', {'BTC': 2.0, 'ETH': 20.0}, hung))
+        slow.balances = {'BTC': 1.5, 'ETH': 15.0}
+        slow.previous_balances = dict(slow.balances)
+        fast.balance_locks = slow.balance_locks = locks
+        updates = []
+        maintenance = MaintenanceScheduler(config, [fast, slow], {fast: [], slow: []}, lambda controller, job: updates.append((controller.xchg.name, job)), ExchangeExecutors(config))
+        now = time.time()
+        maintenance.submit_due_jobs(now)
+        self.wait_for(updates, 1)
+        self.assertEqual(updates, [('FAST', 'BALANCES')])
+        self.assertEqual(fast.balances, {'BTC': 1.0, 'ETH': 10.0})
+        # the balances of the hung exchange are still tradeable, its REST call is not made under the locks
+        with locks.hold([('SLOW', 'BTC'), ('SLOW', 'ETH')]):
+            self.assertEqual(slow.balances['BTC'], 1.5)
+        # the next job of the fast exchange is not delayed, the hung exchange is not polled twice
+        maintenance.submit_due_jobs(now + 30)
+        self.wait_for(updates, 2)
+        self.assertEqual(updates, [('FAST', 'BALANCES'), ('FAST', 'ORDERS')])
+        self.assertEqual(maintenance.running, {slow: 'BALANCES'})
+        # once the REST call returns, the balances are published at once
+        hung.set()
+        self.wait_for(updates, 3)
+        self.assertEqual(updates[-1], ('SLOW', 'BALANCES'))
+        self.assertEqual(slow.balances, {'BTC': 2.0, 'ETH': 20.0})
+        self.assertTrue(slow.new_balance_detected)
+        self.assertEqual(maintenance.get_timings()['BALANCES']['runs'], 2)
+        maintenance.stop()
+
+    def test_intervals(self):
+        config.MAINTENANCE_INTERVALS = {'ORDERS': 25, 'BALANCES': 50, 'RECONCILIATION': 500, 'BOOKCHECK': 100}
+        streamed = Controller(DummyExchange('STREAMED'))
+        streamed.xchg.user_stream = True
+        polled = Controller(DummyExchange('POLLED'))
+        maintenance = MaintenanceScheduler(config, [streamed, polled], {}, None, ExchangeExecutors(config))
+        # the jobs are run by priority the first time
+        self.assertEqual(maintenance.get_due_job(polled, 0.0), 'BALANCES')
+        for controller in (streamed, polled):
+            for job in MaintenanceScheduler.JOBS:
+                maintenance.last_runs[(controller, job)] = 0.0
+        self.assertIsNone(maintenance.get_due_job(polled, 10.0))
+        self.assertEqual(maintenance.get_due_job(polled, 30.0), 'ORDERS')
+        maintenance.last_runs[(polled, 'ORDERS')] = 30.0
+        maintenance.last_runs[(streamed, 'ORDERS')] = 30.0
+        # the balances pushed by a user data stream are only reconciled
+        self.assertEqual(maintenance.get_due_job(polled, 50.0), 'BALANCES')
+        self.assertIsNone(maintenance.get_due_job(streamed, 50.0))
+        maintenance.stop()
+
+    def test_reprice_between_phases(self):
+        config.WEBSOCKET_ORDER_TIMEOUT = 0.2
+        # the scheduler loop runs on its own thread, no phase is running
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        xchg = Bitfinex.__new__(Bitfinex)
+        Exchange.__init__(xchg, Bitfinex.all_pairs, None, loop, [False])
+        xchg.name = 'BITFINEX'
+        xchg.trading_fee = 0.002
+        xchg.pending_orders = PendingRequests()
+        xchg.public_api = OrderSocket(xchg)
+        controller = Controller(xchg)
+        controller.balances = {'ETH': 10.0, 'BTC': 1.0}
+        order = Order(orderID=100, price=0.05, volume=1.0, type='SELL', pair=('ETH', 'BTC'))
+        controller.book_order(order, order.pair, 'SELL', '0.05', '1.0')
+        lane = ExchangeExecutors(config).get('BITFINEX')
+        try:
+            new_order = lane.submit('MAINTENANCE', controller.reprice_order, order, 0.051).result(2.0)
+            self.assertEqual(new_order.id, '101')
+            self.assertEqual(list(controller.orders.keys()), ['101'])
+            self.assertEqual(len(xchg.public_api.updates), 1)
+            # the loop is held past the timeout: the update is given up and never sent afterwards
+            loop.call_soon_threadsafe(time.sleep, 1.5)
+            with self.assertRaises(concurrent.futures.TimeoutError):
+                lane.submit('MAINTENANCE', controller.reprice_order, new_order, 0.052).result(3.0)
+            given_up = time.time()
+            time.sleep(0.5)
+            self.assertEqual(len(xchg.public_api.updates), 1)
+            self.assertTrue(all(update[3] < given_up for update in xchg.public_api.updates))
+            self.assertEqual(xchg.pending_orders.futures, {})
+            self.assertEqual(list(controller.orders.keys()), ['101'])
+        finally:
+            config.WEBSOCKET_ORDER_TIMEOUT = 5
+            lane.shutdown()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+if __name__ == "__main__":
+    unittest.main()
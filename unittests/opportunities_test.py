@@ -0,0 +1,69 @@
+from gemini.opportunities import OpportunityQueue
+from gemini.profit_matrix import ProfitMatrix
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from gemini.order import Order
+from geminitest import GeminiTest
+import unittest
+
+def profit_obj(bid, ask, volume, profit):
+    return {"bidder_order": Order(bid, volume), "asker_order": Order(ask, volume), "profit": profit, "profit_pct": 1.0, "rebalancing": False}
+
+class StreamedBalances(dict):
+    # balances updated by a user data stream while they are iterated
+    def items(self):
+        raise RuntimeError('dictionary changed size during iteration')
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_allocation(self):
+        xchg1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.1, "ETH": 10.0, "XRP": 1000.0, "USDT": 0.0})
+        xchg2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.04, "ETH": 0.0, "XRP": 1000.0, "USDT": 2000.0})
+        xchg3 = ControllerTest(DummyExchange("TEST3"), {"BTC": 0.1, "ETH": 10.0, "XRP": 0.0, "USDT": 0.0})
+        queue = OpportunityQueue({'BTC': 1.0, 'USDT': 0.0001})
+        # 0.0002 BTC, the best profit once converted
+        queue.add(('XRP', 'USDT'), xchg1, xchg2, profit_obj(0.52, 0.5, 1000, 2.0))
+        # 0.0001 BTC, on the TEST2 BTC balance
+        queue.add(('ETH', 'BTC'), xchg1, xchg2, profit_obj(0.031, 0.03, 1.0, 0.0001))
+        # 0.00005 BTC, the TEST2 BTC balance is allocated to the better ETH/BTC trade
+        queue.add(('XRP', 'BTC'), xchg1, xchg2, profit_obj(0.00011, 0.0001, 100, 0.00005))
+        # 0.00004 BTC, the ETH/BTC book of TEST1 is already used
+        queue.add(('ETH', 'BTC'), xchg1, xchg3, profit_obj(0.031, 0.03, 1.0, 0.00004))
+        opportunities = queue.allocate([xchg1, xchg2, xchg3])
+        self.assertEqual([(opportunity.pair, opportunity.bidder, opportunity.asker) for opportunity in opportunities],
+                         [(('XRP', 'USDT'), xchg1, xchg2), (('ETH', 'BTC'), xchg1, xchg2)])
+        self.assertAlmostEqual(sum(opportunity.value for opportunity in opportunities), 0.0003)
+        # the balances of the controllers are left to perform_arbitrage
+        self.assertEqual(xchg2.balances["BTC"], 0.04)
+        # the exchanges with active orders are not traded
+        xchg2.has_active_orders = True
+        opportunities = queue.allocate([xchg1, xchg2, xchg3])
+        self.assertEqual([(opportunity.pair, opportunity.asker) for opportunity in opportunities], [(('ETH', 'BTC'), xchg3)])
+        # the skipped opportunities are reported, to evaluate their pairs again once the exchange is free
+        self.assertEqual([opportunity.pair for opportunity in queue.deferred], [('XRP', 'USDT'), ('ETH', 'BTC'), ('XRP', 'BTC')])
+
+    def test_streamed_balances(self):
+        xchg1 = ControllerTest(DummyExchange("TEST1"))
+        xchg2 = ControllerTest(DummyExchange("TEST2"))
+        xchg1.balances = StreamedBalances({"BTC": 0.1, "ETH": 10.0})
+        xchg2.balances = StreamedBalances({"BTC": 0.1, "ETH": 0.0})
+        queue = OpportunityQueue({'BTC': 1.0})
+        queue.add(('ETH', 'BTC'), xchg1, xchg2, profit_obj(0.031, 0.03, 1.0, 0.0001))
+        # the allocation works on a snapshot of the balances
+        self.assertEqual(len(queue.allocate([xchg1, xchg2])), 1)
+
+    def test_rates(self):
+        xchg1 = ControllerTest(DummyExchange("TEST1"), {}, {"ETH_BTC": {"bids": [Order(0.03, 1)], "asks": [Order(0.032, 1)]},
+                                                            "BTC_USDT": {"bids": [Order(6000, 1)], "asks": [Order(6020, 1)]}})
+        xchg2 = ControllerTest(DummyExchange("TEST2"), {}, {"ETH_BTC": {"bids": [Order(0.032, 1)], "asks": [Order(0.034, 1)]}})
+        matrix = ProfitMatrix([xchg1, xchg2], [('ETH', 'BTC'), ('BTC', 'USDT')])
+        matrix.update()
+        self.assertEqual(matrix.get_rate('BTC'), 1.0)
+        self.assertAlmostEqual(matrix.get_rate('ETH'), 0.032)
+        self.assertAlmostEqual(matrix.get_rate('USDT'), 1.0 / 6010)
+        self.assertIsNone(matrix.get_rate('XRP'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -43,8 +43,7 @@ class TestOrderPriceUpdate(GeminiTest):
                                         self,
                                         expected_orders)
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
+        # cancelled and submitted again at mid-spread in the same cycle
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 2)
 
@@ -57,8 +56,7 @@ class TestOrderPriceUpdate(GeminiTest):
                                         self,
                                         expected_orders)
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
+        # cancelled and submitted again at mid-spread in the same cycle
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 2)
 
@@ -75,14 +73,11 @@ class TestOrderPriceUpdate(GeminiTest):
                                         self,
                                         expected_orders)
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
+        # cancelled and submitted again at mid-spread in the same cycle
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 2)
         order_book["XVG_BTC"] = {"bids":[Order(0.00001875, 10000)],"asks":[Order(0.00001877, 20000)]}
         controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 2)
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 3)
 
         # same situation, except that we are BTC rich. so we can save the XVG, and take the loss in BTC
@@ -97,18 +92,15 @@ class TestOrderPriceUpdate(GeminiTest):
                                         self,
                                         expected_orders)
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
+        # cancelled and submitted again at mid-spread in the same cycle
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 2)
         order_book["XVG_BTC"] = {"bids":[Order(0.00001875, 10000)],"asks":[Order(0.00001877, 20000)]}
         controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 2)
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 3)
 
         expected_orders = [(('IOTA','BTC'), 'BUY', '0.0001486225', '781.00'),
-                            (('IOTA','BTC'), 'BUY', '0.00014960', '775.00')]
+                            (('IOTA','BTC'), 'BUY', '0.00014960', '771.00')]
         order_book = {"IOTA_BTC":{"bids":[Order(0.00014861, 1000)],"asks":[Order(0.0001486225, 1000)]}}
         controller = BrokerTestPriceUpdate(DummyExchangePriceUpdate("TEST1", 1.0),
                                         {"BTC": 0.11633054, "IOTA": 0},
@@ -120,7 +112,7 @@ class TestOrderPriceUpdate(GeminiTest):
         self.assertEqual(controller.count, 1)
         order_book["IOTA_BTC"] = {"bids":[Order(0.000149, 1000)],"asks":[Order(0.0001502, 1000)]}
         controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
+        self.assertEqual(controller.count, 2)
 
     def test_offline_balances(self):
         expected_orders = [(('XVG','BTC'), 'BUY', '0.00000756', '19000'),
@@ -133,14 +125,13 @@ class TestOrderPriceUpdate(GeminiTest):
                                         expected_orders)
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
         self.assertEqual(controller.offline_balances, {'BTC': 0.026602719999999996, 'XVG': 39000.0})
-        controller.query_active_orders(asyncio.new_event_loop(), [False])
-        self.assertEqual(controller.count, 1)
-        self.assertEqual(controller.offline_balances, {'BTC': 0.09856635999999999, 'XVG': 29500.0})
+        # cancelled and submitted again at mid-spread in the same cycle
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.count, 2)
         self.assertEqual(controller.offline_balances, {'BTC': 0.028676859999999985, 'XVG': 38500.0})
         controller.submit_order(('XVG','BTC'), 'BUY', '0.00000756', '19000')
         self.assertEqual(controller.offline_balances, {'BTC': -0.11525042, 'XVG': 57500.0})
+        # no balance left to buy at mid-spread, the order is only cancelled
         controller.query_active_orders(asyncio.new_event_loop(), [False])
         self.assertEqual(controller.offline_balances, {'BTC': -0.04328678000000001, 'XVG': 48000.0})
         self.assertEqual(controller.count, 3)
@@ -0,0 +1,86 @@
+from gemini.orderbook import OrderBook, IncrementalOrderBook
+from gemini.order import Order
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from gemini import config
+from geminitest import GeminiTest
+import unittest
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_order_book(self):
+        book = OrderBook.from_levels([("0.00012", "100"), ("0.00011", "200"), ("0.0001", "300")],
+                                     [("0.00013", "50"), ("0.00014", "150")])
+        self.assertEqual(book.best_bid(), 0.00012)
+        self.assertEqual(book.best_ask(), 0.00013)
+        self.assertEqual(len(book['bids']), 3)
+        self.assertEqual(book['bids'][1].p, 0.00011)
+        self.assertEqual(book['asks'][1].v, 150)
+        top = book.top(2)
+        self.assertEqual(list(top.bids.prices), [0.00012, 0.00011])
+        self.assertEqual(list(top.asks.volumes), [50, 150])
+        self.assertEqual(book.bids.min_volume_level(250), (0.00011, 300))
+        self.assertEqual(book.asks.min_volume_level(1000), (0.00014, 200))
+        self.assertTrue(OrderBook().is_empty())
+        self.assertEqual(OrderBook().best_bid(), None)
+        self.assertEqual(OrderBook().bids.min_volume_level(1), (0, 0))
+
+    def test_min_vol(self):
+        config.MIN_VOL['XRP'] = 250
+        controller = ControllerTest(DummyExchange("TEST1"), {"BTC": 1, "XRP": 2000},
+                                    {"XRP_BTC":{"bids":[Order(0.00012, 100), Order(0.00011, 200)],"asks":[Order(0.00013, 50), Order(0.00014, 150)]}})
+        bid = controller.get_best_bid_min_vol(("XRP", "BTC"))
+        self.assertEqual((bid.p, bid.v), (0.00011, 300))
+        ask = controller.get_best_ask_min_vol(("XRP", "BTC"))
+        self.assertEqual((ask.p, ask.v), (0.00014, 200))
+        bid = controller.get_best_bid_min_vol(("ETH", "BTC"))
+        self.assertEqual((bid.p, bid.v), (0, 0))
+        self.assertEqual(controller.get_highest_bid(("XRP", "BTC")), 0.00012)
+        self.assertEqual(controller.get_lowest_ask(("ETH", "BTC")), None)
+
+    def test_incremental_book(self):
+        book = IncrementalOrderBook(2)
+        book.reset([(10, 1), (9, 2), (8, 3)], [(11, 1), (12, 2), (13, 3)])
+        top = book.publish()
+        self.assertEqual(list(top.bids.prices), [10, 9])
+        self.assertEqual(list(top.asks.prices), [11, 12])
+        # deltas below the top levels do not republish the book
+        book.update_bid(7, 5)
+        book.update_bid(8, 0)
+        book.update_ask(13, 4)
+        self.assertFalse(book.changed)
+        self.assertTrue(book.publish() is top)
+        book.update_bid(9, 2)
+        self.assertFalse(book.changed)
+        # deltas within the top levels
+        book.update_bid(9, 4)
+        self.assertTrue(book.changed)
+        self.assertEqual(list(book.publish().bids.volumes), [1, 4])
+        book.update_ask(11, 0)
+        self.assertEqual(list(book.publish().asks.prices), [12, 13])
+        book.update_bid(9.5, 1)
+        self.assertEqual(list(book.publish().bids.prices), [10, 9.5])
+        book.remove(10)
+        self.assertEqual(list(book.publish().bids.prices), [9.5, 9])
+        self.assertFalse(book.changed)
+
+    def test_published_snapshots(self):
+        xchg = DummyExchange("TEST1")
+        book = OrderBook.from_levels([(10, 1)], [(11, 1)])
+        xchg.publish_depth("XRPBTC", book)
+        self.assertTrue(xchg.depths["XRPBTC"] is book)
+        self.assertEqual(book.version, 1)
+        self.assertTrue(book.timestamp is not None)
+        new_book = OrderBook.from_levels([(10, 2)], [(11, 1)])
+        xchg.publish_depth("XRPBTC", new_book)
+        # readers holding the previous snapshot keep a consistent book
+        self.assertEqual(book.bids.volumes[0], 1)
+        self.assertEqual(new_book.version, 2)
+        self.assertEqual(xchg.depth_versions["XRPBTC"], 2)
+        xchg.publish_depth("XRPBTC", OrderBook(), False)
+        self.assertEqual(xchg.depths["XRPBTC"].version, 2)
+
+if __name__ == "__main__":
+    unittest.main()
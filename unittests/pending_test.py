@@ -0,0 +1,145 @@
+from gemini.pending import PendingRequests
+from gemini.hitbtc.connector import HitBTCConnector
+from gemini.exchange import Exchange
+from gemini.bitfinexapi import Bitfinex
+from gemini.hitbtcapi import Hitbtc
+from gemini.controller import Controller
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, threading, os, tempfile, itertools
+
+class SilentSocket(object):
+    # authenticated websocket of the order entry, the orders are answered after their timeout
+    def __init__(self):
+        self.authenticated = True
+        self.logged_in = True
+        self.queue_processor = self
+        self.conn = self
+        self.orders = []
+
+    def new_order(self, **order):
+        self.orders.append(order)
+        return True
+
+    def place_order(self, custom_id=None, **order):
+        self.orders.append(order)
+        return True
+
+class LookupApi(object):
+    # REST api knowing the orders by client order id
+    def __init__(self):
+        self.orders = {}
+
+    async def get_order_async(self, client_order_id):
+        return self.orders.get(client_order_id)
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_pending_requests(self):
+        pending = PendingRequests()
+        async def request(client_id, result=None, error=None, timeout=1):
+            future = pending.add(client_id)
+            if result is not None or error is not None:
+                # resolved from another thread, as the websocket responses
+                threading.Thread(target=pending.resolve, args=(client_id, result, error)).start()
+            return await pending.wait(client_id, future, timeout)
+        loop = asyncio.new_event_loop()
+        self.assertEqual(loop.run_until_complete(request('A', {'id': 1})), {'id': 1})
+        with self.assertRaises(RuntimeError):
+            loop.run_until_complete(request('B', error=RuntimeError('rejected')))
+        with self.assertRaises(asyncio.TimeoutError):
+            loop.run_until_complete(request('C', timeout=0.1))
+        loop.close()
+        # late or unknown responses are ignored
+        self.assertFalse(pending.resolve('C', {'id': 3}))
+        self.assertEqual(len(pending.futures), 0)
+
+    def test_late_order(self):
+        config.WEBSOCKET_ORDER_TIMEOUT = 0.1
+        xchg = Bitfinex.__new__(Bitfinex)
+        Exchange.__init__(xchg, Bitfinex.all_pairs, None, None, [False])
+        xchg.name = 'BITFINEX'
+        xchg.trading_fee = 0.002
+        xchg.pending_orders = PendingRequests()
+        xchg.client_ids = itertools.count(1)
+        xchg.public_api = SilentSocket()
+        controller = Controller(xchg)
+        controller.balances = {'ETH': 10.0, 'BTC': 1.0}
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertRaises(asyncio.TimeoutError):
+                loop.run_until_complete(xchg.submit_order_async(('ETH', 'BTC'), 'SELL', '0.05', '1.0'))
+        finally:
+            config.WEBSOCKET_ORDER_TIMEOUT = 5
+            loop.close()
+        self.assertEqual(controller.orders, {})
+        # the order was accepted, its notification arrives after the timeout and books it
+        order = [42, None, xchg.public_api.orders[0]['cid'], 'tETHBTC', 0, 0, -1.0, -1.0, 'EXCHANGE LIMIT', None, None, None, 0, 'ACTIVE', None, None, 0.05]
+        xchg.on_notification([0, 'on-req', None, None, order, None, 'SUCCESS', 'Submitted'], 0)
+        self.assertEqual(list(controller.orders.keys()), ['42'])
+        self.assertAlmostEqual(controller.balances['ETH'], 9.0)
+        self.assertTrue(controller.has_active_orders)
+        # its report on the authenticated channel does not book it twice
+        xchg.on_account('on', order, 0)
+        self.assertEqual(len(controller.orders), 1)
+        self.assertEqual(xchg.pending_orders.late, {})
+
+    def test_order_lookup(self):
+        config.WEBSOCKET_ORDER_TIMEOUT = 0.1
+        xchg = Hitbtc.__new__(Hitbtc)
+        Exchange.__init__(xchg, Hitbtc.all_pairs, None, None, [False])
+        xchg.name = 'HITBTC'
+        xchg.pending_orders = PendingRequests()
+        xchg.client_order_ids = {}
+        xchg.public_api = SilentSocket()
+        xchg.trade_api = LookupApi()
+        loop = asyncio.new_event_loop()
+        try:
+            # not answered in time and unknown to the REST api: the order is kept until its response or its report
+            with self.assertRaises(asyncio.TimeoutError):
+                loop.run_until_complete(xchg.submit_order_async(('ETH', 'BTC'), 'BUY', '0.05', '1.0'))
+            self.assertEqual(len(xchg.pending_orders.late), 1)
+            # not answered in time but found by its client order id
+            def place_order(custom_id=None, **order):
+                xchg.trade_api.orders[order['clientOrderId']] = {'id': '43', 'clientOrderId': order['clientOrderId'], 'cumQuantity': '0'}
+                return True
+            xchg.public_api.place_order = place_order
+            order = loop.run_until_complete(xchg.submit_order_async(('ETH', 'BTC'), 'BUY', '0.05', '1.0'))
+        finally:
+            config.WEBSOCKET_ORDER_TIMEOUT = 5
+            loop.close()
+        self.assertEqual(order.id, '43')
+        self.assertEqual(list(xchg.client_order_ids.keys()), ['43'])
+        self.assertEqual(len(xchg.pending_orders.late), 1)
+
+    def test_hitbtc_responses(self):
+        # the connector opens its wss.log in the working directory
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.chdir(tmpdir)
+            try:
+                conn = HitBTCConnector(silent=True)
+            finally:
+                os.chdir(cwd)
+        responses = []
+        def on_response(request, response):
+            if request['method'] != 'newOrder':
+                return False
+            responses.append((request['id'], response))
+            return True
+        conn.on_response = on_response
+        conn.requests = {'abc': {'method': 'newOrder', 'params': {}, 'id': 'abc'},
+                         'login': {'method': 'login', 'params': {}, 'id': 'login'}}
+        conn._on_message(None, b'{"jsonrpc": "2.0", "result": true, "id": "login"}')
+        self.assertTrue(conn.logged_in)
+        self.assertEqual(conn.q.get(False)[1], 'Success')
+        conn._on_message(None, b'{"jsonrpc": "2.0", "result": {"id": "42", "clientOrderId": "abc"}, "id": "abc"}')
+        self.assertEqual(responses, [('abc', {'jsonrpc': '2.0', 'result': {'id': '42', 'clientOrderId': 'abc'}, 'id': 'abc'})])
+        self.assertTrue(conn.q.empty())
+        # not connected
+        self.assertFalse(conn.send('newOrder', custom_id='def'))
+
+if __name__ == "__main__":
+    unittest.main()
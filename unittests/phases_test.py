@@ -0,0 +1,162 @@
+from gemini.scheduler import Scheduler
+from gemini.executors import ExchangeExecutors
+from concurrent.futures import ThreadPoolExecutor
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from gemini.order import Order
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, threading, time
+
+class PhaseScheduler(Scheduler):
+    def __init__(self):
+        # no exchange is created
+        self.name = 'TEST'
+        self.config = config
+        self.error = [False]
+        self.loop = asyncio.new_event_loop()
+        self.running_jobs = {}
+        self.late_jobs = {}
+        self.nb_evaluations = 0
+        self.phase_stats = {}
+        self.evaluated_versions = {}
+        self.deferred_pairs = {}
+        self.updated_pairs = set()
+        self.updated_pairs_lock = threading.Lock()
+        self.depth_event = threading.Event()
+        self.executors = ExchangeExecutors(config)
+        self.evaluation_executor = ThreadPoolExecutor(max_workers=config.EVALUATION_WORKERS)
+        self.dispatch_executor = ThreadPoolExecutor(max_workers=config.DISPATCH_WORKERS)
+        self.start_loop()
+
+class SlowExchange(DummyExchange):
+    async def submit_order_async(self, pair, side, price, volume):
+        await asyncio.sleep(0.2)
+        return self.submit_order(pair, side, price, volume)
+
+class PendingMatrix(object):
+    # every pair has a positive spread
+    def update(self, pairs):
+        pass
+
+    def compute(self, pairs):
+        pass
+
+    def has_candidates(self, pair):
+        return True
+
+    def get_rate(self, alt):
+        return 1.0
+
+class TradeCalculator(object):
+    def __init__(self, trades, release):
+        self.trades = trades
+        self.release = release
+        self.error = False
+
+    def check_profits(self):
+        self.release.wait()
+        return True
+
+    def get_trades(self):
+        return self.trades
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_deadlines(self):
+        config.PHASE_TIMEOUTS['DEPTH'] = 0.1
+        config.EXCHANGE_PHASE_TIMEOUTS = {'SLOW': {'DEPTH': 0.2}}
+        scheduler = PhaseScheduler()
+        release = threading.Event()
+        balances = {}
+        calls = []
+        def update(name, balance):
+            calls.append(name)
+            if name == 'HUNG':
+                release.wait()
+            elif name == 'SLOW':
+                time.sleep(0.15)
+            balances[name] = balance
+            return balance
+        jobs = [(('DEPTH', name), name, update, (name, balance)) for name, balance in (('FAST', 1.0), ('SLOW', 2.0), ('HUNG', 3.0))]
+        start = time.time()
+        results = scheduler.run_phase('DEPTH', jobs)
+        # the hung exchange does not stall the others, the slow one has a longer deadline
+        self.assertLess(time.time() - start, 0.3)
+        self.assertEqual(results, {('DEPTH', 'FAST'): 1.0, ('DEPTH', 'SLOW'): 2.0})
+        self.assertEqual(list(scheduler.late_jobs.keys()), [('DEPTH', 'HUNG')])
+        # the late job is not started again, its result is applied on the next tick
+        release.set()
+        results = scheduler.run_phase('DEPTH', jobs)
+        self.assertEqual(results[('DEPTH', 'HUNG')], 3.0)
+        self.assertEqual(calls.count('HUNG'), 1)
+        self.assertEqual(scheduler.late_jobs, {})
+        self.assertEqual(scheduler.running_jobs, {})
+        timings = scheduler.get_phase_timings()['DEPTH']
+        self.assertEqual((timings['runs'], timings['late']), (2, 1))
+        scheduler.stop_loop()
+
+    def test_failed_job(self):
+        scheduler = PhaseScheduler()
+        def fail():
+            raise RuntimeError('connection lost')
+        self.assertEqual(scheduler.run_phase('DEPTH', [(('DEPTH', 'TEST1'), 'TEST1', fail, ())]), {})
+        self.assertEqual(scheduler.running_jobs, {})
+        scheduler.stop_loop()
+
+    def test_legs_after_deadline(self):
+        config.PHASE_TIMEOUTS['EXECUTE'] = 0.05
+        scheduler = PhaseScheduler()
+        asker = ControllerTest(SlowExchange("FOO1"), {"BTC": 0.17053, "XVG": 0.0})
+        bidder = ControllerTest(DummyExchange("FOO2"), {"BTC": 0.0, "XVG": 20.0})
+        scheduler.controllers = [asker, bidder]
+        legs = []
+        def execute():
+            legs.append(scheduler.perform_arbitrage(("XVG", "BTC"), bidder, asker, Order(0.01, 10.0), Order(0.01, 10.0)))
+            legs[0].result()
+        start = time.time()
+        scheduler.run_phase('EXECUTE', [(('EXECUTE', ('XVG', 'BTC')), None, execute, ())])
+        self.assertLess(time.time() - start, 0.15)
+        # no phase is running anymore, the slow leg is still sent and acknowledged
+        legs[0].result(1.0)
+        self.assertEqual(len(asker.orders), 1)
+        self.assertEqual(len(bidder.orders), 1)
+        scheduler.stop_loop()
+
+    def test_late_evaluation(self):
+        config.PHASE_TIMEOUTS['PROFITS'] = 0.1
+        scheduler = PhaseScheduler()
+        bidder = ControllerTest(DummyExchange("FOO2"), {"BTC": 0.0, "XVG": 20.0})
+        asker = ControllerTest(DummyExchange("FOO1"), {"BTC": 0.17053, "XVG": 0.0})
+        bidder.depth_versions['XVG_BTC'] = asker.depth_versions['XVG_BTC'] = 1
+        scheduler.controllers = [bidder, asker]
+        scheduler.profit_matrix = PendingMatrix()
+        hung, released = threading.Event(), threading.Event()
+        released.set()
+        calculators = []
+        def get_calculator(pair):
+            profit_obj = {"profit": 0.001, "profit_pct": 1.0, "bidder_order": Order(0.01, 10.0), "asker_order": Order(0.01, 10.0), "tick": len(calculators)}
+            calculators.append(TradeCalculator([(bidder, asker, profit_obj)], hung if len(calculators) == 0 else released))
+            return calculators[-1]
+        scheduler.get_calculator = get_calculator
+        executed = []
+        scheduler.execute_opportunity = lambda opportunity: executed.append(opportunity.profit_obj["tick"])
+        scheduler.trade_pairs([("XVG", "BTC")])
+        self.assertEqual(executed, [])
+        # the late evaluation completes between the ticks, with the books of the time
+        hung.set()
+        start = time.time()
+        while len(scheduler.running_jobs) > 0 and time.time() - start < 1.0:
+            time.sleep(0.01)
+        self.assertEqual(scheduler.updated_pairs, {("XVG", "BTC")})
+        # the books did not change, the pair is still evaluated again and its fresh opportunity is executed
+        scheduler.trade_pairs([("XVG", "BTC")])
+        self.assertEqual(len(calculators), 2)
+        self.assertEqual(executed, [1])
+        self.assertEqual(scheduler.late_jobs, {})
+        scheduler.stop_loop()
+
+if __name__ == "__main__":
+    unittest.main()
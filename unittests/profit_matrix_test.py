@@ -0,0 +1,120 @@
+from gemini.profit_calculator import ProfitCalculator
+from gemini.profit_matrix import ProfitMatrix
+from gemini.order import Order
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from gemini import config
+from geminitest import GeminiTest
+import unittest
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def check_same_trade(self, controllers, pair):
+        pc = ProfitCalculator(controllers, pair)
+        success = pc.check_profits()
+        matrix = ProfitMatrix(controllers, [pair])
+        matrix.update()
+        matrix.compute()
+        pc_matrix = ProfitCalculator(controllers, pair, matrix)
+        self.assertEqual(pc_matrix.check_profits(), success)
+        self.assertEqual(pc_matrix.error, pc.error)
+        (bidder, asker, profit_obj) = pc.get_best_trade()
+        (bidder_matrix, asker_matrix, profit_obj_matrix) = pc_matrix.get_best_trade()
+        self.assertEqual(bidder_matrix, bidder)
+        self.assertEqual(asker_matrix, asker)
+        if profit_obj is None:
+            self.assertEqual(profit_obj_matrix, None)
+            return None
+        for key in ('profit', 'profit_pct', 'rebalancing'):
+            self.assertEqual(profit_obj_matrix[key], profit_obj[key])
+        for key in ('bidder_order', 'asker_order'):
+            self.assertEqual(profit_obj_matrix[key].p, profit_obj[key].p)
+            self.assertEqual(profit_obj_matrix[key].v, profit_obj[key].v)
+        return profit_obj_matrix
+
+    def test_profit_calc(self):
+        config.MAX_BIDASK_SPREAD_PCT['DEFAULT']['BTC'] = 1.0
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.17053, "XRP": 2000}, {"XRP_BTC":{"bids":[Order(0.000105, 5000)],"asks":[Order(0.0001055714286, 6000)]}})
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.25, "XRP": 2000}, {"XRP_BTC":{"bids":[Order(0.000108428571, 1650)],"asks":[Order(0.000109, 4000)]}})
+        profit_obj = self.check_same_trade([controller1, controller2], ("XRP", "BTC"))
+        self.assertEqual(profit_obj['profit'], 0.003891082841596217)
+
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.25, "XRP": 1600}, {"XRP_BTC":{"bids":[Order(0.000108428571, 1650)],"asks":[Order(0.000109, 4000)]}})
+        profit_obj = self.check_same_trade([controller1, controller2], ("XRP", "BTC"))
+        self.assertEqual(profit_obj['profit'], 0.0038643983582685617)
+
+        config.MAX_VOL['XRP'] = 2000
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.46553, "XRP": 3000}, {"XRP_BTC":{"bids":[Order(0.000105, 5000)],"asks":[Order(0.0001055714286, 6000)]}})
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.75, "XRP": 4000}, {"XRP_BTC":{"bids":[Order(0.000108428571, 3650)],"asks":[Order(0.000109, 4000)]}})
+        profit_obj = self.check_same_trade([controller1, controller2], ("XRP", "BTC"))
+        self.assertEqual(profit_obj['profit'], 0.004849298379271096)
+
+    def test_price_rounding(self):
+        config.MAX_VOL = {
+             'BTC':0.2,
+             'XRP':1000,
+             'ETH':3.0,
+             'DASH':3,
+             'XVG':10000
+             }
+        config.MAX_BIDASK_SPREAD_PCT['DEFAULT']['BTC'] = 1.0
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.17053, "ETH": 2}, {"ETH_BTC":{"bids":[Order(0.105, 5)],"asks":[Order(0.1055714286, 6)]}})
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.25, "ETH": 2}, {"ETH_BTC":{"bids":[Order(0.108428571, 1.65)],"asks":[Order(0.109, 4)]}})
+        self.check_same_trade([controller1, controller2], ("ETH", "BTC"))
+
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"ETH": 1.17053, "DASH": 2}, {"DASH_ETH":{"bids":[Order(0.7105, 5)],"asks":[Order(0.71055714286, 6)]}})
+        controller2 = ControllerTest(DummyExchange("BINANCE"), {"ETH": 1.25, "DASH": 2}, {"DASH_ETH":{"bids":[Order(0.7412428571, 1.65)],"asks":[Order(0.741243, 4)]}})
+        self.check_same_trade([controller1, controller2], ("DASH", "ETH"))
+
+        # too poor to trade test
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.13183, "XVG": 3500}, {"XVG_BTC":{"bids":[Order(0.0000105, 5000)],"asks":[Order(0.00001055714286, 6000)]}})
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.75, "XVG": 2900}, {"XVG_BTC":{"bids":[Order(0.0000108428571, 8000)],"asks":[Order(0.0000109, 4000)]}})
+        self.assertEqual(self.check_same_trade([controller1, controller2], ("XVG", "BTC")), None)
+
+        config.MIN_VOL["XVG"] = 2000
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.75, "XVG": 3900}, {"XVG_BTC":{"bids":[Order(0.0000108428571, 8000)],"asks":[Order(0.0000109, 4000)]}})
+        profit_obj = self.check_same_trade([controller1, controller2], ("XVG", "BTC"))
+        self.assertEqual(profit_obj['bidder_order'].v, 3000.0)
+
+    def test_usdt_rounding(self):
+        bittrex = DummyExchange("TEST1")
+        bittrex.trading_fee = 0.0025
+        binance = DummyExchange("TEST2")
+        binance.trading_fee = 0.001
+        controller1 = ControllerTest(bittrex, {"USDT": 142.28802552, "NEO": 0}, {"NEO_USDT":{"bids":[Order(63, 5000)],"asks":[Order(64.02374, 6000)]}})
+        controller2 = ControllerTest(binance, {"USDT": 0, "NEO": 2.22}, {"NEO_USDT":{"bids":[Order(64.34625, 8000)],"asks":[Order(65, 4000)]}})
+        profit_obj = self.check_same_trade([controller1, controller2], ("NEO", "USDT"))
+        self.assertEqual(profit_obj['profit'], 0.20742045616904434)
+
+    def test_all_pairs(self):
+        # one matrix for several pairs, with a missing book and a pair without any spread
+        config.MAX_BIDASK_SPREAD_PCT['DEFAULT']['BTC'] = 1.0
+        depth1 = {"XRP_BTC":{"bids":[Order(0.000105, 5000)],"asks":[Order(0.0001055714286, 6000)]},
+                  "ETH_BTC":{"bids":[Order(0.105, 5)],"asks":[Order(0.106, 6)]}}
+        depth2 = {"XRP_BTC":{"bids":[Order(0.000108428571, 1650)],"asks":[Order(0.000109, 4000)]},
+                  "ETH_BTC":{"bids":[Order(0.1051, 5)],"asks":[Order(0.1059, 6)]},
+                  "XVG_BTC":{"bids":[Order(0.0000105, 5000)],"asks":[Order(0.00001055714286, 6000)]}}
+        controller1 = ControllerTest(DummyExchange("TEST1"), {"BTC": 0.17053, "XRP": 2000, "ETH": 2, "XVG": 5000}, depth1)
+        controller2 = ControllerTest(DummyExchange("TEST2"), {"BTC": 0.25, "XRP": 2000, "ETH": 2, "XVG": 5000}, depth2)
+        matrix = ProfitMatrix([controller1, controller2], [("XRP", "BTC"), ("ETH", "BTC"), ("XVG", "BTC")])
+        matrix.update()
+        matrix.compute()
+        self.assertEqual(matrix.cells[("XRP", "BTC")], [(controller2, controller1)])
+        self.assertEqual(matrix.cells[("ETH", "BTC")], [])
+        self.assertEqual(matrix.cells[("XVG", "BTC")], [])
+        self.assertTrue(matrix.has_candidates(("XRP", "BTC")))
+        self.assertFalse(matrix.has_candidates(("ETH", "BTC")))
+
+        # crossed book
+        depth1["ETH_BTC"] = {"bids":[Order(0.107, 5)],"asks":[Order(0.106, 6)]}
+        matrix.update([("ETH", "BTC")])
+        matrix.compute([("ETH", "BTC")])
+        self.assertTrue(("ETH", "BTC") in matrix.corrupted)
+        pc = ProfitCalculator([controller1, controller2], ("ETH", "BTC"), matrix)
+        self.assertFalse(pc.check_profits())
+        self.assertTrue(pc.error)
+
+if __name__ == "__main__":
+    unittest.main()
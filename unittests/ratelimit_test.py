@@ -0,0 +1,64 @@
+from gemini.ratelimit import RateLimiter
+from gemini.sessions import get_limiter, get_rate_limit_usage
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, time
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_endpoint_weights(self):
+        limiter = RateLimiter('BINANCE')
+        self.assertEqual(limiter.classify('post', 'https://api.binance.com/api/v3/order'), (True, {'REQUEST': 1, 'ORDER': 1}))
+        self.assertEqual(limiter.classify('get', 'https://api.binance.com/api/v3/openOrders?timestamp=1'), (False, {'REQUEST': 40}))
+        self.assertEqual(limiter.classify('get', 'https://api.binance.com/api/v1/ping'), (False, {'REQUEST': 1}))
+        limiter = RateLimiter('HITBTC')
+        self.assertTrue(limiter.classify('delete', 'https://api.hitbtc.com/api/2/order/123')[0])
+        self.assertFalse(limiter.classify('get', 'https://api.hitbtc.com/api/2/order')[0])
+
+    def test_order_priority(self):
+        config.RATE_LIMITS = {'TEST': {'REQUEST': (10, 1)}}
+        config.RATE_LIMIT_RESERVE = 0.2
+        limiter = RateLimiter('TEST')
+        # the queries leave the reserve to the orders
+        for _ in range(8):
+            self.assertEqual(limiter.take(False, {'REQUEST': 1}), 0)
+        self.assertGreater(limiter.take(False, {'REQUEST': 1}), 0)
+        self.assertEqual(limiter.take(True, {'REQUEST': 1}), 0)
+        self.assertEqual(limiter.take(True, {'REQUEST': 1}), 0)
+        self.assertGreater(limiter.take(True, {'REQUEST': 1}), 0)
+        usage = limiter.get_usage()['REQUEST']
+        self.assertEqual((usage['requests'], usage['weight'], usage['throttled']), (10, 10, 2))
+        # refilled at 10 tokens per second
+        start = time.time()
+        limiter.acquire('post', 'https://api.test.com/order')
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_async_acquire(self):
+        config.RATE_LIMITS = {'TEST': {'REQUEST': (20, 1)}}
+        limiter = RateLimiter('TEST')
+        ticks = []
+        async def ticker():
+            # the event loop keeps running while the requests wait for their tokens
+            for _ in range(10):
+                ticks.append(time.time())
+                await asyncio.sleep(0.02)
+        async def requests():
+            await asyncio.gather(ticker(), *[limiter.acquire_async('get', 'https://api.test.com/ticker') for _ in range(20)])
+        loop = asyncio.new_event_loop()
+        start = time.time()
+        loop.run_until_complete(requests())
+        loop.close()
+        self.assertGreater(time.time() - start, 0.15)
+        self.assertEqual(len(ticks), 10)
+        self.assertEqual(limiter.get_usage()['REQUEST']['requests'], 20)
+
+    def test_usage(self):
+        limiter = get_limiter('BITTREX')
+        self.assertIs(limiter, get_limiter('BITTREX'))
+        limiter.acquire('get', 'https://bittrex.com/api/v1.1/market/buylimit')
+        self.assertGreaterEqual(get_rate_limit_usage()['BITTREX']['REQUEST']['requests'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+from gemini.sessions import get_session, warm_up
+from gemini import config
+from geminitest import GeminiTest
+import unittest, threading
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_pooled_session(self):
+        session = get_session('TEST')
+        self.assertIs(session, get_session('TEST'))
+        self.assertIsNot(session, get_session('TEST2'))
+        for url in ('https://api.test.com/', 'http://api.test.com/'):
+            self.assertEqual(session.get_adapter(url)._pool_maxsize, config.HTTP_POOL_SIZE)
+
+    def test_warm_up(self):
+        session = get_session('TEST_WARMUP')
+        urls = []
+        lock = threading.Lock()
+        def head(url, timeout=None):
+            with lock:
+                urls.append(url)
+        session.head = head
+        warm_up('TEST_WARMUP', 'https://api.test.com/', 3).join(5)
+        self.assertEqual(urls, ['https://api.test.com/'] * 3)
+        # never more connections than the pool can keep
+        del urls[:]
+        warm_up('TEST_WARMUP', 'https://api.test.com/', config.HTTP_POOL_SIZE + 5).join(5)
+        self.assertEqual(len(urls), config.HTTP_POOL_SIZE)
+
+if __name__ == "__main__":
+    unittest.main()
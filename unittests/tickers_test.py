@@ -0,0 +1,47 @@
+from gemini.exchange import Exchange
+from gemini.bittrexapi import Bittrex
+from gemini.cexioapi import CEX
+from geminitest import GeminiTest
+import unittest
+
+class BittrexApi(object):
+    def __init__(self):
+        self.nb_requests = 0
+    def get_market_summaries(self):
+        self.nb_requests += 1
+        return {'success': True, 'result': [{'MarketName': 'BTC-ETH', 'Bid': 0.05, 'Ask': 0.06},
+                                            {'MarketName': 'BTC-XRP', 'Bid': 0.0001, 'Ask': 0.0003},
+                                            {'MarketName': 'BTC-DOGE', 'Bid': 1.0, 'Ask': 1.0}]}
+
+class CEXApi(object):
+    def __init__(self):
+        self.requests = []
+    def tickers(self, *currencies):
+        self.requests.append(currencies)
+        return {'e': 'tickers', 'ok': 'ok', 'data': [{'pair': 'ETH:BTC', 'bid': 0.05, 'ask': '0.06'},
+                                                     {'pair': 'BTC:USD', 'bid': 6000, 'ask': 6001}]}
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_bittrex_tickers(self):
+        xchg = Bittrex.__new__(Bittrex)
+        Exchange.__init__(xchg, Bittrex.all_pairs, None, None, [False])
+        xchg.api = BittrexApi()
+        tickers = xchg.get_ticker()
+        self.assertEqual(xchg.api.nb_requests, 1)
+        self.assertEqual(set(tickers.keys()), {('ETH', 'BTC'), ('XRP', 'BTC')})
+        self.assertAlmostEqual(tickers[('ETH', 'BTC')], 0.055)
+
+    def test_cex_tickers(self):
+        xchg = CEX.__new__(CEX)
+        Exchange.__init__(xchg, CEX.all_pairs, None, None, [False])
+        xchg.trade_api = CEXApi()
+        tickers = xchg.get_ticker()
+        self.assertEqual(xchg.trade_api.requests, [('BTC',)])
+        self.assertEqual(list(tickers.keys()), [('ETH', 'BTC')])
+        self.assertAlmostEqual(tickers[('ETH', 'BTC')], 0.055)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+from gemini.exchange import Exchange, DummyExchange
+from gemini.controller import Controller
+from gemini.order import Order
+from gemini.binanceapi import Binance
+from gemini.bittrexapi import Bittrex
+from gemini.bitfinexapi import Bitfinex
+from gemini.pending import PendingRequests
+from gemini import config
+from geminitest import GeminiTest
+import unittest, asyncio, itertools, threading
+
+class BinanceApi(object):
+    def __init__(self):
+        self.requests = []
+    def create_order(self, **params):
+        self.requests.append(params)
+        return {'orderId': 28, 'status': 'EXPIRED', 'executedQty': '0.4'}
+
+class FokSocket(object):
+    # authenticated websocket of the order entry: the fill-or-kill orders are notified unexecuted, then closed once matched
+    def __init__(self, xchg):
+        self.xchg = xchg
+        self.authenticated = True
+        self.queue_processor = self
+
+    def new_order(self, cid, type, symbol, amount, price):
+        order = [7, None, cid, symbol, 0, 0, float(amount), float(amount), type, None, None, None, 0, 'ACTIVE', None, None, float(price)]
+        def answer():
+            self.xchg.on_notification([0, 'on-req', None, None, order, None, 'SUCCESS', 'Submitted'], 0)
+            self.xchg.on_account('oc', order[:6] + [0.0] + order[7:13] + ['EXECUTED @ %s(%s)' % (price, amount)] + order[14:], 0)
+        threading.Timer(0.01, answer).start()
+        return True
+
+class StatusApi(object):
+    # v1 REST api, the new orders are matched after their response
+    async def place_order_async(self, amount, price, side, ord_type, symbol):
+        return {'id': 8, 'executed_amount': '0.0'}
+
+    async def status_order_async(self, order_id):
+        return {'id': order_id, 'is_live': False, 'executed_amount': '1.0', 'avg_execution_price': '0.05'}
+
+class ImmediateExchange(DummyExchange):
+    time_in_force_modes = ('GTC', 'IOC')
+
+    def __init__(self, name, balances=None):
+        super(ImmediateExchange, self).__init__(name, balances)
+        self.nb_queries = 0
+        self.fill = 0.5 # share of the volume executed
+
+    def submit_order(self, pair, side, price, volume):
+        order = super(ImmediateExchange, self).submit_order(pair, side, price, volume)
+        if self.get_time_in_force() != 'GTC':
+            order.executed = float(volume) * self.fill
+            self.orders.remove(order)
+        return order
+
+    def query_active_orders(self):
+        self.nb_queries += 1
+        return self.orders
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_time_in_force(self):
+        xchg = Binance.__new__(Binance)
+        Exchange.__init__(xchg, Binance.all_pairs, None, None, [False])
+        xchg.name = 'BINANCE'
+        xchg.api = BinanceApi()
+        order = xchg.submit_order(('ETH', 'BTC'), 'BUY', '0.05', '1.0')
+        self.assertEqual((xchg.api.requests[-1]['timeInForce'], order.executed), ('GTC', None))
+        config.TIME_IN_FORCE = {'BINANCE': 'IOC', 'BITTREX': 'IOC'}
+        order = xchg.submit_order(('ETH', 'BTC'), 'BUY', '0.05', '1.0')
+        self.assertEqual((xchg.api.requests[-1]['timeInForce'], order.executed), ('IOC', 0.4))
+        # the exchanges without immediate orders keep their orders on the book
+        xchg = Bittrex.__new__(Bittrex)
+        xchg.name = 'BITTREX'
+        self.assertEqual(xchg.get_time_in_force(), 'GTC')
+
+    def test_bitfinex_fill_or_kill(self):
+        config.TIME_IN_FORCE = {'BITFINEX': 'FOK'}
+        xchg = Bitfinex.__new__(Bitfinex)
+        Exchange.__init__(xchg, Bitfinex.all_pairs, None, None, [False])
+        xchg.name = 'BITFINEX'
+        xchg.pending_orders = PendingRequests()
+        xchg.client_ids = itertools.count(1)
+        xchg.public_api = FokSocket(xchg)
+        xchg.trade_api = StatusApi()
+        loop = asyncio.new_event_loop()
+        # the executed amount comes with the oc event of the order, not with its on-req notification
+        order = loop.run_until_complete(xchg.submit_order_async(('ETH', 'BTC'), 'SELL', '0.05', '1.0'))
+        self.assertEqual((order.id, order.executed), ('7', 1.0))
+        self.assertEqual(xchg.pending_orders.futures, {})
+        # through REST, it comes with the status of the order
+        xchg.pending_orders = None
+        order = loop.run_until_complete(xchg.submit_order_async(('ETH', 'BTC'), 'BUY', '0.05', '1.0'))
+        self.assertEqual((order.id, order.executed), ('8', 1.0))
+        loop.close()
+
+    def test_immediate_legs(self):
+        config.TIME_IN_FORCE = {'IMMEDIATE': 'IOC'}
+        xchg = ImmediateExchange('IMMEDIATE', {'BTC': 1.0, 'ETH': 10.0})
+        controller = Controller(xchg)
+        controller.balances = {'BTC': 1.0, 'ETH': 10.0}
+        controller.offline_balances = controller.balances.copy()
+        controller.has_active_orders = True
+        # the volume of the leg is reserved by the scheduler before it is sent
+        controller.balances['ETH'] -= 2.0
+        loop = asyncio.new_event_loop()
+        order = loop.run_until_complete(controller.submit_leg(('ETH', 'BTC'), 'SELL', 0.05, 2.0))
+        self.assertEqual(order.executed, 1.0)
+        # only the executed volume is booked, the exchange is released without polling its open orders
+        self.assertEqual(controller.orders, {})
+        self.assertFalse(controller.has_active_orders)
+        self.assertAlmostEqual(controller.offline_balances['ETH'], 9.0)
+        # the unfilled 1.0 ETH is given back to the reserved balance, the executed 1.0 ETH is booked
+        self.assertAlmostEqual(controller.balances['ETH'], 8.0)
+        # nothing executed: the whole reservation is given back
+        xchg.fill = 0.0
+        controller.balances['ETH'] -= 2.0
+        loop.run_until_complete(controller.submit_leg(('ETH', 'BTC'), 'SELL', 0.05, 2.0))
+        self.assertAlmostEqual(controller.balances['ETH'], 8.0)
+        self.assertAlmostEqual(controller.offline_balances['ETH'], 9.0)
+        xchg.fill = 0.5
+        controller.query_active_orders(loop, [2])
+        self.assertEqual(xchg.nb_queries, 0)
+        loop.close()
+        # the resting orders are still polled
+        config.TIME_IN_FORCE = {}
+        controller.submit_order(('ETH', 'BTC'), 'SELL', '0.05', '2.0')
+        self.assertEqual(len(controller.orders), 1)
+        controller.query_active_orders(asyncio.new_event_loop(), [2])
+        self.assertEqual(xchg.nb_queries, 1)
+        self.assertTrue(controller.has_active_orders)
+
+if __name__ == "__main__":
+    unittest.main()
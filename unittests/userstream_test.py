@@ -0,0 +1,76 @@
+from gemini.exchange import Exchange, DummyExchange
+from gemini.controller import Controller
+from gemini.order import Order
+from gemini.binanceapi import Binance
+from gemini.bitfinexapi import Bitfinex
+from geminitest import GeminiTest
+import unittest
+
+class StreamedExchange(DummyExchange):
+    def __init__(self, name, balances=None):
+        super(StreamedExchange, self).__init__(name, balances)
+        self.user_stream = True
+
+    def get_all_balances(self):
+        return dict(self.balances)
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_controller_streams(self):
+        xchg = StreamedExchange('STREAMED', {'BTC': 1.0, 'ETH': 10.0})
+        controller = Controller(xchg)
+        # the balances are streamed once loaded from the REST api
+        xchg.publish_balance('BTC', 0.5)
+        self.assertEqual(controller.balances, {})
+        controller.balances = xchg.get_all_balances()
+        controller.previous_balances = controller.balances.copy()
+        xchg.publish_balance('BTC', 0.5)
+        self.assertEqual(controller.balances['BTC'], 0.5)
+        self.assertTrue(controller.new_balance_detected)
+        # open orders are served from the stream, a fill frees the exchange at once
+        order = Order(0.05, 2.0, 'BUY', ('ETH', 'BTC'), 'ID1')
+        xchg.publish_order(order, True)
+        self.assertTrue(controller.has_active_orders)
+        self.assertEqual([o.id for o in xchg.get_active_orders()], ['ID1'])
+        xchg.publish_order(order, False)
+        self.assertFalse(controller.has_active_orders)
+        self.assertEqual(xchg.get_active_orders(), [])
+        # the REST reconciliation reports the orders missed by the stream
+        xchg.orders = [Order(0.05, 1.0, 'SELL', ('ETH', 'BTC'), 'ID2')]
+        self.assertEqual(xchg.reconcile_active_orders(), {'ID2'})
+        self.assertEqual(xchg.reconcile_active_orders(), set())
+        # without a stream the REST api is queried
+        xchg.user_stream = False
+        xchg.orders = []
+        self.assertEqual(xchg.get_active_orders(), [])
+
+    def test_binance_user_stream(self):
+        xchg = Binance.__new__(Binance)
+        Exchange.__init__(xchg, Binance.all_pairs, None, None, [False])
+        xchg.process_user_message({'e': 'outboundAccountInfo', 'B': [{'a': 'BTC', 'f': '0.5', 'l': '0.1'}, {'a': 'ETH', 'f': '2', 'l': '0'}]})
+        self.assertEqual(xchg.stream_balances, {'BTC': 0.5, 'ETH': 2.0})
+        report = {'e': 'executionReport', 's': 'ETHBTC', 'S': 'SELL', 'p': '0.05', 'q': '2', 'z': '0.5', 'i': 12, 'X': 'PARTIALLY_FILLED'}
+        xchg.process_user_message(report)
+        order = xchg.stream_orders['12']
+        self.assertEqual((order.type, order.pair, order.p, order.v), ('SELL', ('ETH', 'BTC'), 0.05, 1.5))
+        report.update({'z': '2', 'X': 'FILLED'})
+        xchg.process_user_message(report)
+        self.assertEqual(xchg.stream_orders, {})
+
+    def test_bitfinex_user_stream(self):
+        xchg = Bitfinex.__new__(Bitfinex)
+        Exchange.__init__(xchg, Bitfinex.all_pairs, None, None, [False])
+        xchg.pending_orders = None
+        xchg.user_stream = True
+        xchg.on_account('ws', [['exchange', 'IOT', 100.0, 0, 80.0], ['margin', 'BTC', 1.0, 0, 1.0], ['exchange', 'BTC', 1.0, 0, None]], 0)
+        self.assertEqual(xchg.stream_balances, {'IOTA': 80.0})
+        order = [1, None, 7, 'tETHBTC', 0, 0, -1.5, -2.0, 'EXCHANGE LIMIT', None, None, None, 0, 'PARTIALLY FILLED @ 0.05(-0.5)', None, None, 0.05]
+        xchg.on_account('os', [order], 0)
+        self.assertEqual((xchg.stream_orders['1'].type, xchg.stream_orders['1'].v), ('SELL', 1.5))
+        xchg.on_account('oc', order[:13] + ['EXECUTED @ 0.05(-2.0)'] + order[14:], 0)
+        self.assertEqual(xchg.stream_orders, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+from gemini.scheduler import Scheduler
+from gemini.controller import ControllerTest
+from gemini.exchange import DummyExchange
+from gemini.orderbook import OrderBook
+from geminitest import GeminiTest
+import unittest
+
+class BookExchange(DummyExchange):
+    # counts the copies of its books
+    def __init__(self, name):
+        super(BookExchange, self).__init__(name)
+        self.nb_copies = 0
+
+    def format_pair(self, pair):
+        return pair[0] + pair[1]
+
+    def get_depth(self, base, alt):
+        self.nb_copies += 1
+        return OrderBook()
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_book_versions(self):
+        pair = ("ETH", "BTC")
+        xchg = BookExchange("FOO1")
+        controller = ControllerTest(xchg)
+        scheduler = Scheduler.__new__(Scheduler)
+        scheduler.controllers = [controller]
+        scheduler.evaluated_versions = {}
+        xchg.notify_depth("ETHBTC")
+        self.assertTrue(controller.depth_changed(pair))
+        controller.update_depth(None, None, pair)
+        self.assertEqual(xchg.nb_copies, 1)
+        self.assertEqual(scheduler.get_dirty_pairs([pair]), [pair])
+        # the version did not change: the book is neither copied nor evaluated again
+        self.assertFalse(controller.depth_changed(pair))
+        controller.update_depth(None, None, pair)
+        self.assertEqual(xchg.nb_copies, 1)
+        self.assertEqual(scheduler.get_dirty_pairs([pair]), [])
+        # a new version is
+        xchg.notify_depth("ETHBTC")
+        self.assertTrue(controller.depth_changed(pair))
+        controller.update_depth(None, None, pair)
+        self.assertEqual(xchg.nb_copies, 2)
+        self.assertEqual(scheduler.get_dirty_pairs([pair]), [pair])
+        # the books reset on a reconnection are copied again
+        xchg.invalidate_depths()
+        self.assertTrue(controller.depth_changed(pair))
+        controller.update_depth(None, None, pair)
+        self.assertEqual(xchg.nb_copies, 3)
+
+if __name__ == "__main__":
+    unittest.main()
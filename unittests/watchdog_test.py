@@ -0,0 +1,57 @@
+from gemini.watchdog import Watchdog
+from gemini.hitbtc.connector import HitBTCConnector
+from geminitest import GeminiTest
+import unittest, threading, time, os, tempfile
+
+class TestMethods(GeminiTest):
+    def __init__(self, *args, **kwargs):
+        super(TestMethods, self).__init__(*args, **kwargs)
+
+    def test_timeouts(self):
+        watchdog = Watchdog()
+        fired = {'slow': threading.Event(), 'fast': threading.Event(), 'cancelled': threading.Event()}
+        slow = watchdog.watch(0.3, fired['slow'].set)
+        fast = watchdog.watch(0.1, fired['fast'].set)
+        cancelled = watchdog.watch(0.1, fired['cancelled'].set)
+        slow.touch()
+        fast.touch()
+        cancelled.touch()
+        cancelled.cancel()
+        # keep touching the slow watch, it must not fire
+        for _ in range(5):
+            time.sleep(0.1)
+            slow.touch()
+        self.assertTrue(fired['fast'].is_set())
+        self.assertFalse(fired['slow'].is_set())
+        self.assertFalse(fired['cancelled'].is_set())
+        self.assertTrue(fired['slow'].wait(1))
+        # idle after firing until touched again
+        fired['fast'].clear()
+        time.sleep(0.2)
+        self.assertFalse(fired['fast'].is_set())
+        fast.touch()
+        self.assertTrue(fired['fast'].wait(1))
+
+    def test_quiet_hitbtc_socket(self):
+        # the connector opens its wss.log in the working directory
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.chdir(tmpdir)
+            try:
+                conn = HitBTCConnector(raw=True, silent=True, timeout=0.1)
+            finally:
+                os.chdir(cwd)
+        reconnects = []
+        conn.reconnect = lambda: reconnects.append(time.time())
+        conn._on_open(None)
+        conn._on_message(None, '{"jsonrpc": "2.0", "method": "snapshotOrderbook", "params": {"symbol": "ETHBTC"}}')
+        # a healthy socket with no update for longer than the timeout is kept open
+        time.sleep(0.3)
+        self.assertEqual(reconnects, [])
+        # the timeout still applies to a socket opened without any message
+        conn._on_open(None)
+        time.sleep(0.3)
+        self.assertEqual(len(reconnects), 1)
+
+if __name__ == "__main__":
+    unittest.main()